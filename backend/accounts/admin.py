@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
 from django.db.models import Q
-from math import radians, cos, sin, sqrt, atan2
+from gps.distancias import distancias
 
 from .models import (
     User,
@@ -15,19 +15,6 @@ from .models import (
 )
 
 
-# === FUNCIONES DE APOYO ===
-def haversine_distance(lat1, lon1, lat2, lon2):
-    """Calcula la distancia en kilómetros entre dos coordenadas GPS."""
-    if None in [lat1, lon1, lat2, lon2]:
-        return None
-    R = 6371  # Radio de la Tierra en km
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat / 2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    return R * c
-
-
 # === FILTRO PERSONALIZADO POR PROXIMIDAD GPS ===
 class NearbyUserFilter(admin.SimpleListFilter):
     title = _("Usuarios cercanos a una ubicación")
@@ -44,14 +31,15 @@ class NearbyUserFilter(admin.SimpleListFilter):
             # Coordenadas aproximadas del campus principal
             base_lat, base_lon = 11.5446, -72.9060
             max_distance_km = 3  # radio de 3 km
-            nearby_ids = []
-            for user in queryset:
-                if user.gps_latitude and user.gps_longitude:
-                    dist = haversine_distance(
-                        base_lat, base_lon, float(user.gps_latitude), float(user.gps_longitude)
-                    )
-                    if dist is not None and dist <= max_distance_km:
-                        nearby_ids.append(user.id)
+            filas = list(
+                queryset.filter(gps_latitude__isnull=False, gps_longitude__isnull=False)
+                .values_list("id", "gps_latitude", "gps_longitude")
+            )
+            if not filas:
+                return queryset.none()
+            ids, lats, lons = zip(*filas)
+            dist_km = distancias(base_lat, base_lon, lats, lons, exacta=True) / 1000
+            nearby_ids = [i for i, d in zip(ids, dist_km) if d <= max_distance_km]
             return queryset.filter(id__in=nearby_ids)
         return queryset
 
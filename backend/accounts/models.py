@@ -87,6 +87,10 @@ class UserActivityLog(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='accounts_activity_ts_id_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='accounts_activity_user_ts_idx'),
+        ]
 
 class Permission(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
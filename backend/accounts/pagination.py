@@ -0,0 +1,104 @@
+# accounts/pagination.py
+
+import base64
+import binascii
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre (campo de fecha, id), de lo más
+    reciente a lo más antiguo. Cada página es un rango sobre el índice
+    compuesto: sin COUNT(*) ni OFFSET, así que su costo no crece con la
+    profundidad en el historial.
+
+    La vista indica el campo con `keyset_campo` (por defecto "timestamp").
+    Respuesta: {"next": url | null, "previous": url | null, "results": [...]}
+    """
+    campo = "timestamp"
+    page_size = 20
+    max_page_size = 200
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Cursor inválido."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.campo = getattr(view, "keyset_campo", self.campo)
+        self.page_size = self._tamano(request)
+        posicion = self._decodificar(request.query_params.get(self.cursor_query_param), queryset.model)
+
+        reverso = posicion is not None and posicion[2]
+        orden = [self.campo, "id"] if reverso else [f"-{self.campo}", "-id"]
+        queryset = queryset.order_by(*orden)
+        if posicion is not None:
+            valor, pk, _ = posicion
+            operador = "gt" if reverso else "lt"
+            queryset = queryset.filter(
+                Q(**{f"{self.campo}__{operador}": valor}) | Q(**{self.campo: valor, f"id__{operador}": pk})
+            )
+
+        filas = list(queryset[: self.page_size + 1])
+        hay_mas = len(filas) > self.page_size
+        filas = filas[: self.page_size]
+        if reverso:
+            filas.reverse()
+
+        # Avanzar (hacia lo más antiguo) desde la última fila; retroceder desde la primera
+        if reverso:
+            self.siguiente = filas[-1] if filas else None
+            self.anterior = filas[0] if filas and hay_mas else None
+        else:
+            self.siguiente = filas[-1] if filas and hay_mas else None
+            self.anterior = filas[0] if filas and posicion is not None else None
+        return filas
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self._enlace(self.siguiente, reverso=False),
+            "previous": self._enlace(self.anterior, reverso=True),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def _tamano(self, request):
+        try:
+            tamano = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(tamano, self.max_page_size) if tamano > 0 else self.page_size
+
+    def _enlace(self, fila, reverso):
+        if fila is None:
+            return None
+        valor = getattr(fila, self.campo)
+        texto = f"{int(reverso)}|{valor.isoformat() if hasattr(valor, 'isoformat') else valor}|{fila.pk}"
+        cursor = base64.urlsafe_b64encode(texto.encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def _decodificar(self, cursor, modelo):
+        if not cursor:
+            return None
+        try:
+            reverso, valor, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 2)
+            campo = modelo._meta.get_field(self.campo)
+            return campo.to_python(valor), modelo._meta.pk.to_python(pk), reverso == "1"
+        except (binascii.Error, UnicodeDecodeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
@@ -11,6 +11,7 @@ from rest_framework.throttling import ScopedRateThrottle
 from accounts.permissions import HasRoleResourcePermission
 from rest_framework.permissions import IsAuthenticated
 from accounts.audit import AuditMixin
+from .pagination import KeysetPagination
 
 from .models import Role, Resource
 from .serializers import (
@@ -243,6 +244,8 @@ class UserActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = UserActivityLog.objects.select_related("user").all()
     serializer_class = UserActivityLogSerializer
     permission_classes = [HasRoleResourcePermission]
+    pagination_class = KeysetPagination
+    keyset_campo = "created_at"
     required_scopes = ["activitylogs.read"]
 
     def get_queryset(self):
@@ -63,6 +63,10 @@ TEMPLATES = [{
 }]
 
 WSGI_APPLICATION = "backend.wsgi.application"
+# Las transmisiones en vivo (SSE de gps/stream) requieren servir con ASGI, p. ej.:
+#   uvicorn backend.asgi:application   o   daphne backend.asgi:application
+# Bajo WSGI cada cliente ocuparía un worker, así que esos endpoints responden 501.
+ASGI_APPLICATION = "backend.asgi.application"
 
 # DB: SQLite por defecto; PostgreSQL si DB_ENGINE=postgres
 if os.getenv("DB_ENGINE", "sqlite") == "postgres":
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Posicion, Trayecto, AlertaGPS
+from .models import Posicion, UltimaPosicion, Trayecto, AlertaGPS, TareaPosicion, TiempoTramoHistorico, EventoZona
 
 @admin.register(Posicion)
 class PosicionAdmin(admin.ModelAdmin):
@@ -16,6 +16,28 @@ class PosicionAdmin(admin.ModelAdmin):
         return "-"
     ver_en_mapa.short_description = "Ver en mapa"
 
+@admin.register(UltimaPosicion)
+class UltimaPosicionAdmin(admin.ModelAdmin):
+    list_display = ("origen_tipo", "origen_id", "latitud", "longitud", "estado", "timestamp", "ruta")
+    list_filter = ("origen_tipo", "estado", "ruta__nombre")
+    search_fields = ("origen_id", "ruta__nombre")
+    readonly_fields = ("posicion", "timestamp", "actualizada_en")
+    ordering = ["-timestamp"]
+
+@admin.register(TareaPosicion)
+class TareaPosicionAdmin(admin.ModelAdmin):
+    list_display = ("posicion", "estado", "intentos", "creada_en", "tomada_en", "terminada_en")
+    list_filter = ("estado",)
+    readonly_fields = ("posicion", "reclamo", "creada_en", "tomada_en", "terminada_en", "error")
+    ordering = ["-creada_en"]
+
+@admin.register(TiempoTramoHistorico)
+class TiempoTramoHistoricoAdmin(admin.ModelAdmin):
+    list_display = ("ruta", "parada_origen", "parada_destino", "dia_semana", "hora", "muestras", "p50_segundos", "p90_segundos")
+    list_filter = ("ruta__nombre", "dia_semana")
+    readonly_fields = ("estado_percentiles", "actualizado_en")
+    ordering = ["ruta", "dia_semana", "hora"]
+
 @admin.register(Trayecto)
 class TrayectoAdmin(admin.ModelAdmin):
     list_display = ("ruta", "conductor", "fecha_inicio", "fecha_fin", "distancia_recorrida_km", "finalizado")
@@ -31,10 +53,10 @@ class TrayectoAdmin(admin.ModelAdmin):
 
 @admin.register(AlertaGPS)
 class AlertaGPSAdmin(admin.ModelAdmin):
-    list_display = ("tipo", "ruta", "detectada_en", "resuelta", "resuelta_en", "resuelta_por")
+    list_display = ("tipo", "ruta", "detectada_en", "ocurrencias", "ultima_deteccion_en", "resuelta", "resuelta_en", "resuelta_por")
     list_filter = ("resuelta", "ruta__nombre")
     search_fields = ("tipo", "descripcion", "ruta__nombre")
-    readonly_fields = ("detectada_en",)
+    readonly_fields = ("detectada_en", "ocurrencias", "ultima_deteccion_en", "distancia_maxima_m")
     ordering = ["-detectada_en"]
     actions = ["marcar_resueltas"]
 
@@ -42,3 +64,11 @@ class AlertaGPSAdmin(admin.ModelAdmin):
     def marcar_resueltas(self, request, queryset):
         for alerta in queryset.filter(resuelta=False):
             alerta.marcar_resuelta(usuario=request.user)
+
+
+@admin.register(EventoZona)
+class EventoZonaAdmin(admin.ModelAdmin):
+    list_display = ("zona", "tipo", "origen_tipo", "origen_id", "timestamp")
+    list_filter = ("tipo", "origen_tipo", "zona__nombre")
+    search_fields = ("origen_id", "zona__nombre")
+    ordering = ["-timestamp"]
@@ -0,0 +1,73 @@
+# gps/ajuste.py
+
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+# Radio (m) en el que se busca el trazado; se amplía con la precisión reportada.
+RADIO_M = getattr(settings, "GPS_AJUSTE_RADIO_M", 150)
+# Ventana de avance: lo que puede recorrer el bus desde el último ajuste.
+VELOCIDAD_MAX_MS = getattr(settings, "GPS_AJUSTE_VELOCIDAD_MAX_MS", 25)
+AVANCE_MIN_M = getattr(settings, "GPS_AJUSTE_AVANCE_MIN_M", 200)
+RETROCESO_M = getattr(settings, "GPS_AJUSTE_RETROCESO_M", 50)
+MAX_VEHICULOS = getattr(settings, "GPS_AJUSTE_MAX_VEHICULOS", 5000)
+
+
+class AjusteRuta:
+    """
+    Ajuste (map-matching) en ventana de las posiciones de cada vehículo a su
+    ruta. Por vehículo solo se guarda el último ajuste (ruta, recorrido,
+    timestamp), con un límite LRU de vehículos: estado acotado en memoria.
+    """
+
+    def __init__(self, max_vehiculos=MAX_VEHICULOS):
+        self.max_vehiculos = max_vehiculos
+        self._estados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _ventana(self, origen_id, ruta_id, timestamp):
+        with self._lock:
+            estado = self._estados.get(origen_id)
+        if estado is None or estado[0] != ruta_id:
+            return None, None
+        _, recorrido, anterior = estado
+        segundos = (timestamp - anterior).total_seconds()
+        if segundos < 0:
+            return None, None
+        return recorrido - RETROCESO_M, recorrido + max(AVANCE_MIN_M, segundos * VELOCIDAD_MAX_MS)
+
+    def ajustar(self, posicion, corredor, lat=None, lon=None):
+        """
+        Devuelve (lat, lon, recorrido, segmento, distancia) del punto ajustado,
+        o None si la posición está fuera del radio del trazado. `lat`/`lon`
+        reemplazan a las coordenadas reportadas (p. ej. ya filtradas).
+        """
+        radio = max(RADIO_M, 3 * float(posicion.precision or 0))
+        desde, hasta = self._ventana(posicion.origen_id, posicion.ruta_id, posicion.timestamp)
+        if lat is None:
+            lat, lon = float(posicion.latitud), float(posicion.longitud)
+        resultado = corredor.ajustar(lat, lon, radio, desde, hasta)
+        if resultado is None:
+            return None
+
+        distancia, segmento, t, recorrido = resultado
+        with self._lock:
+            self._estados[posicion.origen_id] = (posicion.ruta_id, recorrido, posicion.timestamp)
+            self._estados.move_to_end(posicion.origen_id)
+            while len(self._estados) > self.max_vehiculos:
+                self._estados.popitem(last=False)
+        lat, lon = corredor.punto(segmento, t)
+        return lat, lon, recorrido, segmento, distancia
+
+    def olvidar(self, origen_id):
+        with self._lock:
+            self._estados.pop(origen_id, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._estados.clear()
+
+
+ajuste_ruta = AjusteRuta()
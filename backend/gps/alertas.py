@@ -0,0 +1,205 @@
+# gps/alertas.py
+
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import AlertaGPS
+
+
+# Segundos durante los que una (ruta, tipo) comprobada sin episodio abierto no se vuelve a consultar.
+VERIFICACION_CIERRE_S = getattr(settings, "GPS_ALERTAS_VERIFICACION_CIERRE_S", 30)
+
+class CoalescedorAlertas:
+    """
+    Mantiene una sola alerta abierta por (ruta, tipo) y episodio: las
+    detecciones repetidas suman `ocurrencias` y actualizan la distancia
+    máxima sobre la misma fila, y la alerta se cierra al recuperarse.
+
+    Las alertas abiertas se indexan en memoria (se cargan una vez), así que
+    decidir entre crear, actualizar o cerrar no requiere consultas. Si el
+    índice quedó desfasado respecto de otro proceso, la restricción única de
+    alertas abiertas y el número de filas actualizadas lo corrigen. Al
+    cerrar, una (ruta, tipo) que no está en el índice se resuelve igualmente
+    en base de datos (pudo abrirla otro proceso); el resultado se recuerda
+    `VERIFICACION_CIERRE_S` segundos para no consultar en cada lectura.
+    """
+
+    def __init__(self):
+        self._abiertas = {}
+        self._verificadas = {}
+        self._cargado = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _clave(ruta_id, tipo):
+        return str(ruta_id), tipo
+
+    def _asegurar_cargado(self):
+        if self._cargado:
+            return
+        filas = AlertaGPS.objects.filter(resuelta=False).values_list("ruta_id", "tipo", "id")
+        with self._lock:
+            self._abiertas = {self._clave(ruta_id, tipo): alerta_id for ruta_id, tipo, alerta_id in filas}
+            self._cargado = True
+
+    def abierta(self, ruta_id, tipo):
+        self._asegurar_cargado()
+        with self._lock:
+            return self._abiertas.get(self._clave(ruta_id, tipo))
+
+    def registrar(self, ruta_id, tipo, descripcion="", distancia=None, posicion=None, momento=None, cantidad=1):
+        """
+        Registra `cantidad` detecciones. Devuelve (alerta_id, creada):
+        creada=False si se sumaron a la alerta abierta del mismo episodio.
+        """
+        momento = momento or timezone.now()
+        alerta_id = self.abierta(ruta_id, tipo)
+        if alerta_id is not None and not self._sumar([alerta_id], distancia, momento, cantidad):
+            return alerta_id, False
+
+        try:
+            with transaction.atomic():
+                alerta = AlertaGPS.objects.create(
+                    ruta_id=ruta_id,
+                    tipo=tipo,
+                    descripcion=descripcion,
+                    posicion=posicion,
+                    detectada_en=momento,
+                    ultima_deteccion_en=momento,
+                    distancia_maxima_m=distancia,
+                    ocurrencias=cantidad,
+                )
+        except IntegrityError:
+            # Otro proceso abrió el episodio: se suma a esa alerta
+            alerta_id = AlertaGPS.objects.filter(ruta_id=ruta_id, tipo=tipo, resuelta=False).values_list(
+                "id", flat=True
+            ).first()
+            if alerta_id is None:
+                raise
+            self._sumar([alerta_id], distancia, momento, cantidad)
+            self.indexar(ruta_id, tipo, alerta_id)
+            return alerta_id, False
+
+        self.indexar(ruta_id, tipo, alerta.pk)
+        return alerta.pk, True
+
+    def registrar_varias(self, detecciones, tipo, momento=None):
+        """
+        Versión por lotes de `registrar` para barridos: `detecciones` es
+        [(ruta_id, descripcion)]. Una actualización para los episodios ya
+        abiertos y un bulk_create para los nuevos. Devuelve las alertas creadas.
+        """
+        momento = momento or timezone.now()
+        abiertas, nuevas = {}, {}
+        for ruta_id, descripcion in detecciones:
+            alerta_id = self.abierta(ruta_id, tipo)
+            if alerta_id is not None:
+                abiertas[alerta_id] = (ruta_id, descripcion)
+            else:
+                nuevas.setdefault(str(ruta_id), (ruta_id, descripcion))
+        if abiertas:
+            for alerta_id in self._sumar(list(abiertas), None, momento):
+                ruta_id, descripcion = abiertas[alerta_id]
+                nuevas.setdefault(str(ruta_id), (ruta_id, descripcion))
+        if not nuevas:
+            return []
+
+        try:
+            with transaction.atomic():
+                creadas = AlertaGPS.objects.bulk_create([
+                    AlertaGPS(
+                        ruta_id=ruta_id, tipo=tipo, descripcion=descripcion,
+                        detectada_en=momento, ultima_deteccion_en=momento,
+                    )
+                    for ruta_id, descripcion in nuevas.values()
+                ])
+        except IntegrityError:
+            self.limpiar()
+            for ruta_id, descripcion in nuevas.values():
+                self.registrar(ruta_id, tipo, descripcion, momento=momento)
+            return []
+
+        for alerta in creadas:
+            self.indexar(alerta.ruta_id, tipo, alerta.pk)
+        return creadas
+
+    def cerrar(self, ruta_ids, tipo, momento=None):
+        """
+        Cierra (resuelve) los episodios abiertos de las rutas. Las que no están
+        en el índice se resuelven por (ruta, tipo), salvo que se hayan
+        comprobado hace poco: sin episodios abiertos el camino caliente no consulta.
+        """
+        self._asegurar_cargado()
+        momento = momento or timezone.now()
+        ahora = time.monotonic()
+        ids, faltantes = [], []
+        with self._lock:
+            for ruta_id in ruta_ids:
+                clave = self._clave(ruta_id, tipo)
+                alerta_id = self._abiertas.get(clave)
+                if alerta_id is not None:
+                    ids.append(alerta_id)
+                elif ahora - self._verificadas.get(clave, float("-inf")) > VERIFICACION_CIERRE_S:
+                    faltantes.append(ruta_id)
+
+        cerradas = 0
+        if ids:
+            cerradas += AlertaGPS.objects.filter(pk__in=ids, resuelta=False).update(
+                resuelta=True, resuelta_en=momento
+            )
+        if faltantes:
+            cerradas += AlertaGPS.objects.filter(ruta_id__in=faltantes, tipo=tipo, resuelta=False).update(
+                resuelta=True, resuelta_en=momento
+            )
+        with self._lock:
+            for ruta_id in ruta_ids:
+                clave = self._clave(ruta_id, tipo)
+                self._abiertas.pop(clave, None)
+                self._verificadas[clave] = ahora
+        return cerradas
+
+    def descartar(self, ruta_id, tipo, alerta_id):
+        """Quita del índice una alerta resuelta fuera del coalescedor (API, admin)."""
+        with self._lock:
+            if self._abiertas.get(self._clave(ruta_id, tipo)) == alerta_id:
+                del self._abiertas[self._clave(ruta_id, tipo)]
+
+    def limpiar(self):
+        with self._lock:
+            self._abiertas.clear()
+            self._verificadas.clear()
+            self._cargado = False
+
+    def indexar(self, ruta_id, tipo, alerta_id):
+        """Anota una alerta abierta creada fuera del coalescedor (o recién creada por él)."""
+        with self._lock:
+            self._verificadas.pop(self._clave(ruta_id, tipo), None)
+            if self._cargado:
+                self._abiertas[self._clave(ruta_id, tipo)] = alerta_id
+
+    def _sumar(self, ids, distancia, momento, cantidad=1):
+        """Suma ocurrencias en la misma fila. Devuelve las alertas que ya no estaban abiertas."""
+        cambios = {"ocurrencias": F("ocurrencias") + cantidad, "ultima_deteccion_en": momento}
+        if distancia is not None:
+            valor = Value(float(distancia), output_field=FloatField())
+            cambios["distancia_maxima_m"] = Greatest(Coalesce("distancia_maxima_m", valor), valor)
+        actualizadas = AlertaGPS.objects.filter(pk__in=ids, resuelta=False).update(**cambios)
+        if actualizadas == len(ids):
+            return set()
+        # Alguna se resolvió en otro proceso: se olvida para abrir un episodio nuevo
+        vigentes = set(AlertaGPS.objects.filter(pk__in=ids, resuelta=False).values_list("id", flat=True))
+        perdidas = set(ids) - vigentes
+        with self._lock:
+            for clave, alerta_id in list(self._abiertas.items()):
+                if alerta_id in perdidas:
+                    del self._abiertas[clave]
+        return perdidas
+
+
+coalescedor = CoalescedorAlertas()
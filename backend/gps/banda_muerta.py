@@ -0,0 +1,136 @@
+# gps/banda_muerta.py
+
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .distancias import equirectangular
+
+
+# Umbrales por tipo de origen: una posición que se movió menos de `metros` y
+# llegó antes de `segundos` desde la última aceptada se descarta. Pasado
+# `segundos` siempre se acepta una, que hace de latido del origen.
+UMBRALES = getattr(settings, "GPS_BANDA_MUERTA", {
+    "VEHICULO": {"metros": 10, "segundos": 30},
+    "USUARIO": {"metros": 25, "segundos": 60},
+})
+# Alias de caché compartida para repartir el estado entre workers (None: memoria del proceso).
+CACHE_ALIAS = getattr(settings, "GPS_BANDA_MUERTA_CACHE", None)
+CACHE_PREFIJO = "gps:banda"
+
+
+class FiltroBandaMuerta:
+    """
+    Descarta posiciones redundantes comparándolas con la última guardada de
+    cada origen. Decidir (`filtrar`) y recordar (`confirmar`) van por
+    separado para que solo cuenten las posiciones que llegaron a la base.
+    """
+
+    def __init__(self, umbrales=UMBRALES, cache_alias=CACHE_ALIAS):
+        self.umbrales = umbrales
+        self.cache_alias = cache_alias
+        self._ultimas = {}
+        self._contadores = {}
+        self._lock = threading.Lock()
+
+    def _cache(self):
+        return caches[self.cache_alias] if self.cache_alias else None
+
+    @staticmethod
+    def _clave(posicion):
+        return f"{CACHE_PREFIJO}:{posicion.origen_tipo}:{posicion.origen_id}"
+
+    @staticmethod
+    def _resumen(posicion):
+        return (
+            float(posicion.latitud),
+            float(posicion.longitud),
+            posicion.timestamp.timestamp(),
+            str(posicion.ruta_id),
+            posicion.estado,
+        )
+
+    def _redundante(self, posicion, ultima):
+        umbral = self.umbrales.get(posicion.origen_tipo)
+        if not umbral or ultima is None:
+            return False
+        lat, lon, ts, ruta_id, estado = self._resumen(posicion)
+        if ruta_id != ultima[3] or estado != ultima[4]:
+            return False
+        if not 0 <= ts - ultima[2] < umbral["segundos"]:
+            return False
+        return float(equirectangular(ultima[0], ultima[1], lat, lon)) < umbral["metros"]
+
+    @staticmethod
+    def _mas_reciente(resumen, ultima):
+        return ultima is None or resumen[2] > ultima[2]
+
+    def _leer(self, claves):
+        cache = self._cache()
+        if cache is not None:
+            return cache.get_many(claves)
+        with self._lock:
+            return {c: self._ultimas[c] for c in claves if c in self._ultimas}
+
+    def filtrar(self, posiciones):
+        """
+        Devuelve (aceptadas, descartadas). No modifica las referencias por
+        origen: quien guarda las aceptadas llama a `confirmar` tras el INSERT,
+        así un lote que no llegó a guardarse no deja referencias huérfanas.
+        """
+        posiciones = sorted(posiciones, key=lambda p: p.timestamp)
+        ultimas = self._leer({self._clave(p) for p in posiciones})
+
+        aceptadas, descartadas = [], []
+        for posicion in posiciones:
+            clave = self._clave(posicion)
+            if self._redundante(posicion, ultimas.get(clave)):
+                descartadas.append(posicion)
+                continue
+            aceptadas.append(posicion)
+            resumen = self._resumen(posicion)
+            if self._mas_reciente(resumen, ultimas.get(clave)):
+                # Una posición atrasada se acepta, pero no reemplaza a la última
+                ultimas[clave] = resumen
+
+        with self._lock:
+            for grupo, campo in ((aceptadas, "aceptadas"), (descartadas, "descartadas")):
+                for posicion in grupo:
+                    contador = self._contadores.setdefault(posicion.origen_tipo, {"aceptadas": 0, "descartadas": 0})
+                    contador[campo] += 1
+        return aceptadas, descartadas
+
+    def confirmar(self, posiciones):
+        """Toma las posiciones ya guardadas como referencia de su origen (solo si son más recientes)."""
+        nuevas = {}
+        for posicion in posiciones:
+            clave, resumen = self._clave(posicion), self._resumen(posicion)
+            if self._mas_reciente(resumen, nuevas.get(clave)):
+                nuevas[clave] = resumen
+        if not nuevas:
+            return
+        cache = self._cache()
+        with self._lock:
+            actuales = cache.get_many(nuevas) if cache is not None else self._ultimas
+            nuevas = {c: r for c, r in nuevas.items() if self._mas_reciente(r, actuales.get(c))}
+            if cache is not None:
+                cache.set_many(nuevas, None)
+            else:
+                self._ultimas.update(nuevas)
+
+    def aceptar(self, posicion):
+        aceptadas, _ = self.filtrar([posicion])
+        return bool(aceptadas)
+
+    def contadores(self):
+        with self._lock:
+            return {tipo: dict(valores) for tipo, valores in self._contadores.items()}
+
+    def limpiar(self):
+        with self._lock:
+            self._ultimas.clear()
+            self._contadores.clear()
+
+
+banda_muerta = FiltroBandaMuerta()
@@ -0,0 +1,103 @@
+# gps/binario.py
+
+import struct
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .models import Posicion, TipoOrigen
+
+
+# Formato binario de lotes de posiciones (little-endian):
+#   Cabecera (40 bytes): magic "GPSB", versión u8, tipo de origen u8 (0 usuario,
+#                        1 vehículo), reservado u16, origen_id (16 bytes),
+#                        ruta_id (16 bytes, ceros = sin ruta)
+#   Registro (14 bytes): latitud i32 y longitud i32 en microgrados, timestamp u32
+#                        (epoch UTC), precisión u16 en centímetros (0xFFFF = desconocida)
+MAGIC = b"GPSB"
+VERSION = 1
+CABECERA = struct.Struct("<4sBBH16s16s")
+REGISTRO = struct.Struct("<iiIH")
+PRECISION_DESCONOCIDA = 0xFFFF
+MEDIA_TYPE = "application/vnd.gps.posiciones"
+
+_TIPOS = {0: TipoOrigen.USUARIO, 1: TipoOrigen.VEHICULO}
+_CODIGOS_TIPO = {v: k for k, v in _TIPOS.items()}
+
+
+class LoteBinario:
+    """Lote decodificado; los registros se leen sobre el buffer original (sin copiarlo)."""
+
+    def __init__(self, origen_tipo, origen_id, ruta_id, registros):
+        self.origen_tipo = origen_tipo
+        self.origen_id = origen_id
+        self.ruta_id = ruta_id
+        self.registros = registros
+
+    def __len__(self):
+        return len(self.registros) // REGISTRO.size
+
+    def posiciones(self):
+        """Devuelve (posiciones, errores) con el mismo formato de errores por fila que el JSON."""
+        posiciones, errores = [], []
+        for indice, (lat, lon, epoch, precision) in enumerate(REGISTRO.iter_unpack(self.registros)):
+            if not (-90_000_000 <= lat <= 90_000_000 and -180_000_000 <= lon <= 180_000_000):
+                errores.append({"indice": indice, "errores": {"coordenadas": ["Fuera de rango."]}})
+                continue
+            posiciones.append(Posicion(
+                origen_tipo=self.origen_tipo,
+                origen_id=self.origen_id,
+                ruta_id=self.ruta_id,
+                latitud=Decimal(lat).scaleb(-6),
+                longitud=Decimal(lon).scaleb(-6),
+                precision=None if precision == PRECISION_DESCONOCIDA else Decimal(precision).scaleb(-2),
+                timestamp=datetime.fromtimestamp(epoch, tz=dt_timezone.utc),
+            ))
+        return posiciones, errores
+
+
+def decodificar_lote(datos):
+    vista = memoryview(datos)
+    if len(vista) < CABECERA.size:
+        raise ParseError("Lote binario incompleto: falta la cabecera.")
+    magic, version, tipo, _, origen, ruta = CABECERA.unpack_from(vista)
+    if magic != MAGIC or version != VERSION:
+        raise ParseError("Formato binario no reconocido.")
+    if tipo not in _TIPOS:
+        raise ParseError("Tipo de origen inválido.")
+    registros = vista[CABECERA.size:]
+    if len(registros) % REGISTRO.size:
+        raise ParseError("Lote binario con registros incompletos.")
+    ruta_id = uuid.UUID(bytes=ruta) if any(ruta) else None
+    return LoteBinario(_TIPOS[tipo], uuid.UUID(bytes=origen), ruta_id, registros)
+
+
+def codificar_lote(origen_tipo, origen_id, filas, ruta_id=None):
+    """
+    Codifica un lote para el endpoint binario. `filas` son tuplas
+    (latitud, longitud, timestamp, precision_m) con precision_m opcional (None).
+    """
+    partes = [CABECERA.pack(
+        MAGIC, VERSION, _CODIGOS_TIPO[origen_tipo], 0,
+        uuid.UUID(str(origen_id)).bytes,
+        uuid.UUID(str(ruta_id)).bytes if ruta_id else bytes(16),
+    )]
+    for lat, lon, timestamp, precision in filas:
+        partes.append(REGISTRO.pack(
+            round(float(lat) * 1_000_000),
+            round(float(lon) * 1_000_000),
+            int(timestamp.timestamp()),
+            PRECISION_DESCONOCIDA if precision is None else min(round(float(precision) * 100), 0xFFFE),
+        ))
+    return b"".join(partes)
+
+
+class PosicionesBinariasParser(BaseParser):
+    """Parser DRF para lotes de posiciones en formato binario compacto."""
+    media_type = MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return decodificar_lote(stream.read())
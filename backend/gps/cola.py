@@ -0,0 +1,228 @@
+# gps/cola.py
+
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, F
+from django.utils import timezone
+
+from .ajuste import ajuste_ruta
+from .alertas import coalescedor
+from .eta import motor_eta
+from .filtro import filtro_posiciones
+from .metricas import ContadoresCompartidos
+from .models import Posicion, TareaPosicion, EstadoTarea
+
+logger = logging.getLogger(__name__)
+
+# Modo de ingesta por defecto: True → se responde 202 y se procesa en segundo plano.
+PROCESAMIENTO_ASINCRONO = getattr(settings, "GPS_PROCESAMIENTO_ASINCRONO", False)
+MAX_PENDIENTES = getattr(settings, "GPS_COLA_MAX_PENDIENTES", 10000)
+MAX_INTENTOS = getattr(settings, "GPS_COLA_MAX_INTENTOS", 3)
+TIEMPO_RECLAMO = timedelta(seconds=getattr(settings, "GPS_COLA_TIEMPO_RECLAMO", 300))
+
+_diferido = ContextVar("gps_procesamiento_diferido", default=False)
+
+
+@contextmanager
+def procesamiento_diferido():
+    """Dentro del bloque, las posiciones guardadas no se analizan en línea."""
+    token = _diferido.set(True)
+    try:
+        yield
+    finally:
+        _diferido.reset(token)
+
+
+def esta_diferido():
+    return _diferido.get()
+
+
+def encolar(posiciones):
+    TareaPosicion.objects.bulk_create([TareaPosicion(posicion_id=p.pk) for p in posiciones])
+
+
+# === RECLAMO Y PROCESAMIENTO ===
+def reclamar(cantidad):
+    """
+    Toma hasta `cantidad` tareas pendientes. El UPDATE filtrado por estado y el
+    identificador de reclamo evitan que dos trabajadores procesen la misma tarea
+    (SKIP LOCKED en PostgreSQL; en SQLite la escritura ya es exclusiva).
+    """
+    reclamo = uuid.uuid4()
+    with transaction.atomic():
+        ids = list(
+            TareaPosicion.objects.select_for_update(skip_locked=True)
+            .filter(estado=EstadoTarea.PENDIENTE)
+            .order_by("creada_en")
+            .values_list("id", flat=True)[:cantidad]
+        )
+        if not ids:
+            return []
+        TareaPosicion.objects.filter(id__in=ids, estado=EstadoTarea.PENDIENTE).update(
+            estado=EstadoTarea.PROCESANDO,
+            reclamo=reclamo,
+            tomada_en=timezone.now(),
+            intentos=F("intentos") + 1,
+        )
+    return list(TareaPosicion.objects.filter(reclamo=reclamo, estado=EstadoTarea.PROCESANDO))
+
+
+def procesar(tareas):
+    """
+    Analiza las posiciones de las tareas como un lote. Si el lote falla,
+    se reintenta tarea por tarea para aislar la posición problemática.
+    """
+    from .procesamiento import procesar_posiciones
+
+    if not tareas:
+        return 0
+    posiciones = {
+        p.pk: p for p in Posicion.objects.select_related("ruta").filter(id__in=[t.posicion_id for t in tareas])
+    }
+    try:
+        with transaction.atomic():
+            procesar_posiciones(list(posiciones.values()))
+        _terminar(tareas)
+        return len(tareas)
+    except Exception:
+        logger.exception("Falló el lote de %s tareas GPS; se reintenta tarea por tarea", len(tareas))
+        _olvidar_estado(posiciones.values())
+
+    completadas = 0
+    for tarea in tareas:
+        try:
+            with transaction.atomic():
+                procesar_posiciones([posiciones[tarea.posicion_id]])
+            _terminar([tarea])
+            completadas += 1
+        except Exception as exc:
+            _fallar(tarea, exc)
+    return completadas
+
+
+def _olvidar_estado(posiciones):
+    """
+    El lote revertido pudo dejar avanzado el estado en memoria de sus orígenes
+    (filtro, ajuste, ETA, episodios de alerta): se descarta para que el
+    reintento parta de lo que quedó guardado.
+    """
+    for posicion in posiciones:
+        filtro_posiciones.olvidar(posicion.origen_id)
+        ajuste_ruta.olvidar(posicion.origen_id)
+        if posicion.ruta_id is not None:
+            motor_eta.olvidar(posicion.ruta_id, posicion.origen_id)
+    coalescedor.limpiar()
+
+
+def _terminar(tareas):
+    TareaPosicion.objects.filter(id__in=[t.id for t in tareas]).update(
+        estado=EstadoTarea.COMPLETADA, terminada_en=timezone.now(), error=""
+    )
+    metricas.registrar(len(tareas))
+
+
+def _fallar(tarea, exc):
+    estado = EstadoTarea.ERROR if tarea.intentos >= MAX_INTENTOS else EstadoTarea.PENDIENTE
+    TareaPosicion.objects.filter(id=tarea.id).update(estado=estado, error=f"{type(exc).__name__}: {exc}")
+    metricas.registrar(0, errores=1)
+
+
+def recuperar_vencidas():
+    """Devuelve a la cola las tareas tomadas por trabajadores que no terminaron."""
+    limite = timezone.now() - TIEMPO_RECLAMO
+    return TareaPosicion.objects.filter(estado=EstadoTarea.PROCESANDO, tomada_en__lt=limite).update(
+        estado=EstadoTarea.PENDIENTE, reclamo=None
+    )
+
+
+def purgar_completadas(horas=24):
+    """Elimina las tareas completadas hace más de `horas` horas."""
+    limite = timezone.now() - timedelta(hours=horas)
+    borradas, _ = TareaPosicion.objects.filter(estado=EstadoTarea.COMPLETADA, terminada_en__lt=limite).delete()
+    return borradas
+
+
+# === MÉTRICAS Y CONTRAPRESIÓN ===
+class MetricasCola:
+    """
+    Contadores de los trabajadores. Los del proceso alimentan el resumen del
+    comando; los totales de todos los trabajadores se suman en la caché
+    compartida, que es lo que lee el API desde el proceso web.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.procesadas = 0
+        self.errores = 0
+        self.inicio = time.monotonic()
+        self._compartidos = ContadoresCompartidos("cola", ("procesadas", "errores"))
+
+    def registrar(self, procesadas, errores=0):
+        with self._lock:
+            self.procesadas += procesadas
+            self.errores += errores
+        self._compartidos.sumar(procesadas=procesadas, errores=errores)
+
+    def resumen(self):
+        """Métricas de este proceso."""
+        with self._lock:
+            segundos = max(time.monotonic() - self.inicio, 1e-9)
+            return {
+                "procesadas": self.procesadas,
+                "errores": self.errores,
+                "por_segundo": round(self.procesadas / segundos, 2),
+            }
+
+    def totales(self):
+        """Totales de todos los trabajadores."""
+        return self._compartidos.valores()
+
+    def limpiar(self):
+        self._compartidos.limpiar()
+
+
+metricas = MetricasCola()
+
+_pendientes_cache = {"valor": 0, "leido": 0.0}
+
+
+def pendientes(max_edad=1.0):
+    """Cantidad de tareas pendientes (se cachea `max_edad` segundos por proceso)."""
+    ahora = time.monotonic()
+    if ahora - _pendientes_cache["leido"] > max_edad:
+        _pendientes_cache["valor"] = TareaPosicion.objects.filter(estado=EstadoTarea.PENDIENTE).count()
+        _pendientes_cache["leido"] = ahora
+    return _pendientes_cache["valor"]
+
+
+def cola_saturada():
+    return pendientes() >= MAX_PENDIENTES
+
+
+def estado_cola():
+    """Métricas de la cola persistente para monitoreo y contrapresión."""
+    conteos = dict(TareaPosicion.objects.values_list("estado").annotate(total=Count("id")).order_by())
+    mas_antigua = TareaPosicion.objects.filter(estado=EstadoTarea.PENDIENTE).aggregate(m=Min("creada_en"))["m"]
+    hace_un_minuto = timezone.now() - timedelta(minutes=1)
+    return {
+        "pendientes": conteos.get(EstadoTarea.PENDIENTE, 0),
+        "procesando": conteos.get(EstadoTarea.PROCESANDO, 0),
+        "completadas": conteos.get(EstadoTarea.COMPLETADA, 0),
+        "errores": conteos.get(EstadoTarea.ERROR, 0),
+        "max_pendientes": MAX_PENDIENTES,
+        "saturada": conteos.get(EstadoTarea.PENDIENTE, 0) >= MAX_PENDIENTES,
+        "espera_max_segundos": (
+            round((timezone.now() - mas_antigua).total_seconds(), 1) if mas_antigua else 0
+        ),
+        "completadas_ultimo_minuto": TareaPosicion.objects.filter(
+            estado=EstadoTarea.COMPLETADA, terminada_en__gte=hace_un_minuto
+        ).count(),
+    }
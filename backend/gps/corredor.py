@@ -0,0 +1,152 @@
+# gps/corredor.py
+
+import math
+import numpy as np
+from django.conf import settings
+
+from .distancias import RADIO_TIERRA_M
+
+
+# Tamaño de celda (metros) del índice de segmentos.
+TAMANO_CELDA_M = getattr(settings, "GPS_CORREDOR_CELDA_M", 250)
+
+
+class CorredorRuta:
+    """
+    Polilínea de una ruta proyectada a un plano métrico local (equirectangular
+    centrado en la ruta), con un índice de rejilla que asigna a cada celda los
+    segmentos cuyo rectángulo envolvente la toca.
+    """
+
+    def __init__(self, lats, lons, tamano_celda=TAMANO_CELDA_M):
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        if len(lats) == 1:
+            # Una sola parada: segmento degenerado (distancia al punto)
+            lats, lons = np.repeat(lats, 2), np.repeat(lons, 2)
+
+        self.lat0 = float(lats.mean())
+        self.lon0 = float(lons.mean())
+        self.cos_lat0 = math.cos(math.radians(self.lat0))
+        self.tamano_celda = float(tamano_celda)
+
+        self.x, self.y = self.proyectar(lats, lons)
+        self.x0, self.y0 = self.x[:-1], self.y[:-1]
+        self.dx, self.dy = np.diff(self.x), np.diff(self.y)
+        self.largo2 = self.dx ** 2 + self.dy ** 2
+        self.largos = np.sqrt(self.largo2)
+        # Distancia a lo largo de la ruta al inicio de cada segmento
+        self.acumulados = np.concatenate(([0.0], np.cumsum(self.largos)))
+        self.longitud = float(self.acumulados[-1])
+        self.celdas = self._indexar()
+
+    def __len__(self):
+        return len(self.dx)
+
+    def proyectar(self, lat, lon):
+        """Convierte grados a metros (x, y) en el plano local de la ruta."""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        x = np.radians(lon - self.lon0) * self.cos_lat0 * RADIO_TIERRA_M
+        y = np.radians(lat - self.lat0) * RADIO_TIERRA_M
+        return x, y
+
+    def desproyectar(self, x, y):
+        """Convierte metros del plano local a grados (lat, lon)."""
+        lat = self.lat0 + math.degrees(y / RADIO_TIERRA_M)
+        lon = self.lon0 + math.degrees(x / (RADIO_TIERRA_M * self.cos_lat0))
+        return lat, lon
+
+    def punto(self, segmento, t):
+        """Coordenadas (lat, lon) del punto en la fracción `t` del segmento."""
+        return self.desproyectar(
+            float(self.x0[segmento] + t * self.dx[segmento]),
+            float(self.y0[segmento] + t * self.dy[segmento]),
+        )
+
+    def recorrido(self, segmento, t):
+        """Distancia (m) a lo largo de la ruta hasta el punto (segmento, t)."""
+        return float(self.acumulados[segmento] + t * self.largos[segmento])
+
+    def _celda(self, valor):
+        return int(math.floor(valor / self.tamano_celda))
+
+    def _indexar(self):
+        celdas = {}
+        x1, y1 = self.x0 + self.dx, self.y0 + self.dy
+        for i in range(len(self)):
+            cx_min = self._celda(min(self.x0[i], x1[i]))
+            cx_max = self._celda(max(self.x0[i], x1[i]))
+            cy_min = self._celda(min(self.y0[i], y1[i]))
+            cy_max = self._celda(max(self.y0[i], y1[i]))
+            for cx in range(cx_min, cx_max + 1):
+                for cy in range(cy_min, cy_max + 1):
+                    celdas.setdefault((cx, cy), []).append(i)
+        return {clave: np.asarray(indices, dtype=np.intp) for clave, indices in celdas.items()}
+
+    def candidatos(self, px, py, radio):
+        """Índices de los segmentos que pueden estar a menos de `radio` metros."""
+        encontrados = [
+            self.celdas[(cx, cy)]
+            for cx in range(self._celda(px - radio), self._celda(px + radio) + 1)
+            for cy in range(self._celda(py - radio), self._celda(py + radio) + 1)
+            if (cx, cy) in self.celdas
+        ]
+        if not encontrados:
+            return np.empty(0, dtype=np.intp)
+        return np.unique(np.concatenate(encontrados))
+
+    def _distancias(self, px, py, indices):
+        """Distancia punto-segmento y parámetro t ∈ [0, 1] de la proyección."""
+        x0, y0 = self.x0[indices], self.y0[indices]
+        dx, dy, largo2 = self.dx[indices], self.dy[indices], self.largo2[indices]
+        t = ((px - x0) * dx + (py - y0) * dy) / np.where(largo2 > 0, largo2, 1.0)
+        t = np.clip(t, 0.0, 1.0)
+        return np.hypot(px - (x0 + t * dx), py - (y0 + t * dy)), t
+
+    def distancia(self, lat, lon, radio=None):
+        """
+        Distancia (m) del punto al corredor. Devuelve (distancia, segmento, t).
+        Con `radio`, solo se evalúan los segmentos cercanos; si ninguno queda
+        dentro del radio se evalúan todos para informar la distancia real.
+        """
+        px, py = self.proyectar(lat, lon)
+        px, py = float(px), float(py)
+
+        if radio is not None:
+            indices = self.candidatos(px, py, radio)
+            if len(indices):
+                d, t = self._distancias(px, py, indices)
+                k = int(np.argmin(d))
+                if d[k] <= radio:
+                    return float(d[k]), int(indices[k]), float(t[k])
+
+        indices = np.arange(len(self))
+        d, t = self._distancias(px, py, indices)
+        k = int(np.argmin(d))
+        return float(d[k]), k, float(t[k])
+
+    def ajustar(self, lat, lon, radio, desde=None, hasta=None):
+        """
+        Proyecta el punto sobre el segmento más cercano dentro de `radio`.
+        Si se indica la ventana [desde, hasta] de distancia recorrida, se
+        prefieren los segmentos compatibles con ella (evita saltar a otro
+        tramo cuando la ruta se cruza o vuelve sobre sí misma).
+        Devuelve (distancia, segmento, t, recorrido) o None si no hay segmentos.
+        """
+        px, py = self.proyectar(lat, lon)
+        px, py = float(px), float(py)
+        indices = self.candidatos(px, py, radio)
+        if not len(indices):
+            return None
+        d, t = self._distancias(px, py, indices)
+        recorridos = self.acumulados[indices] + t * self.largos[indices]
+        validos = d <= radio
+        if desde is not None:
+            en_ventana = validos & (recorridos >= desde) & (recorridos <= hasta)
+            if en_ventana.any():
+                validos = en_ventana
+        if not validos.any():
+            return None
+        k = int(np.argmin(np.where(validos, d, np.inf)))
+        return float(d[k]), int(indices[k]), float(t[k]), float(recorridos[k])
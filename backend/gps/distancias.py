@@ -0,0 +1,62 @@
+# gps/distancias.py
+# Distancias vectorizadas (en metros) entre coordenadas en grados decimales.
+# Aceptan escalares o arrays de NumPy y usan broadcasting (uno-a-muchos y
+# muchos-a-muchos sin bucles en Python).
+
+import numpy as np
+from django.conf import settings
+
+
+RADIO_TIERRA_M = 6371000.0
+
+# Si es True, las funciones usan haversine por defecto en lugar de la aproximación.
+DISTANCIA_EXACTA = getattr(settings, "GPS_DISTANCIA_EXACTA", False)
+
+
+def como_array(valores):
+    """Convierte listas, Decimals o escalares a un array float64."""
+    return np.asarray(valores, dtype=np.float64)
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Distancia exacta (haversine) en metros."""
+    lat1, lon1, lat2, lon2 = map(np.radians, map(como_array, (lat1, lon1, lat2, lon2)))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * RADIO_TIERRA_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def equirectangular(lat1, lon1, lat2, lon2):
+    """Aproximación equirectangular en metros (rápida para distancias cortas)."""
+    lat1, lon1, lat2, lon2 = map(np.radians, map(como_array, (lat1, lon1, lat2, lon2)))
+    x = (lon2 - lon1) * np.cos((lat1 + lat2) / 2)
+    y = lat2 - lat1
+    return RADIO_TIERRA_M * np.hypot(x, y)
+
+
+def distancias(lat, lon, lats, lons, exacta=None):
+    """Distancias desde un punto (lat, lon) hasta cada punto de (lats, lons)."""
+    exacta = DISTANCIA_EXACTA if exacta is None else exacta
+    funcion = haversine if exacta else equirectangular
+    return funcion(lat, lon, lats, lons)
+
+
+def matriz_distancias(lats1, lons1, lats2, lons2, exacta=None):
+    """Matriz (n, m) de distancias entre dos conjuntos de puntos."""
+    lats1, lons1 = como_array(lats1)[:, None], como_array(lons1)[:, None]
+    lats2, lons2 = como_array(lats2)[None, :], como_array(lons2)[None, :]
+    return distancias(lats1, lons1, lats2, lons2, exacta=exacta)
+
+
+def distancia_minima(lat, lon, lats, lons, exacta=None):
+    """
+    Devuelve (distancia, índice) del punto más cercano.
+    Si no hay puntos, devuelve (None, None).
+    """
+    if len(lats) == 0:
+        return None, None
+    d = distancias(lat, lon, lats, lons, exacta=exacta)
+    indice = int(np.argmin(d))
+    return float(d[indice]), indice
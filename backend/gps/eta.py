@@ -0,0 +1,170 @@
+# gps/eta.py
+
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+
+# Caché donde se publican las estimaciones (compartida entre workers en producción).
+CACHE_ALIAS = getattr(settings, "GPS_ETA_CACHE", "default")
+CACHE_PREFIJO = "gps:eta"
+# Fuente de tiempos por tramo (parada i → i+1): función (geometria) -> [segundos | None].
+FUENTE_TIEMPOS = getattr(settings, "GPS_ETA_TIEMPOS_TRAMO", "gps.historico.tiempos_historicos")
+VIGENCIA_S = getattr(settings, "GPS_ETA_VIGENCIA_S", 600)
+VELOCIDAD_DEFECTO_MS = getattr(settings, "GPS_ETA_VELOCIDAD_DEFECTO_KMH", 25) / 3.6
+VELOCIDAD_MIN_MS = 1.0
+SUAVIZADO = 0.3     # peso de la velocidad observada más reciente (media exponencial)
+PESO_VIVO = 0.5     # peso de la velocidad actual frente al histórico en el tramo en curso
+TOLERANCIA_M = 20   # una parada a menos de esto detrás del bus aún cuenta como próxima
+
+
+def tiempos_planificados(geometria):
+    """Tiempo por tramo derivado de RutaParada.tiempo_estimado (acumulado desde el inicio)."""
+    t = geometria.tiempos_estimados
+    return [
+        t[i + 1] - t[i] if t[i] is not None and t[i + 1] is not None and t[i + 1] >= t[i] else None
+        for i in range(len(t) - 1)
+    ]
+
+
+class MotorETA:
+    """
+    Estimación de llegada a las paradas restantes de cada vehículo. Se
+    recalcula con cada posición ajustada al trazado (recorrido a lo largo de
+    la ruta) y se guarda ya resuelta en caché: las consultas solo leen.
+    """
+
+    def __init__(self, cache_alias=CACHE_ALIAS):
+        self.cache_alias = cache_alias
+        self._fuente = None
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def tiempos_tramo(self, geometria):
+        if self._fuente is None:
+            self._fuente = import_string(FUENTE_TIEMPOS)
+        return self._fuente(geometria)
+
+    @staticmethod
+    def _clave(ruta_id, origen_id=None):
+        if origen_id is None:
+            return f"{CACHE_PREFIJO}:{ruta_id}:vehiculos"
+        return f"{CACHE_PREFIJO}:{ruta_id}:{origen_id}"
+
+    def actualizar(self, geometria, origen_id, observaciones):
+        """
+        Incorpora las observaciones (recorrido_m, timestamp) de un vehículo,
+        en orden, y recalcula la llegada a sus paradas restantes.
+        """
+        clave = self._clave(geometria.ruta_id, origen_id)
+        estado = self.cache.get(clave)
+        recorrido = velocidad = epoch = None
+        if estado is not None:
+            recorrido, velocidad, epoch = estado["recorrido"], estado["velocidad"], estado["timestamp"]
+
+        for nuevo_recorrido, timestamp in observaciones:
+            nuevo_epoch = timestamp.timestamp()
+            if epoch is not None:
+                segundos = nuevo_epoch - epoch
+                if segundos <= 0:
+                    continue
+                avance = max(nuevo_recorrido - recorrido, 0.0)
+                observada = avance / segundos
+                velocidad = observada if velocidad is None else SUAVIZADO * observada + (1 - SUAVIZADO) * velocidad
+            recorrido, epoch = nuevo_recorrido, nuevo_epoch
+
+        if epoch is None:
+            return None
+        estado = {
+            "vehiculo_id": str(origen_id),
+            "recorrido": recorrido,
+            "velocidad": velocidad,
+            "timestamp": epoch,
+            "paradas": self._predecir(geometria, recorrido, velocidad, epoch),
+        }
+        self.cache.set(clave, estado, VIGENCIA_S)
+
+        indice = self._clave(geometria.ruta_id)
+        vehiculos = self.cache.get(indice) or []
+        if str(origen_id) not in vehiculos:
+            self.cache.set(indice, vehiculos + [str(origen_id)], None)
+        return estado
+
+    def _predecir(self, geometria, recorrido, velocidad, epoch):
+        recorridos = geometria.recorridos_paradas
+        tiempos = self.tiempos_tramo(geometria)
+        velocidad_viva = velocidad if velocidad and velocidad >= VELOCIDAD_MIN_MS else None
+
+        def tiempo_tramo(i, desde, hasta):
+            """Segundos para ir de `desde` a `hasta` dentro del tramo i (parada i → i+1)."""
+            distancia = max(hasta - desde, 0.0)
+            if 0 <= i < len(tiempos) and tiempos[i] is not None:
+                largo = recorridos[i + 1] - recorridos[i]
+                if largo > 0:
+                    return tiempos[i] * distancia / largo
+            return distancia / VELOCIDAD_DEFECTO_MS
+
+        paradas, segundos, posicion = [], 0.0, recorrido
+        for j, recorrido_parada in enumerate(recorridos):
+            if recorrido_parada < recorrido - TOLERANCIA_M:
+                continue
+            if recorrido_parada > posicion:
+                base = tiempo_tramo(j - 1, posicion, recorrido_parada)
+                if posicion == recorrido and velocidad_viva:
+                    # En el tramo en curso se mezcla la velocidad observada
+                    base = PESO_VIVO * (recorrido_parada - posicion) / velocidad_viva + (1 - PESO_VIVO) * base
+                segundos += base
+                posicion = recorrido_parada
+            paradas.append((str(geometria.parada_ids[j]), j + 1, round(epoch + segundos, 1)))
+        return paradas
+
+    def estimaciones(self, ruta_id):
+        """Estimaciones vigentes de los vehículos de la ruta (solo lectura de caché)."""
+        vehiculos = self.cache.get(self._clave(ruta_id)) or []
+        if not vehiculos:
+            return []
+        estados = self.cache.get_many([self._clave(ruta_id, v) for v in vehiculos])
+        limite = time.time() - VIGENCIA_S
+        return sorted(
+            (e for e in estados.values() if e["timestamp"] >= limite),
+            key=lambda e: e["recorrido"],
+            reverse=True,
+        )
+
+    def olvidar(self, ruta_id, origen_id):
+        """Descarta el estado de un vehículo; la próxima posición lo reinicia."""
+        self.cache.delete(self._clave(ruta_id, origen_id))
+
+    def limpiar(self, ruta_id):
+        vehiculos = self.cache.get(self._clave(ruta_id)) or []
+        self.cache.delete_many([self._clave(ruta_id)] + [self._clave(ruta_id, v) for v in vehiculos])
+
+
+def formato_estimacion(estado, parada_id=None):
+    """Convierte una estimación en caché a la respuesta del API."""
+    ahora = time.time()
+    paradas = [
+        {
+            "parada_id": pid,
+            "orden": orden,
+            "llegada_estimada": datetime.fromtimestamp(llegada, tz=dt_timezone.utc),
+            "segundos_restantes": max(int(llegada - ahora), 0),
+        }
+        for pid, orden, llegada in estado["paradas"]
+        if parada_id is None or pid == str(parada_id)
+    ]
+    return {
+        "vehiculo_id": estado["vehiculo_id"],
+        "actualizada_en": datetime.fromtimestamp(estado["timestamp"], tz=dt_timezone.utc),
+        "recorrido_m": round(estado["recorrido"], 1),
+        "velocidad_kmh": round(estado["velocidad"] * 3.6, 1) if estado["velocidad"] is not None else None,
+        "paradas": paradas,
+    }
+
+
+motor_eta = MotorETA()
@@ -0,0 +1,145 @@
+# gps/filtro.py
+
+import math
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+# Velocidad máxima creíble (m/s): la única compuerta de descarte. Un salto más
+# rápido desde la última estimación (descontando los errores) se descarta.
+VELOCIDAD_MAX_MS = getattr(settings, "GPS_FILTRO_VELOCIDAD_MAX_MS", 40)
+# Ruido de aceleración del modelo de velocidad constante (m²/s³), a nivel de bus urbano.
+RUIDO_ACELERACION = getattr(settings, "GPS_FILTRO_RUIDO_ACELERACION", 4.0)
+# Error mínimo supuesto por lectura cuando la precisión reportada es menor o falta.
+PRECISION_MIN_M = getattr(settings, "GPS_FILTRO_PRECISION_MIN_M", 5)
+# Innovación (Mahalanobis al cuadrado, χ² con 2 g.l. ≈ 99,9 %) por encima de la cual se
+# asume una maniobra (curva, arranque, frenada): la covarianza se amplía, no se descarta.
+COMPUERTA_MANIOBRA = getattr(settings, "GPS_FILTRO_COMPUERTA_MANIOBRA", 13.8)
+# Tras tantos descartes seguidos, o tanto tiempo sin lecturas, el filtro se reinicia.
+MAX_DESCARTES = getattr(settings, "GPS_FILTRO_MAX_DESCARTES", 3)
+REINICIO_S = getattr(settings, "GPS_FILTRO_REINICIO_S", 120)
+# Lecturas más próximas que la resolución del receptor (repetidas, o con sellos
+# del servidor al recibir) no informan velocidad: no tocan el estado y solo pasan
+# si caen a lo que se recorre en este intervalo desde la estimación.
+INTERVALO_MIN_S = getattr(settings, "GPS_FILTRO_INTERVALO_MIN_S", 1.0)
+# Corrección mínima (m) para marcar una lectura como suavizada.
+SUAVIZADO_MIN_M = getattr(settings, "GPS_FILTRO_SUAVIZADO_MIN_M", 5)
+MAX_ORIGENES = getattr(settings, "GPS_FILTRO_MAX_ORIGENES", 10000)
+
+METROS_POR_GRADO = 111320.0
+VARIANZA_VELOCIDAD_INICIAL = 100.0  # (10 m/s)²
+
+ACEPTADA, SUAVIZADA, DESCARTADA = "ACEPTADA", "SUAVIZADA", "DESCARTADA"
+
+
+class _Estado:
+    """Kalman de velocidad constante en metros locales, con la misma covarianza para ambos ejes."""
+    __slots__ = ("lat0", "lon0", "escala", "x", "y", "vx", "vy", "p00", "p01", "p11", "timestamp", "descartes")
+
+    def __init__(self, lat, lon, timestamp, varianza):
+        self.lat0, self.lon0 = lat, lon
+        self.escala = math.cos(math.radians(lat)) * METROS_POR_GRADO
+        self.x = self.y = self.vx = self.vy = 0.0
+        self.p00, self.p01, self.p11 = varianza, 0.0, VARIANZA_VELOCIDAD_INICIAL
+        self.timestamp = timestamp
+        self.descartes = 0
+
+    def a_metros(self, lat, lon):
+        return (lon - self.lon0) * self.escala, (lat - self.lat0) * METROS_POR_GRADO
+
+    def a_grados(self, x, y):
+        return self.lat0 + y / METROS_POR_GRADO, self.lon0 + x / self.escala
+
+
+class FiltroPosiciones:
+    """
+    Filtro en línea del ruido GPS por origen, con un Kalman de velocidad
+    constante. Solo se descartan las lecturas que implican una velocidad
+    imposible desde la última estimación; una innovación grande pero creíble
+    (curva, arranque) se toma como maniobra y amplía la covarianza para que
+    el filtro siga a la lectura. Las demás se corrigen hacia la estimación,
+    ponderadas por la precisión reportada.
+    Por origen se guarda un estado de tamaño fijo, con un límite LRU; todo el
+    ciclo predicción/corrección se hace bajo el candado.
+    """
+
+    def __init__(self, max_origenes=MAX_ORIGENES):
+        self.max_origenes = max_origenes
+        self._estados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def filtrar(self, origen_id, lat, lon, timestamp, precision=None):
+        """Devuelve (resultado, lat, lon): ACEPTADA, SUAVIZADA (coordenadas corregidas) o DESCARTADA."""
+        sigma = max(float(precision or 0), PRECISION_MIN_M)
+        with self._lock:
+            estado = self._estados.get(origen_id)
+            if estado is None:
+                return self._reiniciar(origen_id, lat, lon, timestamp, sigma)
+            self._estados.move_to_end(origen_id)
+
+            dt = (timestamp - estado.timestamp).total_seconds()
+            if dt <= 0:
+                # Fuera de orden o repetida: pasa sin tocar el estado
+                return ACEPTADA, lat, lon
+            if dt > REINICIO_S:
+                return self._reiniciar(origen_id, lat, lon, timestamp, sigma)
+
+            mx, my = estado.a_metros(lat, lon)
+            salto = math.hypot(mx - estado.x, my - estado.y) - sigma - math.sqrt(estado.p00)
+            if salto > VELOCIDAD_MAX_MS * max(dt, INTERVALO_MIN_S):
+                estado.descartes += 1
+                if estado.descartes >= MAX_DESCARTES:
+                    # Varias lecturas coinciden lejos de la estimación: el origen está ahí
+                    return self._reiniciar(origen_id, lat, lon, timestamp, sigma)
+                return DESCARTADA, lat, lon
+            if dt < INTERVALO_MIN_S:
+                # Repetida o sin resolución: pasa sin reanclar ni corregir el estado
+                return ACEPTADA, lat, lon
+
+            # Predicción
+            px, py = estado.x + estado.vx * dt, estado.y + estado.vy * dt
+            q = RUIDO_ACELERACION
+            p00 = estado.p00 + 2 * dt * estado.p01 + dt * dt * estado.p11 + q * dt ** 3 / 3
+            p01 = estado.p01 + dt * estado.p11 + q * dt * dt / 2
+            p11 = estado.p11 + q * dt
+
+            innovacion = (mx - px) ** 2 + (my - py) ** 2
+            varianza = p00 + sigma * sigma
+            if innovacion > COMPUERTA_MANIOBRA * varianza:
+                # Maniobra: se amplía la covarianza hasta que la innovación sea la esperada
+                escala = innovacion / (2 * varianza)
+                p00, p01, p11 = p00 * escala, p01 * escala, p11 * escala
+                varianza = p00 + sigma * sigma
+
+            # Corrección
+            k0, k1 = p00 / varianza, p01 / varianza
+            estado.x, estado.y = px + k0 * (mx - px), py + k0 * (my - py)
+            estado.vx, estado.vy = estado.vx + k1 * (mx - px), estado.vy + k1 * (my - py)
+            estado.p00, estado.p01, estado.p11 = (1 - k0) * p00, (1 - k0) * p01, p11 - k1 * p01
+            estado.timestamp = timestamp
+            estado.descartes = 0
+
+            if math.hypot(mx - estado.x, my - estado.y) < SUAVIZADO_MIN_M:
+                return ACEPTADA, lat, lon
+            return (SUAVIZADA, *estado.a_grados(estado.x, estado.y))
+
+    def _reiniciar(self, origen_id, lat, lon, timestamp, sigma):
+        """Reancla el estado del origen en la lectura. Se llama con el candado tomado."""
+        self._estados[origen_id] = _Estado(lat, lon, timestamp, sigma * sigma)
+        self._estados.move_to_end(origen_id)
+        while len(self._estados) > self.max_origenes:
+            self._estados.popitem(last=False)
+        return ACEPTADA, lat, lon
+
+    def olvidar(self, origen_id):
+        with self._lock:
+            self._estados.pop(origen_id, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._estados.clear()
+
+
+filtro_posiciones = FiltroPosiciones()
@@ -0,0 +1,166 @@
+# gps/geocercas.py
+
+import math
+import threading
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Exists, OuterRef
+from django.utils import timezone
+
+from .versiones import VersionCompartida
+
+
+# Tamaño de celda (metros) de la rejilla que indexa las cajas de las zonas.
+TAMANO_CELDA_M = getattr(settings, "GPS_GEOCERCAS_CELDA_M", 500)
+# Presencias cuyo origen no reporta hace más de esto no cuentan en la ocupación.
+VIGENCIA_OCUPACION_S = getattr(settings, "GPS_GEOCERCAS_VIGENCIA_S", 600)
+TIPO_ALERTA = "FUERA_DE_ZONA"
+METROS_POR_GRADO = 111320.0
+
+
+def puntos_en_poligono(lats, lons, poligono):
+    """
+    Ray casting vectorizado: todos los puntos contra todas las aristas del
+    polígono en una sola operación de NumPy. `poligono` es (n, 2) [lat, lon].
+    """
+    lats = np.asarray(lats, dtype=float)[:, None]
+    lons = np.asarray(lons, dtype=float)[:, None]
+    y0, x0 = poligono[:, 0], poligono[:, 1]
+    y1, x1 = np.roll(y0, -1), np.roll(x0, -1)
+    cruza = (y0 > lats) != (y1 > lats)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corte = x0 + (lats - y0) * (x1 - x0) / (y1 - y0)
+    return np.count_nonzero(cruza & (lons < corte), axis=1) % 2 == 1
+
+
+class IndiceZonas:
+    """
+    Índice en memoria de las zonas con polígono: una rejilla lat/lon donde
+    cada celda lista las zonas cuya caja la toca. Clasificar un lote solo
+    prueba cada punto contra las zonas de su celda, no contra todas.
+    Se carga perezosamente y se invalida con las señales de zonas y paradas,
+    que suben su versión compartida para que los demás procesos también recarguen.
+    """
+
+    def __init__(self, tamano_celda=TAMANO_CELDA_M):
+        self.grados_celda = tamano_celda / METROS_POR_GRADO
+        self._zonas = []
+        self._celdas = {}
+        self._zonas_ruta = {}
+        self._cargado = False
+        self._version = None
+        self._compartida = VersionCompartida("zonas")
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        self._asegurar_cargado()
+        return len(self._zonas)
+
+    def _celda(self, lat, lon):
+        return (int(math.floor(lat / self.grados_celda)), int(math.floor(lon / self.grados_celda)))
+
+    def cargar(self):
+        from paradas.models import ZonaParada
+        from rutas.models import RutaParada
+
+        # Versión leída antes de las consultas: un cambio concurrente fuerza otra recarga
+        version = self._compartida.actual()
+        zonas, celdas = [], {}
+        for zona_id, poligono in ZonaParada.objects.values_list("id", "poligono"):
+            if not poligono or len(poligono) < 3:
+                continue
+            vertices = np.asarray(poligono, dtype=float)
+            lat_min, lon_min = vertices.min(axis=0)
+            lat_max, lon_max = vertices.max(axis=0)
+            indice = len(zonas)
+            zonas.append((zona_id, vertices, (lat_min, lat_max, lon_min, lon_max)))
+            f0, c0 = self._celda(lat_min, lon_min)
+            f1, c1 = self._celda(lat_max, lon_max)
+            for fila in range(f0, f1 + 1):
+                for columna in range(c0, c1 + 1):
+                    celdas.setdefault((fila, columna), []).append(indice)
+
+        zonas_ruta = {}
+        geocercas = [zona[0] for zona in zonas]
+        if geocercas:
+            for ruta_id, zona_id in RutaParada.objects.filter(parada__zona_id__in=geocercas).values_list(
+                "ruta_id", "parada__zona_id"
+            ):
+                zonas_ruta.setdefault(str(ruta_id), set()).add(zona_id)
+
+        with self._lock:
+            self._zonas, self._celdas, self._zonas_ruta = zonas, celdas, zonas_ruta
+            self._cargado = True
+            self._version = version
+
+    def _asegurar_cargado(self):
+        if not self._cargado or self._compartida.actual() != self._version:
+            self.cargar()
+
+    def invalidar(self):
+        with self._lock:
+            self._cargado = False
+        self._compartida.incrementar()
+
+    def zonas_ruta(self, ruta_id):
+        """Zonas con geocerca de las paradas de la ruta."""
+        self._asegurar_cargado()
+        return self._zonas_ruta.get(str(ruta_id), set())
+
+    def clasificar(self, lats, lons):
+        """Para cada punto, el conjunto de ids de las zonas que lo contienen."""
+        self._asegurar_cargado()
+        with self._lock:
+            zonas, celdas = self._zonas, self._celdas
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        resultado = [set() for _ in range(len(lats))]
+        if not zonas:
+            return resultado
+
+        candidatos = {}
+        filas = np.floor(lats / self.grados_celda).astype(int).tolist()
+        columnas = np.floor(lons / self.grados_celda).astype(int).tolist()
+        for i, celda in enumerate(zip(filas, columnas)):
+            for indice in celdas.get(celda, ()):
+                candidatos.setdefault(indice, []).append(i)
+
+        for indice, puntos in candidatos.items():
+            zona_id, vertices, (lat_min, lat_max, lon_min, lon_max) = zonas[indice]
+            puntos = np.asarray(puntos)
+            sub_lats, sub_lons = lats[puntos], lons[puntos]
+            en_caja = (sub_lats >= lat_min) & (sub_lats <= lat_max) & (sub_lons >= lon_min) & (sub_lons <= lon_max)
+            if not en_caja.any():
+                continue
+            puntos, sub_lats, sub_lons = puntos[en_caja], sub_lats[en_caja], sub_lons[en_caja]
+            for i in puntos[puntos_en_poligono(sub_lats, sub_lons, vertices)]:
+                resultado[i].add(zona_id)
+        return resultado
+
+
+indice_zonas = IndiceZonas()
+
+
+def ocupacion(vigencia_s=VIGENCIA_OCUPACION_S):
+    """
+    Ocupación actual por zona: {zona_id: {"VEHICULO": n, "USUARIO": m}},
+    contando solo orígenes que reportaron dentro de la vigencia. Una consulta.
+    """
+    from .models import PresenciaZona, UltimaPosicion
+
+    recientes = UltimaPosicion.objects.filter(
+        origen_tipo=OuterRef("origen_tipo"),
+        origen_id=OuterRef("origen_id"),
+        timestamp__gte=timezone.now() - timedelta(seconds=vigencia_s),
+    )
+    filas = (
+        PresenciaZona.objects.filter(Exists(recientes))
+        .values("zona_id", "origen_tipo")
+        .annotate(cantidad=Count("id"))
+    )
+    resultado = {}
+    for fila in filas:
+        resultado.setdefault(fila["zona_id"], {})[fila["origen_tipo"]] = fila["cantidad"]
+    return resultado
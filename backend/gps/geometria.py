@@ -0,0 +1,202 @@
+# gps/geometria.py
+
+import threading
+from array import array
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+
+from .corredor import CorredorRuta
+
+
+# Alias de caché compartida (p. ej. Redis/Memcached) para varios workers.
+# Si es None, la geometría solo se mantiene en memoria del proceso.
+CACHE_ALIAS = getattr(settings, "GPS_GEOMETRIA_CACHE", None)
+CACHE_PREFIJO = "gps:geometria"
+# Distancia máxima (m) entre una parada y el trazado para ubicarla sobre él.
+RADIO_PARADA_M = getattr(settings, "GPS_RADIO_PARADA_TRAZADO_M", 500)
+
+
+class GeometriaRuta:
+    """
+    Coordenadas ordenadas (por RutaParada.orden) de las paradas de una ruta y
+    vértices de su trazado. Se guardan en arrays de floats intercalados:
+    [lat0, lon0, lat1, lon1, ...]. Sin trazado cargado, el corredor se
+    deriva de las paradas. Incluye los umbrales de desvío propios de la ruta
+    (None si usa los globales) y el tiempo estimado desde el inicio hasta
+    cada parada (segundos, RutaParada.tiempo_estimado).
+    """
+    __slots__ = (
+        "ruta_id", "parada_ids", "coordenadas", "trazado", "version",
+        "umbral_desvio", "umbral_alerta", "tiempos_estimados", "_corredor", "_recorridos_paradas",
+    )
+
+    def __init__(
+        self, ruta_id, parada_ids, coordenadas, version=0, trazado=(), umbrales=(None, None), tiempos=None
+    ):
+        self.ruta_id = ruta_id
+        self.parada_ids = tuple(parada_ids)
+        self.coordenadas = coordenadas if isinstance(coordenadas, array) else array("d", coordenadas)
+        self.trazado = trazado if isinstance(trazado, array) else array("d", trazado)
+        self.version = version
+        self.umbral_desvio, self.umbral_alerta = umbrales
+        self.tiempos_estimados = tuple(tiempos) if tiempos is not None else (None,) * len(self.parada_ids)
+        self._corredor = None
+        self._recorridos_paradas = None
+
+    def __len__(self):
+        return len(self.parada_ids)
+
+    def __bool__(self):
+        return bool(self.parada_ids) or bool(self.trazado)
+
+    def puntos(self):
+        """Itera las coordenadas como tuplas (lat, lon)."""
+        c = self.coordenadas
+        for i in range(0, len(c), 2):
+            yield c[i], c[i + 1]
+
+    def matriz(self):
+        """Vista NumPy (n, 2) sobre las coordenadas, sin copiarlas."""
+        return np.frombuffer(self.coordenadas, dtype=np.float64).reshape(-1, 2)
+
+    @property
+    def latitudes(self):
+        return self.matriz()[:, 0]
+
+    @property
+    def longitudes(self):
+        return self.matriz()[:, 1]
+
+    @property
+    def corredor(self):
+        """Corredor (polilínea indexada) de la ruta; se construye una sola vez."""
+        if self._corredor is None:
+            fuente = self.trazado if len(self.trazado) >= 4 else self.coordenadas
+            vertices = np.frombuffer(fuente, dtype=np.float64).reshape(-1, 2)
+            self._corredor = CorredorRuta(vertices[:, 0], vertices[:, 1])
+        return self._corredor
+
+    @property
+    def recorridos_paradas(self):
+        """
+        Distancia a lo largo del corredor (m) de cada parada, en orden. Se
+        busca cada parada después de la anterior para respetar el sentido.
+        """
+        if self._recorridos_paradas is None:
+            corredor = self.corredor
+            recorridos, anterior = [], 0.0
+            for lat, lon in self.puntos():
+                ajuste = corredor.ajustar(lat, lon, RADIO_PARADA_M, desde=anterior, hasta=corredor.longitud)
+                if ajuste is not None and ajuste[3] >= anterior:
+                    anterior = ajuste[3]
+                recorridos.append(anterior)
+            self._recorridos_paradas = tuple(recorridos)
+        return self._recorridos_paradas
+
+
+_geometrias = {}
+_lock = threading.Lock()
+
+
+def _cache_compartida():
+    return caches[CACHE_ALIAS] if CACHE_ALIAS else None
+
+
+def _clave_version(ruta_id):
+    return f"{CACHE_PREFIJO}:v:{ruta_id}"
+
+
+def _clave_datos(ruta_id, version):
+    return f"{CACHE_PREFIJO}:{ruta_id}:{version}"
+
+
+def _construir(ruta_id, version=0):
+    """Carga las paradas, el trazado y los umbrales de la ruta y arma la geometría."""
+    from rutas.models import Ruta, RutaParada, TrazadoRuta
+
+    filas = (
+        RutaParada.objects.filter(ruta_id=ruta_id)
+        .exclude(parada__latitud__isnull=True)
+        .exclude(parada__longitud__isnull=True)
+        .order_by("orden")
+        .values_list("parada_id", "parada__latitud", "parada__longitud", "tiempo_estimado")
+    )
+    parada_ids, coordenadas, tiempos = [], array("d"), []
+    for parada_id, lat, lon, tiempo in filas:
+        parada_ids.append(parada_id)
+        tiempos.append(tiempo.total_seconds() if tiempo is not None else None)
+        coordenadas.append(float(lat))
+        coordenadas.append(float(lon))
+
+    trazado = array("d")
+    puntos = TrazadoRuta.objects.filter(ruta_id=ruta_id).values_list("puntos", flat=True).first()
+    for lat, lon in puntos or ():
+        trazado.append(float(lat))
+        trazado.append(float(lon))
+
+    umbrales = (
+        Ruta.objects.filter(id=ruta_id).values_list("umbral_desvio_m", "umbral_alerta_m").first()
+        or (None, None)
+    )
+    return GeometriaRuta(ruta_id, parada_ids, coordenadas, version, trazado, umbrales, tiempos)
+
+
+def obtener_geometria(ruta_id):
+    """
+    Devuelve la geometría de la ruta desde la caché del proceso.
+    Con caché compartida solo se consulta la versión vigente (sin ir a la BD).
+    """
+    compartida = _cache_compartida()
+    version = 0
+    if compartida is not None:
+        version = compartida.get(_clave_version(ruta_id)) or 0
+
+    geometria = _geometrias.get(ruta_id)
+    if geometria is not None and geometria.version == version:
+        return geometria
+
+    if compartida is not None:
+        datos = compartida.get(_clave_datos(ruta_id, version))
+        if datos is not None:
+            geometria = GeometriaRuta(ruta_id, datos[0], datos[1], version, *datos[2:])
+
+    if geometria is None or geometria.version != version:
+        geometria = _construir(ruta_id, version)
+        if compartida is not None:
+            compartida.set(
+                _clave_datos(ruta_id, version),
+                (
+                    geometria.parada_ids,
+                    geometria.coordenadas.tolist(),
+                    geometria.trazado.tolist(),
+                    (geometria.umbral_desvio, geometria.umbral_alerta),
+                    geometria.tiempos_estimados,
+                ),
+                None,
+            )
+
+    with _lock:
+        _geometrias[ruta_id] = geometria
+    return geometria
+
+
+def invalidar_geometria(*ruta_ids):
+    """Descarta la geometría de las rutas indicadas."""
+    with _lock:
+        for ruta_id in ruta_ids:
+            _geometrias.pop(ruta_id, None)
+
+    compartida = _cache_compartida()
+    if compartida is None:
+        return
+    for ruta_id in ruta_ids:
+        clave = _clave_version(ruta_id)
+        compartida.add(clave, 0, None)
+        compartida.incr(clave)
+
+
+def limpiar_geometrias():
+    """Vacía la caché local del proceso (la compartida se invalida por versión)."""
+    with _lock:
+        _geometrias.clear()
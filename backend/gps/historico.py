@@ -0,0 +1,170 @@
+# gps/historico.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from .ajuste import AjusteRuta
+from .eta import tiempos_planificados
+from .geometria import obtener_geometria
+from .models import TiempoTramoHistorico, Trayecto
+from .percentiles import P2Cuantil
+
+
+# Tiempos de tramo fuera de este rango se consideran ruido (bus detenido, datos perdidos).
+TRAMO_MIN_S = getattr(settings, "GPS_HISTORICO_TRAMO_MIN_S", 5)
+TRAMO_MAX_S = getattr(settings, "GPS_HISTORICO_TRAMO_MAX_S", 2 * 3600)
+# Muestras mínimas de una franja para preferirla sobre el tiempo planificado.
+MUESTRAS_MIN = getattr(settings, "GPS_HISTORICO_MUESTRAS_MIN", 3)
+CACHE_ALIAS = getattr(settings, "GPS_ETA_CACHE", "default")
+CACHE_VIGENCIA_S = 600
+CUANTILES = {"p50": 0.5, "p90": 0.9}
+
+
+def observaciones_trayecto(trayecto, geometria):
+    """
+    (recorrido_m, timestamp) de las posiciones del trayecto, en orden. Usa el
+    ajuste guardado y, si falta (datos anteriores al ajuste), lo recalcula.
+    """
+    posiciones = trayecto.posiciones_del_recorrido()
+    ajuste = AjusteRuta(max_vehiculos=1)
+    observaciones = []
+    for posicion in posiciones.order_by("timestamp").iterator(chunk_size=2000):
+        recorrido = posicion.distancia_ruta_m
+        if recorrido is None:
+            resultado = ajuste.ajustar(posicion, geometria.corredor)
+            recorrido = resultado[2] if resultado else None
+        if recorrido is not None:
+            observaciones.append((recorrido, posicion.timestamp))
+    return observaciones
+
+
+def pasos_por_paradas(observaciones, recorridos_paradas):
+    """
+    Instante en que el vehículo dejó atrás cada parada, interpolado entre
+    las dos posiciones que la rodean. Solo se informan paradas con una
+    posición en o antes de la parada y otra después: {indice_parada: datetime}.
+    """
+    pasos = {}
+    anterior = None
+    for recorrido, timestamp in observaciones:
+        if anterior is not None and recorrido > anterior[0]:
+            r0, t0 = anterior
+            for j, recorrido_parada in enumerate(recorridos_paradas):
+                if j not in pasos and r0 <= recorrido_parada < recorrido:
+                    fraccion = (recorrido_parada - r0) / (recorrido - r0)
+                    pasos[j] = t0 + timedelta(seconds=fraccion * (timestamp - t0).total_seconds())
+        if anterior is None or recorrido >= anterior[0]:
+            anterior = (recorrido, timestamp)
+    return pasos
+
+
+def muestras_trayecto(trayecto):
+    """{(origen, destino, dia, hora): [segundos, ...]} de los tramos recorridos."""
+    geometria = obtener_geometria(trayecto.ruta_id)
+    if len(geometria) < 2:
+        return {}
+    pasos = pasos_por_paradas(observaciones_trayecto(trayecto, geometria), geometria.recorridos_paradas)
+
+    muestras = {}
+    for j in range(len(geometria) - 1):
+        if j not in pasos or j + 1 not in pasos:
+            continue
+        segundos = (pasos[j + 1] - pasos[j]).total_seconds()
+        if not TRAMO_MIN_S <= segundos <= TRAMO_MAX_S:
+            continue
+        local = timezone.localtime(pasos[j])
+        clave = (geometria.parada_ids[j], geometria.parada_ids[j + 1], local.weekday(), local.hour)
+        muestras.setdefault(clave, []).append(segundos)
+    return muestras
+
+
+@transaction.atomic
+def agregar_trayectos(trayectos):
+    """
+    Suma los tiempos de tramo de los trayectos al histórico y los marca como
+    agregados. Devuelve la cantidad de tramos incorporados.
+    """
+    por_ruta = {}
+    for trayecto in trayectos:
+        for clave, segundos in muestras_trayecto(trayecto).items():
+            por_ruta.setdefault(trayecto.ruta_id, {}).setdefault(clave, []).extend(segundos)
+
+    total = 0
+    for ruta_id, muestras in por_ruta.items():
+        existentes = {
+            (t.parada_origen_id, t.parada_destino_id, t.dia_semana, t.hora): t
+            for t in TiempoTramoHistorico.objects.select_for_update().filter(
+                ruta_id=ruta_id,
+                parada_origen_id__in={clave[0] for clave in muestras},
+            )
+        }
+        nuevos, modificados = [], []
+        for clave, segundos in muestras.items():
+            fila = existentes.get(clave)
+            if fila is None:
+                origen, destino, dia, hora = clave
+                fila = TiempoTramoHistorico(
+                    ruta_id=ruta_id, parada_origen_id=origen, parada_destino_id=destino, dia_semana=dia, hora=hora
+                )
+                nuevos.append(fila)
+            else:
+                modificados.append(fila)
+            _acumular(fila, segundos)
+            total += len(segundos)
+
+        TiempoTramoHistorico.objects.bulk_create(nuevos)
+        TiempoTramoHistorico.objects.bulk_update(
+            modificados,
+            ["muestras", "media_segundos", "p50_segundos", "p90_segundos", "estado_percentiles", "actualizado_en"],
+        )
+
+    Trayecto.objects.filter(pk__in=[t.pk for t in trayectos]).update(tiempos_agregados=True)
+    return total
+
+
+def _acumular(fila, segundos):
+    estimadores = {
+        nombre: P2Cuantil(p, fila.estado_percentiles.get(nombre)) for nombre, p in CUANTILES.items()
+    }
+    for valor in segundos:
+        fila.media_segundos += (valor - fila.media_segundos) / (fila.muestras + 1)
+        fila.muestras += 1
+        for estimador in estimadores.values():
+            estimador.agregar(valor)
+    fila.p50_segundos = estimadores["p50"].valor()
+    fila.p90_segundos = estimadores["p90"].valor()
+    fila.estado_percentiles = {nombre: e.estado() for nombre, e in estimadores.items()}
+    fila.actualizado_en = timezone.now()
+
+
+def tiempos_historicos(geometria):
+    """
+    Fuente de tiempos por tramo para el ETA: mediana histórica de la franja
+    (día y hora actuales) y, sin suficientes muestras, el tiempo planificado.
+    """
+    local = timezone.localtime()
+    cache = caches[CACHE_ALIAS]
+    clave = f"gps:tramos:{geometria.ruta_id}:{local.weekday()}:{local.hour}"
+    medianas = cache.get(clave)
+    if medianas is None:
+        medianas = {
+            (str(origen), str(destino)): p50
+            for origen, destino, p50 in TiempoTramoHistorico.objects.filter(
+                ruta_id=geometria.ruta_id,
+                dia_semana=local.weekday(),
+                hora=local.hour,
+                muestras__gte=MUESTRAS_MIN,
+            ).values_list("parada_origen_id", "parada_destino_id", "p50_segundos")
+        }
+        cache.set(clave, medianas, CACHE_VIGENCIA_S)
+
+    planificados = tiempos_planificados(geometria)
+    ids = geometria.parada_ids
+    return [
+        medianas.get((str(ids[i]), str(ids[i + 1]))) or planificados[i]
+        for i in range(len(ids) - 1)
+    ]
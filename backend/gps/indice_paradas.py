@@ -0,0 +1,129 @@
+# gps/indice_paradas.py
+
+import math
+import threading
+import numpy as np
+from django.conf import settings
+
+from .distancias import distancias
+from .versiones import VersionCompartida
+
+
+# Tamaño de celda (metros) de la rejilla de paradas activas.
+TAMANO_CELDA_M = getattr(settings, "GPS_INDICE_PARADAS_CELDA_M", 200)
+METROS_POR_GRADO = 111320.0
+
+
+class IndiceParadas:
+    """
+    Índice en memoria (rejilla lat/lon) de las paradas activas.
+    Se carga perezosamente con una consulta y se mantiene al día con las
+    señales de Parada (activación, desactivación, cambio de coordenadas).
+    Cada cambio sube su versión compartida, así que los demás procesos
+    recargan el índice en su siguiente consulta.
+    """
+
+    def __init__(self, tamano_celda=TAMANO_CELDA_M):
+        self.grados_celda = tamano_celda / METROS_POR_GRADO
+        self._celdas = {}
+        self._paradas = {}
+        self._cargado = False
+        self._version = None
+        self._compartida = VersionCompartida("paradas")
+        self._lock = threading.RLock()
+
+    def _celda(self, lat, lon):
+        return (int(math.floor(lat / self.grados_celda)), int(math.floor(lon / self.grados_celda)))
+
+    def cargar(self):
+        from paradas.models import Parada
+
+        with self._lock:
+            # Versión leída antes de la consulta: un cambio concurrente fuerza otra recarga
+            version = self._compartida.actual()
+            self._celdas.clear()
+            self._paradas.clear()
+            for parada_id, lat, lon in Parada.objects.filter(activa=True).values_list("id", "latitud", "longitud"):
+                self._insertar(parada_id, float(lat), float(lon))
+            self._cargado = True
+            self._version = version
+
+    def _asegurar_cargado(self):
+        if not self._cargado or self._compartida.actual() != self._version:
+            self.cargar()
+
+    def _publicar(self):
+        """Sube la versión compartida; si otro proceso también cambió algo, se recarga."""
+        version = self._compartida.incrementar()
+        if self._cargado and version == self._version + 1:
+            self._version = version
+        else:
+            self._cargado = False
+
+    def _insertar(self, parada_id, lat, lon):
+        celda = self._celda(lat, lon)
+        self._paradas[parada_id] = (lat, lon, celda)
+        self._celdas.setdefault(celda, {})[parada_id] = (lat, lon)
+
+    def _retirar(self, parada_id):
+        actual = self._paradas.pop(parada_id, None)
+        if actual is None:
+            return
+        celda = self._celdas.get(actual[2])
+        if celda is not None:
+            celda.pop(parada_id, None)
+            if not celda:
+                del self._celdas[actual[2]]
+
+    def eliminar(self, parada_id):
+        with self._lock:
+            self._retirar(parada_id)
+            self._publicar()
+
+    def actualizar(self, parada_id, lat, lon, activa=True):
+        """Inserta, mueve o retira una parada según su estado actual."""
+        with self._lock:
+            # Sin cargar, se leerá completa en la primera consulta
+            if self._cargado:
+                self._retirar(parada_id)
+                if activa and lat is not None and lon is not None:
+                    self._insertar(parada_id, float(lat), float(lon))
+            self._publicar()
+
+    def cercanas(self, lat, lon, radio):
+        """
+        Paradas activas a menos de `radio` metros del punto.
+        Devuelve una lista [(parada_id, distancia)] ordenada por distancia.
+        """
+        lat, lon = float(lat), float(lon)
+        dlat = radio / METROS_POR_GRADO
+        dlon = radio / (METROS_POR_GRADO * max(math.cos(math.radians(lat)), 1e-6))
+
+        with self._lock:
+            self._asegurar_cargado()
+            i_min, j_min = self._celda(lat - dlat, lon - dlon)
+            i_max, j_max = self._celda(lat + dlat, lon + dlon)
+            candidatos = [
+                (parada_id, punto)
+                for i in range(i_min, i_max + 1)
+                for j in range(j_min, j_max + 1)
+                for parada_id, punto in self._celdas.get((i, j), {}).items()
+            ]
+
+        if not candidatos:
+            return []
+        puntos = np.array([p for _, p in candidatos])
+        d = distancias(lat, lon, puntos[:, 0], puntos[:, 1])
+        return sorted(
+            ((parada_id, float(dist)) for (parada_id, _), dist in zip(candidatos, d) if dist <= radio),
+            key=lambda par: par[1],
+        )
+
+    def limpiar(self):
+        with self._lock:
+            self._celdas.clear()
+            self._paradas.clear()
+            self._cargado = False
+
+
+indice_paradas = IndiceParadas()
@@ -0,0 +1,65 @@
+# gps/ingest.py
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Posicion
+from .serializers import PosicionSerializer
+from .ultimas import registrar_ultimas_posiciones
+from .stream import publicar_posiciones
+from .cola import encolar
+from .procesamiento import procesar_posiciones
+from .banda_muerta import banda_muerta
+
+
+LOTE_MAX_POSICIONES = getattr(settings, "GPS_LOTE_MAX_POSICIONES", 1000)
+
+
+def registrar_lote(filas, diferido=False):
+    """
+    Valida y guarda un lote de posiciones con un único INSERT. Devuelve las
+    posiciones creadas, las descartadas por redundantes y los errores por
+    fila ({indice, errores}).
+    Con `diferido`, el análisis se encola para los trabajadores en segundo plano.
+    """
+    posiciones, errores = [], []
+    for indice, fila in enumerate(filas):
+        serializer = PosicionSerializer(data=fila)
+        if serializer.is_valid():
+            posiciones.append(Posicion(**serializer.validated_data))
+        else:
+            errores.append({"indice": indice, "errores": serializer.errors})
+
+    creadas, descartadas = registrar_posiciones(posiciones, diferido)
+    return creadas, descartadas, errores
+
+
+def registrar_posiciones(posiciones, diferido=False):
+    """
+    Guarda posiciones ya validadas (JSON o binario) y dispara su análisis.
+    Antes se descartan las redundantes (banda muerta por origen); las
+    guardadas pasan a ser la referencia de su origen solo si el INSERT se confirma.
+    """
+    posiciones, descartadas = guardar_posiciones(posiciones, diferido)
+    if posiciones and not diferido:
+        procesar_posiciones(posiciones)
+    return posiciones, descartadas
+
+
+def guardar_posiciones(posiciones, diferido=False):
+    """
+    Paso de persistencia de `registrar_posiciones`, sin el análisis en línea:
+    si lanza, nada quedó guardado y el lote puede reintentarse entero.
+    La última posición y la difusión en vivo usan las lecturas crudas; el
+    filtro de ruido corre después, en el análisis, y corrige ambas.
+    """
+    posiciones, descartadas = banda_muerta.filtrar(posiciones)
+    if posiciones:
+        with transaction.atomic():
+            Posicion.objects.bulk_create(posiciones)
+            transaction.on_commit(lambda: banda_muerta.confirmar(posiciones))
+            registrar_ultimas_posiciones(posiciones)
+            publicar_posiciones(posiciones)
+            if diferido:
+                encolar(posiciones)
+    return posiciones, descartadas
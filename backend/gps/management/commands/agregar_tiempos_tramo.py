@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from gps.historico import agregar_trayectos
+from gps.models import Trayecto
+
+
+class Command(BaseCommand):
+    help = (
+        "Suma al histórico de tiempos por tramo (ruta, par de paradas, día y hora) "
+        "los trayectos finalizados que aún no se agregaron. Es incremental: cada "
+        "trayecto se procesa una sola vez."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=50, help="Trayectos por transacción.")
+        parser.add_argument("--limite", type=int, default=None, help="Máximo de trayectos a procesar.")
+
+    def handle(self, *args, **options):
+        pendientes = Trayecto.objects.filter(finalizado=True, tiempos_agregados=False).order_by("fecha_fin")
+        if options["limite"]:
+            pendientes = pendientes[:options["limite"]]
+        ids = list(pendientes.values_list("id", flat=True))
+
+        total_trayectos = total_tramos = 0
+        for i in range(0, len(ids), options["lote"]):
+            trayectos = list(Trayecto.objects.filter(id__in=ids[i:i + options["lote"]]))
+            total_tramos += agregar_trayectos(trayectos)
+            total_trayectos += len(trayectos)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Trayectos agregados: {total_trayectos} ({total_tramos} tiempos de tramo)."
+        ))
@@ -0,0 +1,105 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from gps.models import Posicion, Trayecto, AlertaGPS, TipoOrigen
+from gps.simplificacion import douglas_peucker
+
+
+RETENCION_DIAS = getattr(settings, "GPS_RETENCION_DIAS", 30)
+TOLERANCIA_M = getattr(settings, "GPS_SIMPLIFICACION_TOLERANCIA_M", 10)
+
+
+class Command(BaseCommand):
+    help = (
+        "Aplica la política de retención de posiciones GPS: conserva la resolución "
+        "completa durante N días y luego submuestrea cada trayecto (Douglas–Peucker). "
+        "Los borrados se hacen por lotes para no bloquear la tabla."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dias", type=int, default=RETENCION_DIAS, help="Días con resolución completa.")
+        parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_M, help="Tolerancia de simplificación en metros.")
+        parser.add_argument("--lote", type=int, default=1000, help="Filas por cada DELETE.")
+        parser.add_argument("--pausa", type=float, default=0, help="Segundos de espera entre lotes.")
+        parser.add_argument("--purgar-usuarios", action="store_true", help="Elimina posiciones de usuarios más antiguas que --dias.")
+        parser.add_argument("--purgar-dias", type=int, default=None, help="Elimina toda posición más antigua que estos días.")
+        parser.add_argument("--dry-run", action="store_true", help="Solo informa, no borra.")
+
+    def handle(self, *args, **options):
+        self.lote = options["lote"]
+        self.pausa = options["pausa"]
+        self.dry_run = options["dry_run"]
+        limite = timezone.now() - timedelta(days=options["dias"])
+
+        trayectos = Trayecto.objects.filter(finalizado=True, simplificado=False, fecha_fin__lt=limite)
+        total_trayectos = total_descartadas = 0
+        for trayecto in trayectos.iterator(chunk_size=100):
+            total_descartadas += self._simplificar(trayecto, options["tolerancia"])
+            total_trayectos += 1
+        self.stdout.write(f"Trayectos simplificados: {total_trayectos} ({total_descartadas} posiciones descartadas).")
+
+        if options["purgar_usuarios"]:
+            borradas = self._borrar(Posicion.objects.filter(origen_tipo=TipoOrigen.USUARIO, timestamp__lt=limite))
+            self.stdout.write(f"Posiciones de usuarios purgadas: {borradas}.")
+
+        if options["purgar_dias"] is not None:
+            limite_purga = timezone.now() - timedelta(days=options["purgar_dias"])
+            borradas = self._borrar(Posicion.objects.filter(timestamp__lt=limite_purga))
+            self.stdout.write(f"Posiciones purgadas (>{options['purgar_dias']} días): {borradas}.")
+
+        self.stdout.write(self.style.SUCCESS("Depuración de posiciones completada."))
+
+    def _simplificar(self, trayecto, tolerancia):
+        """Submuestrea, por vehículo, las posiciones registradas durante el trayecto."""
+        filas = (
+            trayecto.posiciones_del_recorrido()
+            .order_by("origen_id", "timestamp")
+            .values_list("id", "origen_id", "latitud", "longitud")
+        )
+        recorridos = {}
+        for posicion_id, origen_id, lat, lon in filas.iterator(chunk_size=2000):
+            recorridos.setdefault(origen_id, []).append((posicion_id, float(lat), float(lon)))
+
+        descartar = []
+        for puntos in recorridos.values():
+            ids, lats, lons = zip(*puntos)
+            mantener = douglas_peucker(lats, lons, tolerancia)
+            descartar.extend(i for i, m in zip(ids, mantener) if not m)
+
+        # Las posiciones referenciadas por alertas se conservan
+        protegidas = set()
+        for i in range(0, len(descartar), self.lote):
+            protegidas.update(
+                AlertaGPS.objects.filter(posicion_id__in=descartar[i:i + self.lote])
+                .values_list("posicion_id", flat=True)
+            )
+        descartar = [i for i in descartar if i not in protegidas]
+
+        if not self.dry_run:
+            for i in range(0, len(descartar), self.lote):
+                Posicion.objects.filter(id__in=descartar[i:i + self.lote]).delete()
+                self._esperar()
+            # update() evita re-disparar las señales de cierre de trayecto
+            Trayecto.objects.filter(pk=trayecto.pk).update(simplificado=True)
+        return len(descartar)
+
+    def _borrar(self, queryset):
+        """Borra el queryset en lotes de claves primarias (transacciones cortas)."""
+        if self.dry_run:
+            return queryset.count()
+        total = 0
+        while True:
+            ids = list(queryset.order_by().values_list("id", flat=True)[:self.lote])
+            if not ids:
+                return total
+            Posicion.objects.filter(id__in=ids).delete()
+            total += len(ids)
+            self._esperar()
+
+    def _esperar(self):
+        if self.pausa:
+            time.sleep(self.pausa)
@@ -0,0 +1,60 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from gps.nmea import ReceptorNMEA, INTERVALO_S
+from gps.ingest import LOTE_MAX_POSICIONES
+from gps.cola import PROCESAMIENTO_ASINCRONO
+
+
+PUERTO_TCP = getattr(settings, "GPS_NMEA_PUERTO_TCP", 5055)
+PUERTO_UDP = getattr(settings, "GPS_NMEA_PUERTO_UDP", None)
+
+
+class Command(BaseCommand):
+    help = (
+        "Escucha telemetría NMEA cruda ($GPRMC/$GPGGA) de las unidades a bordo por TCP y/o UDP "
+        "y la registra por lotes con la misma ingesta que la API. Las unidades se identifican "
+        "con la sentencia $PDID,<dispositivo> (Bus.dispositivo_id)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="0.0.0.0", help="Dirección en la que escuchar.")
+        parser.add_argument("--tcp", type=int, default=PUERTO_TCP, help="Puerto TCP (0 = deshabilitado).")
+        parser.add_argument("--udp", type=int, default=PUERTO_UDP, help="Puerto UDP (por defecto deshabilitado).")
+        parser.add_argument("--lote", type=int, default=LOTE_MAX_POSICIONES, help="Posiciones por lote de ingesta.")
+        parser.add_argument("--intervalo", type=float, default=INTERVALO_S, help="Segundos máximos entre lotes.")
+        parser.add_argument(
+            "--diferido", action="store_true", default=PROCESAMIENTO_ASINCRONO,
+            help="Encola el análisis para los trabajadores en lugar de hacerlo en línea.",
+        )
+
+    def handle(self, *args, **options):
+        puerto_tcp = options["tcp"] or None
+        puerto_udp = options["udp"] or None
+        if puerto_tcp is None and puerto_udp is None:
+            raise CommandError("Debe habilitar al menos un puerto (--tcp o --udp).")
+
+        receptor = ReceptorNMEA(lote=options["lote"], intervalo=options["intervalo"], diferido=options["diferido"])
+
+        def listo(_):
+            self.stdout.write(
+                f"Escuchando NMEA en {options['host']} (TCP: {puerto_tcp or '-'}, UDP: {puerto_udp or '-'}); "
+                f"{len(receptor.dispositivos)} dispositivos registrados."
+            )
+
+        try:
+            asyncio.run(receptor.servir(options["host"], puerto_tcp, puerto_udp, listo=listo))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            receptor.cerrar()
+
+        resumen = receptor.resumen()
+        self.stdout.write(self.style.SUCCESS(
+            f"Sentencias: {resumen['sentencias']} ({resumen['invalidas']} inválidas), fijos: {resumen['fijos']}, "
+            f"creadas: {resumen['creadas']}, sin dispositivo: {resumen['sin_dispositivo']}, "
+            f"perdidos: {resumen['perdidos']}, lotes fallidos: {resumen['errores']}, "
+            f"análisis fallidos: {resumen['errores_analisis']}."
+        ))
@@ -0,0 +1,139 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+
+TABLA = "gps_posicion"
+
+
+def _mes(fecha, desplazamiento):
+    indice = fecha.year * 12 + fecha.month - 1 + desplazamiento
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        "Particionado nativo por rango mensual de 'timestamp' para gps_posicion (solo PostgreSQL). "
+        "--convertir transforma la tabla existente; sin opciones solo crea las particiones futuras."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--convertir", action="store_true", help="Convierte gps_posicion en tabla particionada.")
+        parser.add_argument("--meses", type=int, default=3, help="Meses futuros con partición creada.")
+        parser.add_argument("--desde", type=str, default=None, help="Primer mes (AAAA-MM) al convertir; por defecto el dato más antiguo.")
+        parser.add_argument("--descartar-anteriores", type=int, default=None, help="Elimina particiones con más de N meses de antigüedad.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("El particionado nativo solo está disponible en PostgreSQL.")
+
+        if options["convertir"]:
+            if self._esta_particionada():
+                self.stdout.write("gps_posicion ya es una tabla particionada.")
+            else:
+                self._convertir(options["desde"])
+
+        if not self._esta_particionada():
+            raise CommandError("gps_posicion no está particionada; use --convertir.")
+
+        hoy = date.today().replace(day=1)
+        for i in range(options["meses"] + 1):
+            self._crear_particion(_mes(hoy, i))
+
+        if options["descartar_anteriores"] is not None:
+            self._descartar(_mes(hoy, -options["descartar_anteriores"]))
+
+        self.stdout.write(self.style.SUCCESS("Particiones de posiciones al día."))
+
+    def _esta_particionada(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLA])
+            return cursor.fetchone() is not None
+
+    def _crear_particion(self, inicio):
+        nombre = f"{TABLA}_{inicio:%Y%m}"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS "{nombre}" PARTITION OF "{TABLA}" '
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [inicio.isoformat(), _mes(inicio, 1).isoformat()],
+            )
+
+    def _descartar(self, limite):
+        """Elimina (DROP) particiones mensuales completas anteriores al límite: purga instantánea."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = %s::regclass",
+                [TABLA],
+            )
+            for (nombre,) in cursor.fetchall():
+                sufijo = nombre.rsplit("_", 1)[-1]
+                if not sufijo.isdigit():
+                    continue
+                if date(int(sufijo[:4]), int(sufijo[4:]), 1) < limite:
+                    cursor.execute(f'DROP TABLE "{nombre}"')
+                    self.stdout.write(f"Partición eliminada: {nombre}")
+
+    @transaction.atomic
+    def _convertir(self, desde):
+        """
+        Reemplaza gps_posicion por una tabla particionada con los mismos datos.
+        La clave primaria pasa a (id, timestamp) y las FK que apuntaban a la tabla
+        (alertas, últimas posiciones) se eliminan: la integridad la mantiene Django.
+        """
+        legado = f"{TABLA}_legado"
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE "{TABLA}" RENAME TO "{legado}"')
+
+            cursor.execute(
+                "SELECT conname, conrelid::regclass::text FROM pg_constraint "
+                "WHERE contype = 'f' AND confrelid = %s::regclass",
+                [legado],
+            )
+            for nombre, tabla in cursor.fetchall():
+                cursor.execute(f'ALTER TABLE {tabla} DROP CONSTRAINT "{nombre}"')
+
+            cursor.execute(
+                f'CREATE TABLE "{TABLA}" (LIKE "{legado}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+                f'PARTITION BY RANGE ("timestamp")'
+            )
+            cursor.execute(f'ALTER TABLE "{TABLA}" ADD PRIMARY KEY (id, "timestamp")')
+            cursor.execute(
+                f'ALTER TABLE "{TABLA}" ADD CONSTRAINT "{TABLA}_ruta_id_fk" FOREIGN KEY (ruta_id) '
+                f"REFERENCES rutas_ruta (id) DEFERRABLE INITIALLY DEFERRED"
+            )
+            cursor.execute(
+                f'ALTER TABLE "{TABLA}" ADD CONSTRAINT "{TABLA}_trayecto_id_fk" FOREIGN KEY (trayecto_id) '
+                f"REFERENCES gps_trayecto (id) DEFERRABLE INITIALLY DEFERRED"
+            )
+
+            # Los índices del legado se renombran para liberar sus nombres
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE tablename = %s", [legado])
+            for (indice,) in cursor.fetchall():
+                cursor.execute(f'ALTER INDEX "{indice}" RENAME TO "{indice[:50]}_legado"')
+            cursor.execute(f'CREATE INDEX "gps_posicion_ts_id_idx" ON "{TABLA}" ("timestamp", id)')
+            cursor.execute(f'CREATE INDEX "gps_posicion_ruta_ts_id_idx" ON "{TABLA}" (ruta_id, "timestamp", id)')
+            cursor.execute(f'CREATE INDEX "gps_posicion_origen_ts_idx" ON "{TABLA}" (origen_id, "timestamp")')
+            cursor.execute(f'CREATE INDEX "gps_posicion_trayecto_ts_idx" ON "{TABLA}" (trayecto_id, "timestamp")')
+
+            cursor.execute(f'CREATE TABLE "{TABLA}_default" PARTITION OF "{TABLA}" DEFAULT')
+
+            if desde:
+                anio, mes = desde.split("-")
+                inicio = date(int(anio), int(mes), 1)
+            else:
+                cursor.execute(f'SELECT MIN("timestamp") FROM "{legado}"')
+                minimo = cursor.fetchone()[0]
+                inicio = (minimo.date() if minimo else date.today()).replace(day=1)
+
+            actual, hoy = inicio, date.today().replace(day=1)
+            while actual <= hoy:
+                self._crear_particion(actual)
+                actual = _mes(actual, 1)
+
+            cursor.execute(f'INSERT INTO "{TABLA}" SELECT * FROM "{legado}"')
+            cursor.execute(f'DROP TABLE "{legado}"')
+
+        self.stdout.write("gps_posicion convertida a tabla particionada por mes.")
@@ -0,0 +1,80 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from gps.cola import reclamar, procesar, recuperar_vencidas, purgar_completadas, metricas
+
+
+TRABAJADORES = getattr(settings, "GPS_COLA_TRABAJADORES", 4)
+MANTENIMIENTO_SEGUNDOS = 60
+
+
+class Command(BaseCommand):
+    help = (
+        "Procesa en segundo plano las posiciones encoladas (detección de desvíos, "
+        "confirmación de asistencia) con un pool de trabajadores."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--trabajadores", type=int, default=TRABAJADORES, help="Hilos trabajadores.")
+        parser.add_argument("--lote", type=int, default=100, help="Tareas reclamadas por iteración.")
+        parser.add_argument("--intervalo", type=float, default=1.0, help="Segundos de espera con la cola vacía.")
+        parser.add_argument("--una-vez", action="store_true", help="Vacía la cola y termina.")
+
+    def handle(self, *args, **options):
+        self.lote = options["lote"]
+        self.intervalo = options["intervalo"]
+        self.una_vez = options["una_vez"]
+        self.detener = threading.Event()
+
+        recuperar_vencidas()
+        trabajadores = max(options["trabajadores"], 1)
+        try:
+            if trabajadores == 1:
+                self._trabajar(cerrar_conexion=False)
+            else:
+                with ThreadPoolExecutor(trabajadores, thread_name_prefix="gps-cola") as pool:
+                    futuros = [pool.submit(self._trabajar) for _ in range(trabajadores)]
+                    try:
+                        if not self.una_vez:
+                            self._mantener()
+                        for futuro in futuros:
+                            futuro.result()
+                    finally:
+                        # Sin esto, Ctrl-C deja al pool esperando a trabajadores que no se detienen
+                        self.detener.set()
+        except KeyboardInterrupt:
+            self.detener.set()
+
+        resumen = metricas.resumen()
+        self.stdout.write(self.style.SUCCESS(
+            f"Tareas procesadas: {resumen['procesadas']} ({resumen['errores']} errores, "
+            f"{resumen['por_segundo']}/s)."
+        ))
+
+    def _trabajar(self, cerrar_conexion=True):
+        """Bucle de un trabajador: reclama un lote, lo procesa y repite."""
+        try:
+            while not self.detener.is_set():
+                close_old_connections()
+                tareas = reclamar(self.lote)
+                if tareas:
+                    procesar(tareas)
+                    continue
+                if self.una_vez:
+                    return
+                time.sleep(self.intervalo)
+        finally:
+            if cerrar_conexion:
+                connection.close()
+
+    def _mantener(self):
+        """Devuelve a la cola las tareas huérfanas y purga las completadas."""
+        while not self.detener.wait(MANTENIMIENTO_SEGUNDOS):
+            recuperar_vencidas()
+            purgar_completadas()
+            connection.close()
@@ -0,0 +1,84 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gps.ingest import LOTE_MAX_POSICIONES
+from gps.simulacion import Simulador, generar_dataset, limpiar_dataset
+from rutas.models import Ruta
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera una flota sintética (rutas, paradas, buses, horarios, usuarios y roles con prefijo SIM) "
+        "y reproduce buses y pasajeros emitiendo posiciones contra la ingesta o la API en proceso. "
+        "Informa rendimiento, percentiles de latencia por lote y consultas SQL por lote."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rutas", type=int, default=10)
+        parser.add_argument("--paradas", type=int, default=12, help="Paradas por ruta.")
+        parser.add_argument("--buses", type=int, default=2, help="Buses por ruta.")
+        parser.add_argument("--usuarios", type=int, default=1000)
+        parser.add_argument("--roles", type=int, default=4)
+        parser.add_argument("--pasajeros", type=int, default=200, help="Usuarios que emiten posiciones.")
+        parser.add_argument("--duracion", type=float, default=300, help="Segundos simulados.")
+        parser.add_argument("--intervalo", type=float, default=5, help="Segundos entre posiciones de cada origen.")
+        parser.add_argument("--lote", type=int, default=LOTE_MAX_POSICIONES, help="Posiciones por lote enviado.")
+        parser.add_argument("--destino", choices=["ingesta", "api"], default="ingesta")
+        parser.add_argument("--diferido", action="store_true", help="Encola el análisis en lugar de hacerlo en línea.")
+        parser.add_argument("--tiempo-real", action="store_true", help="Respeta el ritmo del reloj.")
+        parser.add_argument("--semilla", type=int, default=42)
+        parser.add_argument("--limpiar", action="store_true", help="Borra la flota simulada anterior y termina.")
+        parser.add_argument("--regenerar", action="store_true", help="Borra y vuelve a generar la flota simulada.")
+        parser.add_argument("--solo-datos", action="store_true", help="Genera la flota sin simular posiciones.")
+        parser.add_argument("--json", action="store_true", help="Imprime el resumen como JSON.")
+
+    def handle(self, *args, **options):
+        if options["intervalo"] <= 0 or options["lote"] <= 0:
+            raise CommandError("--intervalo y --lote deben ser positivos.")
+        if options["limpiar"] or options["regenerar"]:
+            limpiar_dataset()
+            self.stdout.write("Flota simulada anterior eliminada.")
+            if options["limpiar"]:
+                return
+
+        if not Ruta.objects.filter(nombre__startswith="SIM Ruta").exists():
+            creados = generar_dataset(
+                rutas=options["rutas"],
+                paradas_por_ruta=options["paradas"],
+                buses_por_ruta=options["buses"],
+                usuarios=options["usuarios"],
+                roles=options["roles"],
+                semilla=options["semilla"],
+            )
+            self.stdout.write("Flota generada: " + ", ".join(f"{v} {k}" for k, v in creados.items()) + ".")
+        if options["solo_datos"]:
+            return
+
+        simulador = Simulador(
+            pasajeros=options["pasajeros"],
+            intervalo_s=options["intervalo"],
+            lote=options["lote"],
+            destino=options["destino"],
+            diferido=options["diferido"],
+            semilla=options["semilla"],
+        )
+        resumen = simulador.ejecutar(options["duracion"], tiempo_real=options["tiempo_real"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(resumen))
+            return
+        latencia = resumen["latencia_ms"]
+        self.stdout.write(self.style.SUCCESS(
+            f"{resumen['vehiculos']} buses y {resumen['pasajeros']} pasajeros: {resumen['enviadas']} posiciones "
+            f"en {resumen['lotes']} lotes ({resumen['creadas']} creadas, {resumen['errores']} lotes con error) "
+            f"en {resumen['duracion_s']} s → {resumen['posiciones_por_s']} posiciones/s."
+        ))
+        self.stdout.write(
+            f"Latencia por lote (ms): p50 {latencia['p50']}, p90 {latencia['p90']}, p95 {latencia['p95']}, "
+            f"p99 {latencia['p99']}, máx {latencia['max']}."
+        )
+        self.stdout.write(
+            f"Consultas por lote: media {resumen['consultas_por_lote']['media']}, "
+            f"máx {resumen['consultas_por_lote']['max']}."
+        )
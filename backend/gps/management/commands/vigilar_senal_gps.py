@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from gps.vigilancia import barrer, INTERVALO_S, UMBRAL_S
+
+
+class Command(BaseCommand):
+    help = (
+        "Vigila los trayectos abiertos: los que dejan de reportar posiciones pasan a "
+        "'sin señal' con una alerta por episodio y se recuperan al volver a reportar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--intervalo", type=float, default=INTERVALO_S, help="Segundos entre barridos.")
+        parser.add_argument("--umbral", type=float, default=UMBRAL_S, help="Segundos sin posiciones para alertar.")
+        parser.add_argument("--una-vez", action="store_true", help="Hace un solo barrido y termina.")
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                close_old_connections()
+                resumen = barrer(umbral_s=options["umbral"])
+                if resumen["alertas"] or resumen["recuperados"] or options["una_vez"]:
+                    self.stdout.write(
+                        f"Revisados: {resumen['revisados']}, sin señal: {resumen['alertas']}, "
+                        f"recuperados: {resumen['recuperados']} ({resumen['duracion_ms']} ms)."
+                    )
+                if options["una_vez"]:
+                    return
+                time.sleep(options["intervalo"])
+        except KeyboardInterrupt:
+            pass
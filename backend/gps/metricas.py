@@ -0,0 +1,55 @@
+# gps/metricas.py
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+# Caché compartida entre procesos (web, trabajadores, vigilante) donde se suman las métricas.
+CACHE_ALIAS = getattr(settings, "GPS_METRICAS_CACHE", "default")
+CACHE_PREFIJO = "gps:metricas"
+
+
+class ContadoresCompartidos:
+    """
+    Contadores que suman todos los procesos con `incr` atómico por clave en
+    la caché compartida, de modo que el API ve lo que registran los
+    comandos en segundo plano. Con la caché en memoria local solo se ve el
+    propio proceso: en producción debe ser Redis o Memcached.
+    """
+
+    def __init__(self, nombre, campos, cache_alias=CACHE_ALIAS):
+        self.nombre = nombre
+        self.campos = tuple(campos)
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def _clave(self, campo):
+        return f"{CACHE_PREFIJO}:{self.nombre}:{campo}"
+
+    def sumar(self, **cantidades):
+        for campo, cantidad in cantidades.items():
+            if not cantidad:
+                continue
+            clave = self._clave(campo)
+            self.cache.add(clave, 0, None)
+            try:
+                self.cache.incr(clave, cantidad)
+            except ValueError:  # expulsada entre add e incr
+                self.cache.set(clave, cantidad, None)
+
+    def fijar(self, **valores):
+        """Valores que no se suman (último resultado, máximos) con escritura simple."""
+        self.cache.set_many({self._clave(campo): valor for campo, valor in valores.items()}, None)
+
+    def leer(self, campo, defecto=None):
+        return self.cache.get(self._clave(campo), defecto)
+
+    def valores(self):
+        leidos = self.cache.get_many([self._clave(campo) for campo in self.campos])
+        return {campo: leidos.get(self._clave(campo), 0) for campo in self.campos}
+
+    def limpiar(self, *otros):
+        self.cache.delete_many([self._clave(campo) for campo in self.campos + otros])
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:58
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+def poblar_ultimas_posiciones(apps, schema_editor):
+    """Toma la posición más reciente de cada origen ya registrado."""
+    Posicion = apps.get_model("gps", "Posicion")
+    UltimaPosicion = apps.get_model("gps", "UltimaPosicion")
+
+    filas, vistos = [], set()
+    for p in Posicion.objects.order_by("origen_tipo", "origen_id", "-timestamp").iterator(chunk_size=2000):
+        clave = (p.origen_tipo, p.origen_id)
+        if clave in vistos:
+            continue
+        vistos.add(clave)
+        filas.append(UltimaPosicion(
+            origen_tipo=p.origen_tipo,
+            origen_id=p.origen_id,
+            posicion_id=p.id,
+            latitud=p.latitud,
+            longitud=p.longitud,
+            precision=p.precision,
+            estado=p.estado,
+            timestamp=p.timestamp,
+            ruta_id=p.ruta_id,
+        ))
+    UltimaPosicion.objects.bulk_create(filas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gps', '0002_initial'),
+        ('rutas', '0003_trazadoruta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UltimaPosicion',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('origen_tipo', models.CharField(choices=[('USUARIO', 'Usuario'), ('VEHICULO', 'Vehículo')], max_length=20)),
+                ('origen_id', models.UUIDField(help_text='UUID del usuario o vehículo asociado.')),
+                ('latitud', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('longitud', models.DecimalField(decimal_places=6, max_digits=9)),
+                ('precision', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('estado', models.CharField(choices=[('ACTIVA', 'Activa'), ('FUERA_DE_RANGO', 'Fuera de rango'), ('SIN_SEÑAL', 'Sin señal'), ('FINALIZADA', 'Finalizada')], default='ACTIVA', max_length=20)),
+                ('timestamp', models.DateTimeField()),
+                ('actualizada_en', models.DateTimeField(auto_now=True)),
+                ('posicion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='gps.posicion')),
+                ('ruta', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ultimas_posiciones', to='rutas.ruta')),
+            ],
+            options={
+                'verbose_name': 'Última posición GPS',
+                'verbose_name_plural': 'Últimas posiciones GPS',
+                'ordering': ['-timestamp'],
+                'indexes': [models.Index(fields=['origen_tipo', '-timestamp'], name='gps_ultima_tipo_ts_idx')],
+                'constraints': [models.UniqueConstraint(fields=('origen_tipo', 'origen_id'), name='gps_ultima_posicion_por_origen')],
+            },
+        ),
+        migrations.RunPython(poblar_ultimas_posiciones, migrations.RunPython.noop),
+    ]
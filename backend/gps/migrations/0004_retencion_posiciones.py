@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gps', '0003_ultimaposicion'),
+        ('rutas', '0003_trazadoruta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trayecto',
+            name='simplificado',
+            field=models.BooleanField(default=False, help_text='Indica si sus posiciones ya fueron submuestreadas por retención.'),
+        ),
+        migrations.AddIndex(
+            model_name='posicion',
+            index=models.Index(fields=['timestamp'], name='gps_posicion_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='posicion',
+            index=models.Index(fields=['ruta', 'timestamp'], name='gps_posicion_ruta_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='posicion',
+            index=models.Index(fields=['origen_id', 'timestamp'], name='gps_posicion_origen_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:02
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gps', '0004_retencion_posiciones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TareaPosicion',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('PROCESANDO', 'Procesando'), ('COMPLETADA', 'Completada'), ('ERROR', 'Error')], default='PENDIENTE', max_length=20)),
+                ('intentos', models.PositiveIntegerField(default=0)),
+                ('reclamo', models.UUIDField(blank=True, help_text='Identificador del lote que tomó la tarea.', null=True)),
+                ('creada_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('tomada_en', models.DateTimeField(blank=True, null=True)),
+                ('terminada_en', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('posicion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tareas', to='gps.posicion')),
+            ],
+            options={
+                'verbose_name': 'Tarea de procesamiento GPS',
+                'verbose_name_plural': 'Tareas de procesamiento GPS',
+                'ordering': ['creada_en'],
+                'indexes': [models.Index(fields=['estado', 'creada_en'], name='gps_tarea_estado_idx'), models.Index(fields=['reclamo'], name='gps_tarea_reclamo_idx')],
+            },
+        ),
+    ]
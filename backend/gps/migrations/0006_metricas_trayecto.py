@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gps', '0005_tareaposicion'),
+        ('rutas', '0004_umbrales_desvio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posicion',
+            name='trayecto',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='Trayecto abierto de la ruta al registrar la posición (solo vehículos).', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='posiciones', to='gps.trayecto'),
+        ),
+        migrations.AddField(
+            model_name='trayecto',
+            name='distancia_acumulada_m',
+            field=models.FloatField(default=0, help_text='Distancia recorrida según las posiciones (m).'),
+        ),
+        migrations.AddField(
+            model_name='trayecto',
+            name='posiciones_registradas',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='trayecto',
+            name='primera_posicion_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='trayecto',
+            name='ultima_latitud',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='trayecto',
+            name='ultima_longitud',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='trayecto',
+            name='ultima_posicion_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='trayecto',
+            name='velocidad_maxima_kmh',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='trayecto',
+            name='velocidad_promedio_kmh',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='posicion',
+            index=models.Index(fields=['trayecto', 'timestamp'], name='gps_posicion_trayecto_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gps', '0006_metricas_trayecto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posicion',
+            name='distancia_ruta_m',
+            field=models.FloatField(blank=True, help_text='Distancia recorrida a lo largo de la ruta (m).', null=True),
+        ),
+        migrations.AddField(
+            model_name='posicion',
+            name='latitud_ajustada',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='posicion',
+            name='longitud_ajustada',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='posicion',
+            name='segmento_ruta',
+            field=models.PositiveIntegerField(blank=True, help_text='Índice del segmento del trazado.', null=True),
+        ),
+        migrations.AddField(
+            model_name='ultimaposicion',
+            name='distancia_ruta_m',
+            field=models.FloatField(blank=True, help_text='Distancia recorrida a lo largo de la ruta (m).', null=True),
+        ),
+        migrations.AddField(
+            model_name='ultimaposicion',
+            name='segmento_ruta',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
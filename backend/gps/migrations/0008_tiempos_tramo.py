@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:13
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gps', '0007_ajuste_ruta'),
+        ('paradas', '0002_initial'),
+        ('rutas', '0004_umbrales_desvio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trayecto',
+            name='tiempos_agregados',
+            field=models.BooleanField(default=False, help_text='Indica si sus tiempos entre paradas ya se sumaron al histórico.'),
+        ),
+        migrations.CreateModel(
+            name='TiempoTramoHistorico',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('dia_semana', models.PositiveSmallIntegerField(help_text='0 = lunes … 6 = domingo.')),
+                ('hora', models.PositiveSmallIntegerField(help_text='Hora local (0-23) de salida de la parada de origen.')),
+                ('muestras', models.PositiveIntegerField(default=0)),
+                ('media_segundos', models.FloatField(default=0)),
+                ('p50_segundos', models.FloatField(blank=True, null=True)),
+                ('p90_segundos', models.FloatField(blank=True, null=True)),
+                ('estado_percentiles', models.JSONField(blank=True, default=dict)),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+                ('parada_destino', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='paradas.parada')),
+                ('parada_origen', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='paradas.parada')),
+                ('ruta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tiempos_tramo', to='rutas.ruta')),
+            ],
+            options={
+                'verbose_name': 'Tiempo histórico de tramo',
+                'verbose_name_plural': 'Tiempos históricos de tramo',
+                'ordering': ['ruta', 'dia_semana', 'hora'],
+                'constraints': [models.UniqueConstraint(fields=('ruta', 'parada_origen', 'parada_destino', 'dia_semana', 'hora'), name='gps_tiempo_tramo_unico')],
+            },
+        ),
+    ]
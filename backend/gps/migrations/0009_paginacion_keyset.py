@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gps', '0008_tiempos_tramo'),
+        ('rutas', '0005_paginacion_keyset'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='posicion',
+            name='gps_posicion_ts_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='posicion',
+            name='gps_posicion_ruta_ts_idx',
+        ),
+        migrations.AddIndex(
+            model_name='alertagps',
+            index=models.Index(fields=['detectada_en', 'id'], name='gps_alerta_ts_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alertagps',
+            index=models.Index(fields=['resuelta', 'detectada_en', 'id'], name='gps_alerta_resuelta_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='posicion',
+            index=models.Index(fields=['timestamp', 'id'], name='gps_posicion_ts_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='posicion',
+            index=models.Index(fields=['ruta', 'timestamp', 'id'], name='gps_posicion_ruta_ts_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trayecto',
+            index=models.Index(fields=['fecha_inicio', 'id'], name='gps_trayecto_inicio_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trayecto',
+            index=models.Index(fields=['finalizado', 'fecha_inicio', 'id'], name='gps_trayecto_fin_inicio_idx'),
+        ),
+    ]
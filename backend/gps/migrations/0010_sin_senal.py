@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gps', '0009_paginacion_keyset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trayecto',
+            name='sin_senal_desde',
+            field=models.DateTimeField(blank=True, help_text='Inicio del episodio actual sin señal (lo marca el vigilante).', null=True),
+        ),
+    ]
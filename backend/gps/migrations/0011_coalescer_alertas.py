@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fusionar_alertas_abiertas(apps, schema_editor):
+    """Deja una sola alerta abierta por (ruta, tipo): la más antigua absorbe a las demás."""
+    AlertaGPS = apps.get_model("gps", "AlertaGPS")
+    episodios = {}
+    for alerta in AlertaGPS.objects.filter(resuelta=False).order_by("detectada_en"):
+        episodios.setdefault((alerta.ruta_id, alerta.tipo), []).append(alerta)
+    for alertas in episodios.values():
+        if len(alertas) < 2:
+            continue
+        principal, duplicadas = alertas[0], alertas[1:]
+        principal.ocurrencias = len(alertas)
+        principal.ultima_deteccion_en = duplicadas[-1].detectada_en
+        principal.save(update_fields=["ocurrencias", "ultima_deteccion_en"])
+        AlertaGPS.objects.filter(pk__in=[a.pk for a in duplicadas]).update(
+            resuelta=True, resuelta_en=principal.ultima_deteccion_en
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gps', '0010_sin_senal'),
+        ('rutas', '0005_paginacion_keyset'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alertagps',
+            name='distancia_maxima_m',
+            field=models.FloatField(blank=True, help_text='Mayor distancia registrada en el episodio (m).', null=True),
+        ),
+        migrations.AddField(
+            model_name='alertagps',
+            name='ocurrencias',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='alertagps',
+            name='ultima_deteccion_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(fusionar_alertas_abiertas, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='alertagps',
+            constraint=models.UniqueConstraint(condition=models.Q(('resuelta', False)), fields=('ruta', 'tipo'), name='gps_alerta_abierta_unica'),
+        ),
+    ]
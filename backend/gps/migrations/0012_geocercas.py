@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:25
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gps', '0011_coalescer_alertas'),
+        ('paradas', '0003_poligono_zona'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoZona',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('origen_tipo', models.CharField(choices=[('USUARIO', 'Usuario'), ('VEHICULO', 'Vehículo')], max_length=20)),
+                ('origen_id', models.UUIDField()),
+                ('tipo', models.CharField(choices=[('ENTRADA', 'Entrada'), ('SALIDA', 'Salida')], max_length=10)),
+                ('timestamp', models.DateTimeField()),
+                ('posicion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='eventos_zona', to='gps.posicion')),
+                ('zona', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eventos_gps', to='paradas.zonaparada')),
+            ],
+            options={
+                'verbose_name': 'Evento de zona',
+                'verbose_name_plural': 'Eventos de zona',
+                'ordering': ['-timestamp'],
+                'indexes': [models.Index(fields=['timestamp', 'id'], name='gps_evento_zona_ts_id_idx'), models.Index(fields=['zona', 'timestamp', 'id'], name='gps_evento_zona_zona_ts_idx'), models.Index(fields=['origen_id', 'timestamp'], name='gps_evento_zona_origen_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PresenciaZona',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('origen_tipo', models.CharField(choices=[('USUARIO', 'Usuario'), ('VEHICULO', 'Vehículo')], max_length=20)),
+                ('origen_id', models.UUIDField()),
+                ('desde', models.DateTimeField()),
+                ('zona', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='presencias_gps', to='paradas.zonaparada')),
+            ],
+            options={
+                'verbose_name': 'Presencia en zona',
+                'verbose_name_plural': 'Presencias en zonas',
+                'indexes': [models.Index(fields=['origen_id'], name='gps_presencia_origen_idx')],
+                'constraints': [models.UniqueConstraint(fields=('zona', 'origen_tipo', 'origen_id'), name='gps_presencia_zona_unica')],
+            },
+        ),
+    ]
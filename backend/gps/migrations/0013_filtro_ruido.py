@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gps', '0012_geocercas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posicion',
+            name='filtro',
+            field=models.CharField(blank=True, choices=[('SUAVIZADA', 'Suavizada'), ('DESCARTADA', 'Descartada')], help_text='Marca del filtro de ruido GPS; vacío si la lectura se aceptó tal cual.', max_length=12, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gps', '0013_filtro_ruido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trayecto',
+            name='vehiculo_id',
+            field=models.UUIDField(blank=True, db_index=True, help_text='Bus del trayecto (origen_id de sus posiciones); si se inició sin él, lo toma el primer bus que reporta.', null=True),
+        ),
+    ]
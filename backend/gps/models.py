@@ -1,9 +1,12 @@
 #gps/models.py
 import uuid
+from decimal import Decimal
 from django.db import models
 from django.utils import timezone
 from django.conf import settings
 
+from .utils import calcular_distancia
+
 
 class TipoOrigen(models.TextChoices):
     USUARIO = "USUARIO", "Usuario"
@@ -17,6 +20,11 @@ class EstadoPosicion(models.TextChoices):
     FINALIZADA = "FINALIZADA", "Finalizada"
 
 
+class ResultadoFiltro(models.TextChoices):
+    SUAVIZADA = "SUAVIZADA", "Suavizada"
+    DESCARTADA = "DESCARTADA", "Descartada"
+
+
 class Posicion(models.Model):
     """
     Representa una lectura de ubicación GPS (usuario o vehículo).
@@ -29,6 +37,13 @@ class Posicion(models.Model):
     precision = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, help_text="Precisión del GPS en metros.")
     estado = models.CharField(max_length=20, choices=EstadoPosicion.choices, default=EstadoPosicion.ACTIVA)
     timestamp = models.DateTimeField(default=timezone.now)
+    filtro = models.CharField(
+        max_length=12,
+        choices=ResultadoFiltro.choices,
+        null=True,
+        blank=True,
+        help_text="Marca del filtro de ruido GPS; vacío si la lectura se aceptó tal cual."
+    )
     ruta = models.ForeignKey(
         "rutas.Ruta",
         on_delete=models.SET_NULL,
@@ -36,11 +51,33 @@ class Posicion(models.Model):
         blank=True,
         related_name="posiciones"
     )
+    trayecto = models.ForeignKey(
+        "gps.Trayecto",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,
+        related_name="posiciones",
+        help_text="Trayecto abierto de la ruta al registrar la posición (solo vehículos)."
+    )
+
+    # Ajuste al trazado de la ruta (map-matching), solo vehículos
+    latitud_ajustada = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitud_ajustada = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    distancia_ruta_m = models.FloatField(null=True, blank=True, help_text="Distancia recorrida a lo largo de la ruta (m).")
+    segmento_ruta = models.PositiveIntegerField(null=True, blank=True, help_text="Índice del segmento del trazado.")
 
     class Meta:
         ordering = ["-timestamp"]
         verbose_name = "Posición GPS"
         verbose_name_plural = "Posiciones GPS"
+        indexes = [
+            # (timestamp, id): orden total para la paginación por cursor
+            models.Index(fields=["timestamp", "id"], name="gps_posicion_ts_id_idx"),
+            models.Index(fields=["ruta", "timestamp", "id"], name="gps_posicion_ruta_ts_id_idx"),
+            models.Index(fields=["origen_id", "timestamp"], name="gps_posicion_origen_ts_idx"),
+            models.Index(fields=["trayecto", "timestamp"], name="gps_posicion_trayecto_ts_idx"),
+        ]
 
     def __str__(self):
         return f"{self.origen_tipo} @ {self.latitud}, {self.longitud} ({self.estado})"
@@ -53,6 +90,57 @@ class Posicion(models.Model):
         return (timezone.now() - self.timestamp).total_seconds() < 300
 
 
+class UltimaPosicion(models.Model):
+    """
+    Última posición conocida de cada origen (una fila por usuario o vehículo).
+    Se actualiza en cada ingesta para responder "dónde está X ahora" sin
+    recorrer la tabla histórica de posiciones.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    origen_tipo = models.CharField(max_length=20, choices=TipoOrigen.choices)
+    origen_id = models.UUIDField(help_text="UUID del usuario o vehículo asociado.")
+    posicion = models.ForeignKey(
+        "gps.Posicion",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+    latitud = models.DecimalField(max_digits=9, decimal_places=6)
+    longitud = models.DecimalField(max_digits=9, decimal_places=6)
+    precision = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    estado = models.CharField(max_length=20, choices=EstadoPosicion.choices, default=EstadoPosicion.ACTIVA)
+    timestamp = models.DateTimeField()
+    ruta = models.ForeignKey(
+        "rutas.Ruta",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="ultimas_posiciones"
+    )
+    distancia_ruta_m = models.FloatField(null=True, blank=True, help_text="Distancia recorrida a lo largo de la ruta (m).")
+    segmento_ruta = models.PositiveIntegerField(null=True, blank=True)
+    actualizada_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-timestamp"]
+        verbose_name = "Última posición GPS"
+        verbose_name_plural = "Últimas posiciones GPS"
+        constraints = [
+            models.UniqueConstraint(fields=["origen_tipo", "origen_id"], name="gps_ultima_posicion_por_origen"),
+        ]
+        indexes = [
+            models.Index(fields=["origen_tipo", "-timestamp"], name="gps_ultima_tipo_ts_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.origen_tipo} {self.origen_id} @ {self.latitud}, {self.longitud}"
+
+    def es_activa(self):
+        """Indica si la posición aún está dentro de un rango válido (menos de 5 minutos)."""
+        return (timezone.now() - self.timestamp).total_seconds() < 300
+
+
 class Trayecto(models.Model):
     """
     Agrupa una secuencia de posiciones GPS para un recorrido completo (una ejecución de la ruta).
@@ -70,17 +158,93 @@ class Trayecto(models.Model):
     distancia_recorrida_km = models.DecimalField(max_digits=6, decimal_places=2, blank=True, null=True)
     duracion_total = models.DurationField(blank=True, null=True)
     finalizado = models.BooleanField(default=False)
+    simplificado = models.BooleanField(default=False, help_text="Indica si sus posiciones ya fueron submuestreadas por retención.")
+    tiempos_agregados = models.BooleanField(default=False, help_text="Indica si sus tiempos entre paradas ya se sumaron al histórico.")
+    sin_senal_desde = models.DateTimeField(blank=True, null=True, help_text="Inicio del episodio actual sin señal (lo marca el vigilante).")
+    vehiculo_id = models.UUIDField(
+        blank=True, null=True, db_index=True,
+        help_text="Bus del trayecto (origen_id de sus posiciones); si se inició sin él, lo toma el primer bus que reporta.",
+    )
+
+    # Métricas acumuladas en línea con cada posición del vehículo
+    posiciones_registradas = models.PositiveIntegerField(default=0)
+    distancia_acumulada_m = models.FloatField(default=0, help_text="Distancia recorrida según las posiciones (m).")
+    velocidad_maxima_kmh = models.FloatField(default=0)
+    velocidad_promedio_kmh = models.FloatField(default=0)
+    primera_posicion_en = models.DateTimeField(blank=True, null=True)
+    ultima_posicion_en = models.DateTimeField(blank=True, null=True)
+    ultima_latitud = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
+    ultima_longitud = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
+
+    CAMPOS_METRICAS = [
+        "posiciones_registradas", "distancia_acumulada_m", "distancia_recorrida_km",
+        "velocidad_maxima_kmh", "velocidad_promedio_kmh", "primera_posicion_en",
+        "ultima_posicion_en", "ultima_latitud", "ultima_longitud",
+    ]
 
     class Meta:
         ordering = ["-fecha_inicio"]
         verbose_name = "Trayecto GPS"
         verbose_name_plural = "Trayectos GPS"
+        indexes = [
+            models.Index(fields=["fecha_inicio", "id"], name="gps_trayecto_inicio_id_idx"),
+            models.Index(fields=["finalizado", "fecha_inicio", "id"], name="gps_trayecto_fin_inicio_idx"),
+        ]
 
     def __str__(self):
         return f"Trayecto de {self.ruta.nombre} ({self.fecha_inicio.strftime('%Y-%m-%d %H:%M')})"
 
+    def posiciones_del_recorrido(self):
+        """
+        Posiciones del vehículo durante el trayecto: las vinculadas por FK o,
+        en datos anteriores al vínculo, las de la ruta (y del bus, si se
+        conoce) entre inicio y fin.
+        """
+        posiciones = self.posiciones.all()
+        if posiciones.exists():
+            return posiciones
+        rango = Posicion.objects.filter(
+            origen_tipo=TipoOrigen.VEHICULO, ruta_id=self.ruta_id, timestamp__gte=self.fecha_inicio
+        ).exclude(filtro=ResultadoFiltro.DESCARTADA)
+        if self.vehiculo_id is not None:
+            rango = rango.filter(origen_id=self.vehiculo_id)
+        if self.fecha_fin is not None:
+            rango = rango.filter(timestamp__lte=self.fecha_fin)
+        return rango
+
+    def acumular(self, latitud, longitud, timestamp):
+        """
+        Suma una posición a las métricas en O(1). Las posiciones anteriores a
+        la última registrada se ignoran (llegan fuera de orden).
+        """
+        if self.ultima_posicion_en is not None:
+            if timestamp <= self.ultima_posicion_en:
+                return False
+            tramo = calcular_distancia(
+                float(self.ultima_latitud), float(self.ultima_longitud), float(latitud), float(longitud)
+            )
+            segundos = (timestamp - self.ultima_posicion_en).total_seconds()
+            self.distancia_acumulada_m += tramo
+            self.velocidad_maxima_kmh = max(self.velocidad_maxima_kmh, tramo / segundos * 3.6)
+        else:
+            self.primera_posicion_en = timestamp
+
+        self.posiciones_registradas += 1
+        self.ultima_latitud = latitud
+        self.ultima_longitud = longitud
+        self.ultima_posicion_en = timestamp
+
+        segundos_totales = (timestamp - self.primera_posicion_en).total_seconds()
+        if segundos_totales > 0:
+            self.velocidad_promedio_kmh = self.distancia_acumulada_m / segundos_totales * 3.6
+        self.distancia_recorrida_km = Decimal(self.distancia_acumulada_m / 1000).quantize(Decimal("0.01"))
+        return True
+
     def finalizar(self, distancia_km=None):
-        """Marca el trayecto como finalizado y calcula duración."""
+        """
+        Marca el trayecto como finalizado y calcula duración. Sin `distancia_km`
+        se conserva la distancia acumulada con las posiciones.
+        """
         self.fecha_fin = timezone.now()
         self.finalizado = True
         if distancia_km:
@@ -90,6 +254,75 @@ class Trayecto(models.Model):
         self.save(update_fields=["fecha_fin", "finalizado", "distancia_recorrida_km", "duracion_total"])
 
 
+class EstadoTarea(models.TextChoices):
+    PENDIENTE = "PENDIENTE", "Pendiente"
+    PROCESANDO = "PROCESANDO", "Procesando"
+    COMPLETADA = "COMPLETADA", "Completada"
+    ERROR = "ERROR", "Error"
+
+
+class TareaPosicion(models.Model):
+    """
+    Cola persistente de posiciones pendientes de análisis (desvíos, alertas, cupos).
+    La consumen los trabajadores de `procesar_cola_gps`.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    posicion = models.ForeignKey("gps.Posicion", on_delete=models.CASCADE, related_name="tareas")
+    estado = models.CharField(max_length=20, choices=EstadoTarea.choices, default=EstadoTarea.PENDIENTE)
+    intentos = models.PositiveIntegerField(default=0)
+    reclamo = models.UUIDField(null=True, blank=True, help_text="Identificador del lote que tomó la tarea.")
+    creada_en = models.DateTimeField(default=timezone.now)
+    tomada_en = models.DateTimeField(blank=True, null=True)
+    terminada_en = models.DateTimeField(blank=True, null=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["creada_en"]
+        verbose_name = "Tarea de procesamiento GPS"
+        verbose_name_plural = "Tareas de procesamiento GPS"
+        indexes = [
+            models.Index(fields=["estado", "creada_en"], name="gps_tarea_estado_idx"),
+            models.Index(fields=["reclamo"], name="gps_tarea_reclamo_idx"),
+        ]
+
+    def __str__(self):
+        return f"Tarea {self.posicion_id} ({self.estado})"
+
+
+class TiempoTramoHistorico(models.Model):
+    """
+    Tiempo de viaje observado entre dos paradas consecutivas de una ruta,
+    agregado por día de la semana y hora de paso por la parada de origen.
+    Los percentiles se mantienen en línea (P²) con el estado en `estado_percentiles`.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    ruta = models.ForeignKey("rutas.Ruta", on_delete=models.CASCADE, related_name="tiempos_tramo")
+    parada_origen = models.ForeignKey("paradas.Parada", on_delete=models.CASCADE, related_name="+")
+    parada_destino = models.ForeignKey("paradas.Parada", on_delete=models.CASCADE, related_name="+")
+    dia_semana = models.PositiveSmallIntegerField(help_text="0 = lunes … 6 = domingo.")
+    hora = models.PositiveSmallIntegerField(help_text="Hora local (0-23) de salida de la parada de origen.")
+    muestras = models.PositiveIntegerField(default=0)
+    media_segundos = models.FloatField(default=0)
+    p50_segundos = models.FloatField(null=True, blank=True)
+    p90_segundos = models.FloatField(null=True, blank=True)
+    estado_percentiles = models.JSONField(default=dict, blank=True)
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["ruta", "dia_semana", "hora"]
+        verbose_name = "Tiempo histórico de tramo"
+        verbose_name_plural = "Tiempos históricos de tramo"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ruta", "parada_origen", "parada_destino", "dia_semana", "hora"],
+                name="gps_tiempo_tramo_unico",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.ruta_id} {self.parada_origen_id}→{self.parada_destino_id} ({self.dia_semana}, {self.hora}h)"
+
+
 class AlertaGPS(models.Model):
     """
     Registra eventos o alertas asociadas al sistema de geolocalización.
@@ -101,6 +334,10 @@ class AlertaGPS(models.Model):
     descripcion = models.TextField(blank=True)
     detectada_en = models.DateTimeField(default=timezone.now)
     posicion = models.ForeignKey("gps.Posicion", on_delete=models.SET_NULL, null=True, blank=True, related_name="alertas")
+    # Detecciones repetidas del mismo episodio se suman sobre la alerta abierta
+    ocurrencias = models.PositiveIntegerField(default=1)
+    ultima_deteccion_en = models.DateTimeField(blank=True, null=True)
+    distancia_maxima_m = models.FloatField(blank=True, null=True, help_text="Mayor distancia registrada en el episodio (m).")
     resuelta = models.BooleanField(default=False)
     resuelta_en = models.DateTimeField(blank=True, null=True)
     resuelta_por = models.ForeignKey(
@@ -115,6 +352,15 @@ class AlertaGPS(models.Model):
         ordering = ["-detectada_en"]
         verbose_name = "Alerta GPS"
         verbose_name_plural = "Alertas GPS"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ruta", "tipo"], condition=models.Q(resuelta=False), name="gps_alerta_abierta_unica"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["detectada_en", "id"], name="gps_alerta_ts_id_idx"),
+            models.Index(fields=["resuelta", "detectada_en", "id"], name="gps_alerta_resuelta_ts_idx"),
+        ]
 
     def __str__(self):
         return f"Alerta: {self.tipo} ({'Resuelta' if self.resuelta else 'Activa'})"
@@ -126,3 +372,57 @@ class AlertaGPS(models.Model):
         if usuario:
             self.resuelta_por = usuario
         self.save(update_fields=["resuelta", "resuelta_en", "resuelta_por"])
+
+
+class TipoEventoZona(models.TextChoices):
+    ENTRADA = "ENTRADA", "Entrada"
+    SALIDA = "SALIDA", "Salida"
+
+
+class EventoZona(models.Model):
+    """Entrada o salida de un usuario o vehículo de una zona con geocerca (polígono)."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    zona = models.ForeignKey("paradas.ZonaParada", on_delete=models.CASCADE, related_name="eventos_gps")
+    origen_tipo = models.CharField(max_length=20, choices=TipoOrigen.choices)
+    origen_id = models.UUIDField()
+    tipo = models.CharField(max_length=10, choices=TipoEventoZona.choices)
+    timestamp = models.DateTimeField()
+    posicion = models.ForeignKey("gps.Posicion", on_delete=models.SET_NULL, null=True, blank=True, related_name="eventos_zona")
+
+    class Meta:
+        ordering = ["-timestamp"]
+        verbose_name = "Evento de zona"
+        verbose_name_plural = "Eventos de zona"
+        indexes = [
+            models.Index(fields=["timestamp", "id"], name="gps_evento_zona_ts_id_idx"),
+            models.Index(fields=["zona", "timestamp", "id"], name="gps_evento_zona_zona_ts_idx"),
+            models.Index(fields=["origen_id", "timestamp"], name="gps_evento_zona_origen_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} {self.origen_tipo} {self.origen_id} @ {self.zona_id}"
+
+
+class PresenciaZona(models.Model):
+    """
+    Quién está dentro de cada zona ahora: una fila por (zona, origen), creada
+    al entrar y eliminada al salir. La ocupación es un conteo agrupado.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    zona = models.ForeignKey("paradas.ZonaParada", on_delete=models.CASCADE, related_name="presencias_gps")
+    origen_tipo = models.CharField(max_length=20, choices=TipoOrigen.choices)
+    origen_id = models.UUIDField()
+    desde = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Presencia en zona"
+        verbose_name_plural = "Presencias en zonas"
+        constraints = [
+            models.UniqueConstraint(fields=["zona", "origen_tipo", "origen_id"], name="gps_presencia_zona_unica"),
+        ]
+        indexes = [
+            models.Index(fields=["origen_id"], name="gps_presencia_origen_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.origen_tipo} {self.origen_id} en {self.zona_id}"
@@ -0,0 +1,346 @@
+# gps/nmea.py
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .cola import PROCESAMIENTO_ASINCRONO
+from .ingest import LOTE_MAX_POSICIONES, guardar_posiciones
+from .procesamiento import procesar_posiciones
+from .models import Posicion, TipoOrigen
+
+logger = logging.getLogger(__name__)
+
+# Segundos entre envíos de lotes a la ingesta (o antes, si el lote se llena).
+INTERVALO_S = getattr(settings, "GPS_NMEA_INTERVALO_S", 1.0)
+# Fijos en memoria a la espera de la base de datos; por encima se descartan.
+MAX_PENDIENTES = getattr(settings, "GPS_NMEA_MAX_PENDIENTES", 50000)
+# Recarga del mapa dispositivo → bus/ruta.
+REFRESCO_DISPOSITIVOS_S = getattr(settings, "GPS_NMEA_REFRESCO_DISPOSITIVOS_S", 60)
+# Conexiones TCP sin datos durante este lapso se cierran.
+INACTIVIDAD_S = getattr(settings, "GPS_NMEA_INACTIVIDAD_S", 300)
+# Error equivalente al rango (m) para convertir HDOP en precisión.
+UERE_M = getattr(settings, "GPS_NMEA_UERE_M", 5)
+MAX_SESIONES_UDP = getattr(settings, "GPS_NMEA_MAX_SESIONES_UDP", 20000)
+
+# Las sentencias NMEA no superan 82 caracteres; se deja margen para la identificación.
+LARGO_MAX_LINEA = 256
+# Sentencia propietaria con la que la unidad se identifica: $PDID,<dispositivo>*hh
+IDENTIFICACION = "PDID"
+PRECISION_MAX_M = Decimal("999.99")
+
+
+class SentenciaInvalida(ValueError):
+    pass
+
+
+def separar(linea):
+    """Valida el checksum (si viene) y devuelve los campos de la sentencia sin '$'."""
+    linea = linea.strip()
+    if not linea.startswith("$"):
+        raise SentenciaInvalida("La sentencia no empieza con '$'.")
+    cuerpo, _, checksum = linea[1:].partition("*")
+    if checksum:
+        calculado = 0
+        for caracter in cuerpo.encode("ascii", "replace"):
+            calculado ^= caracter
+        try:
+            esperado = int(checksum[:2], 16)
+        except ValueError:
+            raise SentenciaInvalida("Checksum ilegible.")
+        if calculado != esperado:
+            raise SentenciaInvalida("Checksum incorrecto.")
+    return cuerpo.split(",")
+
+
+def _coordenada(valor, hemisferio, grados_digitos):
+    """ddmm.mmmm / dddmm.mmmm → grados decimales."""
+    if not valor or hemisferio not in ("N", "S", "E", "W"):
+        raise SentenciaInvalida("Coordenada incompleta.")
+    grados = int(valor[:grados_digitos])
+    minutos = float(valor[grados_digitos:])
+    decimal = grados + minutos / 60
+    return -decimal if hemisferio in ("S", "W") else decimal
+
+
+def _hora(valor):
+    return int(valor[0:2]), int(valor[2:4]), int(valor[4:6]), int(round(float(valor[6:] or 0) * 1_000_000))
+
+
+class SesionNMEA:
+    """
+    Estado de una unidad conectada: dispositivo identificado, última fecha
+    de $xxRMC (la $xxGGA solo trae la hora) y último HDOP para la precisión.
+    Se aceptan todos los talkers (GP, GN, GL...).
+    """
+    __slots__ = ("dispositivo", "fecha", "hdop", "con_rmc")
+
+    def __init__(self, dispositivo=None):
+        self.dispositivo = dispositivo
+        self.fecha = None
+        self.hdop = None
+        self.con_rmc = False
+
+    def procesar(self, linea):
+        """
+        Devuelve (timestamp, latitud, longitud, precision_m) si la línea es un
+        fijo válido; None si no aporta posición. Lanza SentenciaInvalida.
+        """
+        campos = separar(linea)
+        tipo = campos[0]
+        if tipo == IDENTIFICACION:
+            if len(campos) < 2 or not campos[1]:
+                raise SentenciaInvalida("Identificación sin dispositivo.")
+            self.dispositivo = campos[1]
+            return None
+        if len(tipo) != 5:
+            return None
+        try:
+            if tipo.endswith("RMC") and len(campos) >= 10:
+                return self._rmc(campos)
+            if tipo.endswith("GGA") and len(campos) >= 9:
+                return self._gga(campos)
+        except (ValueError, IndexError) as exc:
+            raise SentenciaInvalida(str(exc))
+        return None
+
+    def _rmc(self, campos):
+        if campos[2] != "A" or not campos[9]:
+            return None  # "V": receptor sin fijo válido
+        fecha = campos[9]
+        self.fecha = (2000 + int(fecha[4:6]), int(fecha[2:4]), int(fecha[0:2]))
+        self.con_rmc = True
+        return self._fijo(campos[1], campos[3], campos[4], campos[5], campos[6])
+
+    def _gga(self, campos):
+        if not campos[6] or campos[6] == "0":
+            return None
+        if campos[8]:
+            self.hdop = float(campos[8])
+        if self.con_rmc:
+            return None  # la unidad también envía RMC: el fijo sale de allí, con fecha
+        return self._fijo(campos[1], campos[2], campos[3], campos[4], campos[5])
+
+    def _fijo(self, hora, latitud, ns, longitud, ew):
+        horas, minutos, segundos, micro = _hora(hora)
+        anio, mes, dia = self.fecha or datetime.now(dt_timezone.utc).timetuple()[:3]
+        timestamp = datetime(anio, mes, dia, horas, minutos, segundos, micro, tzinfo=dt_timezone.utc)
+        lat = _coordenada(latitud, ns, 2)
+        lon = _coordenada(longitud, ew, 3)
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise SentenciaInvalida("Coordenadas fuera de rango.")
+        precision = None if self.hdop is None else min(Decimal(f"{self.hdop * UERE_M:.2f}"), PRECISION_MAX_M)
+        return timestamp, lat, lon, precision
+
+
+class ReceptorNMEA:
+    """
+    Recibe telemetría NMEA cruda por TCP y UDP con asyncio: un solo proceso
+    atiende miles de unidades. Los fijos se acumulan en memoria y un único
+    hilo de base de datos los entrega por lotes a la misma ingesta que la API
+    (banda muerta, última posición, difusión y análisis), sin una petición
+    por sentencia. Las unidades se identifican con $PDID,<dispositivo> al
+    conectarse (TCP) o al inicio de cada datagrama (UDP).
+    """
+
+    def __init__(self, lote=LOTE_MAX_POSICIONES, intervalo=INTERVALO_S, diferido=PROCESAMIENTO_ASINCRONO,
+                 max_pendientes=MAX_PENDIENTES, inactividad=INACTIVIDAD_S):
+        self.lote = lote
+        self.intervalo = intervalo
+        self.diferido = diferido
+        self.max_pendientes = max_pendientes
+        self.inactividad = inactividad
+        self.dispositivos = {}
+        self._pendientes = []
+        self._sesiones_udp = OrderedDict()
+        self._lleno = None
+        self._db = ThreadPoolExecutor(1, thread_name_prefix="gps-nmea")
+        self._lock = threading.Lock()
+        self._metricas = dict.fromkeys(
+            ("conexiones", "sentencias", "invalidas", "sin_dispositivo", "fijos", "perdidos", "creadas",
+             "descartadas", "lotes", "errores", "errores_analisis"), 0
+        )
+
+    # --- Base de datos (siempre en el hilo dedicado) ---
+
+    def cargar_dispositivos(self):
+        """{dispositivo_id: (bus_id, ruta_id)} con la ruta activa más reciente de cada bus. Dos consultas."""
+        from rutas.models import Bus, BusRuta
+
+        close_old_connections()
+        buses = dict(
+            Bus.objects.filter(activo=True, dispositivo_id__isnull=False).values_list("id", "dispositivo_id")
+        )
+        rutas = {}
+        for bus_id, ruta_id in BusRuta.objects.filter(bus_id__in=list(buses), activo=True).order_by(
+            "fecha_asignacion"
+        ).values_list("bus_id", "ruta_id"):
+            rutas[bus_id] = ruta_id
+        self.dispositivos = {dispositivo: (bus_id, rutas.get(bus_id)) for bus_id, dispositivo in buses.items()}
+        return len(self.dispositivos)
+
+    def vaciar(self):
+        """
+        Entrega lo pendiente a la ingesta en lotes de `lote` posiciones. Un
+        lote que no se pudo guardar (base de datos caída) vuelve al inicio de
+        la espera, dentro de `max_pendientes`; lo que no cabe se cuenta como
+        perdido. Un lote ya guardado cuyo análisis falla no se reintenta: se
+        duplicarían las posiciones.
+        """
+        with self._lock:
+            pendientes, self._pendientes = self._pendientes, []
+        if not pendientes:
+            return 0
+        close_old_connections()
+        fallidas = []
+        for inicio in range(0, len(pendientes), self.lote):
+            lote = pendientes[inicio:inicio + self.lote]
+            try:
+                creadas, descartadas = guardar_posiciones(lote, diferido=self.diferido)
+            except Exception:
+                logger.exception("No se pudo guardar un lote NMEA de %s posiciones", len(lote))
+                fallidas.extend(lote)
+                self._sumar(errores=1)
+                continue
+            self._sumar(creadas=len(creadas), descartadas=len(descartadas), lotes=1)
+            if creadas and not self.diferido:
+                try:
+                    procesar_posiciones(creadas)
+                except Exception:
+                    logger.exception("Falló el análisis de un lote NMEA ya guardado (%s posiciones)", len(creadas))
+                    self._sumar(errores_analisis=1)
+        if fallidas:
+            with self._lock:
+                cupo = max(self.max_pendientes - len(self._pendientes), 0)
+                self._pendientes[:0] = fallidas[:cupo]
+                self._metricas["perdidos"] += len(fallidas) - min(cupo, len(fallidas))
+        return len(pendientes) - len(fallidas)
+
+    # --- Recepción ---
+
+    def recibir(self, sesion, linea):
+        """Procesa una línea de una unidad; encola el fijo si lo hay."""
+        self._sumar(sentencias=1)
+        try:
+            fijo = sesion.procesar(linea)
+        except SentenciaInvalida:
+            self._sumar(invalidas=1)
+            return
+        if fijo is None:
+            return
+        destino = self.dispositivos.get(sesion.dispositivo)
+        if destino is None:
+            self._sumar(sin_dispositivo=1)
+            return
+        timestamp, lat, lon, precision = fijo
+        bus_id, ruta_id = destino
+        posicion = Posicion(
+            origen_tipo=TipoOrigen.VEHICULO,
+            origen_id=bus_id,
+            ruta_id=ruta_id,
+            latitud=Decimal(f"{lat:.6f}"),
+            longitud=Decimal(f"{lon:.6f}"),
+            precision=precision,
+            timestamp=timestamp,
+        )
+        with self._lock:
+            if len(self._pendientes) >= self.max_pendientes:
+                self._metricas["perdidos"] += 1
+                return
+            self._pendientes.append(posicion)
+            lleno = len(self._pendientes) >= self.lote
+            self._metricas["fijos"] += 1
+        if lleno and self._lleno is not None:
+            self._lleno.set()
+
+    async def atender_tcp(self, reader, writer):
+        self._sumar(conexiones=1)
+        sesion = SesionNMEA()
+        try:
+            while True:
+                linea = await asyncio.wait_for(reader.readline(), self.inactividad)
+                if not linea:
+                    break
+                self.recibir(sesion, linea.decode("ascii", "replace"))
+        except (asyncio.TimeoutError, asyncio.LimitOverrunError, ValueError, ConnectionError):
+            pass  # inactiva, línea desmedida o conexión caída: se cierra
+        finally:
+            writer.close()
+
+    def recibir_datagrama(self, datos, direccion):
+        sesion = self._sesiones_udp.get(direccion)
+        if sesion is None:
+            sesion = self._sesiones_udp[direccion] = SesionNMEA()
+            while len(self._sesiones_udp) > MAX_SESIONES_UDP:
+                self._sesiones_udp.popitem(last=False)
+        else:
+            self._sesiones_udp.move_to_end(direccion)
+        for linea in datos.decode("ascii", "replace").splitlines():
+            if linea and len(linea) <= LARGO_MAX_LINEA:
+                self.recibir(sesion, linea)
+
+    # --- Bucle principal ---
+
+    async def servir(self, host="0.0.0.0", puerto_tcp=None, puerto_udp=None, listo=None):
+        loop = asyncio.get_running_loop()
+        self._lleno = asyncio.Event()
+        await loop.run_in_executor(self._db, self.cargar_dispositivos)
+
+        servidores = []
+        if puerto_tcp is not None:
+            servidores.append(await asyncio.start_server(self.atender_tcp, host, puerto_tcp, limit=LARGO_MAX_LINEA))
+        if puerto_udp is not None:
+            transporte, _ = await loop.create_datagram_endpoint(
+                lambda: _ProtocoloUDP(self), local_addr=(host, puerto_udp)
+            )
+            servidores.append(transporte)
+        if listo is not None:
+            listo(servidores)
+
+        recarga = time.monotonic()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._lleno.wait(), self.intervalo)
+                except asyncio.TimeoutError:
+                    pass
+                self._lleno.clear()
+                await loop.run_in_executor(self._db, self.vaciar)
+                if time.monotonic() - recarga >= REFRESCO_DISPOSITIVOS_S:
+                    try:
+                        await loop.run_in_executor(self._db, self.cargar_dispositivos)
+                    except Exception:
+                        logger.exception("No se pudo recargar el mapa de dispositivos NMEA; se mantiene el anterior")
+                    recarga = time.monotonic()
+        finally:
+            for servidor in servidores:
+                servidor.close()
+            await loop.run_in_executor(self._db, self.vaciar)
+
+    def cerrar(self):
+        self._db.shutdown(wait=True)
+
+    def _sumar(self, **cantidades):
+        with self._lock:
+            for clave, cantidad in cantidades.items():
+                self._metricas[clave] += cantidad
+
+    def resumen(self):
+        with self._lock:
+            return dict(self._metricas, pendientes=len(self._pendientes), dispositivos=len(self.dispositivos))
+
+
+class _ProtocoloUDP(asyncio.DatagramProtocol):
+    def __init__(self, receptor):
+        self.receptor = receptor
+
+    def datagram_received(self, datos, direccion):
+        self.receptor.recibir_datagrama(datos, direccion)
@@ -0,0 +1,74 @@
+# gps/percentiles.py
+
+import math
+
+
+class P2Cuantil:
+    """
+    Estimación en línea de un cuantil con el algoritmo P² (Jain y Chlamtac):
+    cinco marcadores, memoria constante y sin guardar las observaciones.
+    El estado es serializable para persistirlo entre ejecuciones.
+    """
+
+    def __init__(self, p, estado=None):
+        self.p = p
+        self.dn = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+        if estado:
+            self.q = list(estado["q"])
+            self.n = list(estado["n"])
+            self.np = list(estado["np"])
+            self.iniciales = list(estado.get("iniciales", []))
+        else:
+            self.q, self.n, self.np, self.iniciales = [], [], [], []
+
+    def estado(self):
+        return {"q": self.q, "n": self.n, "np": self.np, "iniciales": self.iniciales}
+
+    def agregar(self, x):
+        if not self.q:
+            self.iniciales.append(x)
+            if len(self.iniciales) == 5:
+                p = self.p
+                self.q = sorted(self.iniciales)
+                self.n = [1, 2, 3, 4, 5]
+                self.np = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+                self.iniciales = []
+            return
+
+        q, n = self.q, self.n
+        if x < q[0]:
+            q[0], k = x, 0
+        elif x >= q[4]:
+            q[4], k = x, 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.np[i] += self.dn[i]
+
+        for i in (1, 2, 3):
+            d = self.np[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidato = self._parabolico(i, d)
+                if not q[i - 1] < candidato < q[i + 1]:
+                    candidato = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = candidato
+                n[i] += d
+
+    def _parabolico(self, i, d):
+        q, n = self.q, self.n
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def valor(self):
+        if self.q:
+            return self.q[2]
+        if not self.iniciales:
+            return None
+        # Con menos de cinco observaciones, cuantil exacto (rango más cercano)
+        ordenadas = sorted(self.iniciales)
+        return ordenadas[max(math.ceil(self.p * len(ordenadas)) - 1, 0)]
@@ -0,0 +1,535 @@
+# gps/procesamiento.py
+
+import logging
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from rutas.models import Desvio
+from .models import (
+    EventoZona, Posicion, PresenciaZona, ResultadoFiltro, TipoEventoZona, TipoOrigen, Trayecto, UltimaPosicion,
+)
+from .ajuste import ajuste_ruta
+from .alertas import coalescedor
+from .eta import motor_eta
+from .filtro import filtro_posiciones, DESCARTADA, SUAVIZADA
+from .geocercas import indice_zonas, TIPO_ALERTA as TIPO_ALERTA_ZONA
+from .geometria import obtener_geometria
+from .indice_paradas import indice_paradas
+from .ultimas import restaurar_ultimas_posiciones
+from .stream import publicar_descartadas
+
+logger = logging.getLogger(__name__)
+
+# Etapas que se ejecutan, en orden, sobre cada lote de posiciones nuevas.
+ETAPAS = getattr(settings, "GPS_ETAPAS_PROCESAMIENTO", [
+    "gps.procesamiento.EtapaFiltro",
+    "gps.procesamiento.EtapaAjuste",
+    "gps.procesamiento.EtapaDesvio",
+    "gps.procesamiento.EtapaAlertas",
+    "gps.procesamiento.EtapaZonas",
+    "gps.procesamiento.EtapaAsistencia",
+    "gps.procesamiento.EtapaTrayecto",
+    "gps.procesamiento.EtapaETA",
+])
+# Umbrales globales; cada ruta puede definir los suyos (Ruta.umbral_desvio_m / umbral_alerta_m).
+UMBRAL_DESVIO_M = getattr(settings, "GPS_UMBRAL_DESVIO_M", 100)
+UMBRAL_ALERTA_M = getattr(settings, "GPS_UMBRAL_ALERTA_M", 300)
+RADIO_ASISTENCIA_M = getattr(settings, "GPS_RADIO_ASISTENCIA_M", 100)
+# Máximo que se descuenta por la precisión reportada: una lectura que declara
+# cientos de metros de error no puede anular cualquier desvío.
+PRECISION_MAX_DESCUENTO_M = getattr(settings, "GPS_PRECISION_MAX_DESCUENTO_M", 50)
+
+
+class ContextoPosicion:
+    """
+    Estado de una posición compartido por las etapas: coordenadas como float,
+    geometría de la ruta y distancia al corredor (calculadas una sola vez).
+    """
+    __slots__ = (
+        "posicion", "lat", "lon", "geometria", "_distancia", "ajuste",
+        "desvio", "distancia_previa", "trayecto",
+    )
+
+    def __init__(self, posicion):
+        self.posicion = posicion
+        self.lat = float(posicion.latitud)
+        self.lon = float(posicion.longitud)
+        self.geometria = obtener_geometria(posicion.ruta_id) if posicion.ruta_id else None
+        self._distancia = None
+        self.ajuste = None
+        self.desvio = None
+        self.distancia_previa = 0.0
+        self.trayecto = None
+
+    @property
+    def es_vehiculo_en_ruta(self):
+        return self.posicion.origen_tipo == TipoOrigen.VEHICULO and bool(self.geometria)
+
+    @property
+    def umbral_desvio(self):
+        return self.geometria.umbral_desvio or UMBRAL_DESVIO_M
+
+    @property
+    def umbral_alerta(self):
+        return self.geometria.umbral_alerta or UMBRAL_ALERTA_M
+
+    @property
+    def distancia(self):
+        """(distancia_m, segmento, t) al corredor de la ruta."""
+        if self._distancia is None:
+            self._distancia = self.geometria.corredor.distancia(self.lat, self.lon, radio=self.umbral_desvio)
+        return self._distancia
+
+    @property
+    def distancia_efectiva(self):
+        """Distancia al corredor descontando el error reportado por el GPS, hasta un tope."""
+        precision = min(float(self.posicion.precision or 0), PRECISION_MAX_DESCUENTO_M)
+        return max(self.distancia[0] - precision, 0.0)
+
+    @property
+    def coordenadas(self):
+        """Punto ajustado al trazado si lo hay; si no, el punto reportado."""
+        if self.ajuste is not None:
+            return self.ajuste[0], self.ajuste[1]
+        return self.lat, self.lon
+
+
+class Etapa:
+    """
+    Paso de la cadena. Recibe todos los contextos del lote, ordenados por
+    timestamp. Si devuelve una lista, las etapas siguientes reciben solo esa.
+    """
+    nombre = None
+
+    def procesar(self, contextos):
+        raise NotImplementedError
+
+
+class EtapaFiltro(Etapa):
+    """
+    Filtra el ruido GPS antes de las demás etapas: las lecturas con saltos
+    imposibles se descartan (no generan desvíos, alertas ni distancia) y las
+    ruidosas siguen con las coordenadas suavizadas. Solo se escriben las
+    marcadas, así que una lectura limpia no cuesta escrituras extra.
+    Al guardarse, la lectura cruda ya se publicó en vivo y pasó a ser la
+    última posición (el análisis puede ir diferido en la cola): por eso una
+    descartada restaura la última posición del origen y se retira del canal.
+    """
+    nombre = "filtro"
+
+    def procesar(self, contextos):
+        aceptados, descartadas, marcadas = [], [], {SUAVIZADA: [], DESCARTADA: []}
+        for contexto in contextos:
+            posicion = contexto.posicion
+            resultado, lat, lon = filtro_posiciones.filtrar(
+                posicion.origen_id, contexto.lat, contexto.lon, posicion.timestamp, posicion.precision
+            )
+            if resultado in marcadas:
+                posicion.filtro = resultado
+                marcadas[resultado].append(posicion.pk)
+            if resultado == DESCARTADA:
+                descartadas.append(posicion)
+                continue
+            contexto.lat, contexto.lon = lat, lon
+            aceptados.append(contexto)
+
+        for resultado, ids in marcadas.items():
+            if ids:
+                Posicion.objects.filter(pk__in=ids).update(filtro=ResultadoFiltro(resultado))
+        if descartadas:
+            # La última posición conocida vuelve a la última lectura válida del origen
+            restaurar_ultimas_posiciones(descartadas)
+            publicar_descartadas(descartadas)
+        return aceptados
+
+
+class EtapaAjuste(Etapa):
+    """
+    Ajusta (map-matching) cada posición de vehículo al trazado de su ruta:
+    punto proyectado, distancia recorrida y segmento. Se guardan en la
+    posición y en la última posición del vehículo.
+    """
+    nombre = "ajuste"
+
+    def procesar(self, contextos):
+        ajustadas, ultimas = [], {}
+        for contexto in contextos:
+            if not contexto.es_vehiculo_en_ruta:
+                continue
+            posicion = contexto.posicion
+            contexto.ajuste = ajuste_ruta.ajustar(posicion, contexto.geometria.corredor, contexto.lat, contexto.lon)
+            if contexto.ajuste is not None:
+                lat, lon, recorrido, segmento, _ = contexto.ajuste
+                posicion.latitud_ajustada = _grados(lat)
+                posicion.longitud_ajustada = _grados(lon)
+                posicion.distancia_ruta_m = round(recorrido, 1)
+                posicion.segmento_ruta = segmento
+                ajustadas.append(posicion)
+            ultimas[posicion.origen_id] = posicion
+
+        if ajustadas:
+            Posicion.objects.bulk_update(
+                ajustadas, ["latitud_ajustada", "longitud_ajustada", "distancia_ruta_m", "segmento_ruta"]
+            )
+        # El filtro por posición evita pisar una última posición más reciente
+        for origen_id, posicion in ultimas.items():
+            UltimaPosicion.objects.filter(
+                origen_tipo=TipoOrigen.VEHICULO, origen_id=origen_id, posicion_id=posicion.pk
+            ).update(distancia_ruta_m=posicion.distancia_ruta_m, segmento_ruta=posicion.segmento_ruta)
+
+
+class EtapaDesvio(Etapa):
+    """
+    Mantiene un único desvío activo por ruta: lo abre al superar el umbral,
+    actualiza su distancia máxima y lo cierra al volver al corredor.
+    """
+    nombre = "desvio"
+
+    def procesar(self, contextos):
+        vehiculos = [c for c in contextos if c.es_vehiculo_en_ruta]
+        if not vehiculos:
+            return
+        activos = {
+            d.ruta_id: d
+            for d in Desvio.objects.filter(ruta_id__in={c.posicion.ruta_id for c in vehiculos}, activo=True)
+        }
+        modificados = {}
+
+        for contexto in vehiculos:
+            ruta_id = contexto.posicion.ruta_id
+            distancia = contexto.distancia_efectiva
+            desvio = activos.get(ruta_id)
+
+            if distancia > contexto.umbral_desvio:
+                if desvio is None:
+                    desvio = Desvio.objects.create(
+                        ruta_id=ruta_id,
+                        distancia_desviacion=_metros(distancia),
+                        descripcion=f"Desvío detectado automáticamente ({int(distancia)} m fuera del trazado).",
+                        detectado_automaticamente=True,
+                    )
+                    activos[ruta_id] = desvio
+                else:
+                    contexto.distancia_previa = float(desvio.distancia_desviacion)
+                    if distancia > contexto.distancia_previa:
+                        desvio.distancia_desviacion = _metros(distancia)
+                        modificados[ruta_id] = desvio
+                contexto.desvio = desvio
+            elif desvio is not None:
+                desvio.fin = timezone.now()
+                desvio.activo = False
+                desvio.save(update_fields=["fin", "activo", "distancia_desviacion"])
+                modificados.pop(ruta_id, None)
+                del activos[ruta_id]
+
+        for desvio in modificados.values():
+            desvio.save(update_fields=["distancia_desviacion"])
+
+
+class EtapaAlertas(Etapa):
+    """
+    Alerta DESVIO coalescida: una sola alerta abierta por ruta y episodio,
+    que suma ocurrencias y distancia máxima mientras el bus siga más allá del
+    umbral de alerta y se cierra cuando el desvío termina. Las detecciones de
+    un lote se agrupan por ruta en una sola escritura.
+    """
+    nombre = "alertas"
+    tipo = "DESVIO"
+
+    def procesar(self, contextos):
+        pendientes = {}
+        for contexto in contextos:
+            if not contexto.es_vehiculo_en_ruta:
+                continue
+            ruta_id = contexto.posicion.ruta_id
+            if contexto.desvio is None:
+                # Volvió al corredor: se registra lo acumulado y se cierra el episodio
+                self._registrar(ruta_id, pendientes.pop(ruta_id, None))
+                coalescedor.cerrar([ruta_id], self.tipo, contexto.posicion.timestamp)
+                continue
+            distancia = contexto.distancia_efectiva
+            if distancia > contexto.umbral_alerta:
+                actual = pendientes.get(ruta_id)
+                if actual is None:
+                    pendientes[ruta_id] = [contexto, distancia, 1]
+                else:
+                    actual[1] = max(actual[1], distancia)
+                    actual[2] += 1
+        for ruta_id, pendiente in pendientes.items():
+            self._registrar(ruta_id, pendiente)
+
+    def _registrar(self, ruta_id, pendiente):
+        if pendiente is None:
+            return
+        contexto, distancia, cantidad = pendiente
+        coalescedor.registrar(
+            ruta_id,
+            self.tipo,
+            descripcion=f"El bus se alejó {int(contexto.distancia_efectiva)} m de la ruta.",
+            distancia=distancia,
+            posicion=contexto.posicion,
+            momento=contexto.posicion.timestamp,
+            cantidad=cantidad,
+        )
+
+
+class EtapaZonas(Etapa):
+    """
+    Geocercas: ubica las posiciones en las zonas con polígono que las
+    contienen, registra entradas y salidas y mantiene la presencia por zona.
+    Un vehículo con ruta fuera de todas las zonas de sus paradas abre (o
+    suma a) una alerta FUERA_DE_ZONA, que se cierra al volver a una de ellas.
+    """
+    nombre = "zonas"
+
+    def procesar(self, contextos):
+        if not indice_zonas:
+            return
+        contextos = sorted(contextos, key=lambda c: c.posicion.timestamp)
+        dentro_de = indice_zonas.clasificar([c.lat for c in contextos], [c.lon for c in contextos])
+
+        claves = {(c.posicion.origen_tipo, c.posicion.origen_id) for c in contextos}
+        actuales = {clave: set() for clave in claves}
+        for tipo, origen_id, zona_id in PresenciaZona.objects.filter(
+            origen_id__in={clave[1] for clave in claves}
+        ).values_list("origen_tipo", "origen_id", "zona_id"):
+            if (tipo, origen_id) in actuales:
+                actuales[(tipo, origen_id)].add(zona_id)
+        iniciales = {clave: set(zonas) for clave, zonas in actuales.items()}
+
+        eventos, fuera, momentos = [], {}, {}
+        for contexto, zonas in zip(contextos, dentro_de):
+            posicion = contexto.posicion
+            clave = (posicion.origen_tipo, posicion.origen_id)
+            previas = actuales[clave]
+            for zona_id, tipo in [(z, TipoEventoZona.ENTRADA) for z in zonas - previas] + [
+                (z, TipoEventoZona.SALIDA) for z in previas - zonas
+            ]:
+                eventos.append(EventoZona(
+                    zona_id=zona_id, origen_tipo=posicion.origen_tipo, origen_id=posicion.origen_id,
+                    tipo=tipo, timestamp=posicion.timestamp, posicion=posicion,
+                ))
+                if tipo == TipoEventoZona.ENTRADA:
+                    momentos[(clave, zona_id)] = posicion.timestamp
+            actuales[clave] = zonas
+
+            if posicion.origen_tipo == TipoOrigen.VEHICULO and posicion.ruta_id:
+                zonas_ruta = indice_zonas.zonas_ruta(posicion.ruta_id)
+                if zonas_ruta:
+                    pendiente = fuera.setdefault(posicion.ruta_id, [None, 0])
+                    if zonas & zonas_ruta:
+                        pendiente[0] = None
+                    else:
+                        pendiente[0] = contexto
+                        pendiente[1] += 1
+
+        if eventos:
+            self._guardar_presencias(iniciales, actuales, momentos)
+            EventoZona.objects.bulk_create(eventos)
+
+        for ruta_id, (contexto, cantidad) in fuera.items():
+            if contexto is None:
+                coalescedor.cerrar([ruta_id], TIPO_ALERTA_ZONA)
+            else:
+                coalescedor.registrar(
+                    ruta_id,
+                    TIPO_ALERTA_ZONA,
+                    descripcion="El bus salió de las zonas de su ruta.",
+                    posicion=contexto.posicion,
+                    momento=contexto.posicion.timestamp,
+                    cantidad=cantidad,
+                )
+
+    @staticmethod
+    def _guardar_presencias(iniciales, actuales, momentos):
+        salidas, entradas = Q(pk__in=[]), []
+        for clave, zonas in actuales.items():
+            tipo, origen_id = clave
+            retiradas = iniciales[clave] - zonas
+            if retiradas:
+                salidas |= Q(origen_tipo=tipo, origen_id=origen_id, zona_id__in=retiradas)
+            entradas.extend(
+                PresenciaZona(zona_id=zona_id, origen_tipo=tipo, origen_id=origen_id, desde=momentos[(clave, zona_id)])
+                for zona_id in zonas - iniciales[clave]
+            )
+        with transaction.atomic():
+            PresenciaZona.objects.filter(salidas).delete()
+            PresenciaZona.objects.bulk_create(entradas, ignore_conflicts=True)
+
+
+class EtapaAsistencia(Etapa):
+    """
+    Confirma los cupos reservados de los usuarios que estuvieron cerca de una
+    parada activa de la ruta del cupo. Consulta los cupos una sola vez por lote.
+    """
+    nombre = "asistencia"
+
+    def procesar(self, contextos):
+        from cupos.models import Cupo, EstadoCupo
+
+        por_usuario = {}
+        for contexto in contextos:
+            if contexto.posicion.origen_tipo == TipoOrigen.USUARIO:
+                por_usuario.setdefault(contexto.posicion.origen_id, []).append(contexto)
+        if not por_usuario:
+            return
+
+        cupos = {}
+        for cupo in Cupo.objects.filter(
+            usuario_id__in=list(por_usuario),
+            activo=True,
+            estado=EstadoCupo.RESERVADO,
+        ).select_related("usuario"):
+            cupos.setdefault(cupo.usuario_id, []).append(cupo)
+
+        for usuario_id, cupos_usuario in cupos.items():
+            cercanas = {
+                parada_id
+                for c in por_usuario[usuario_id]
+                for parada_id, _ in indice_paradas.cercanas(c.lat, c.lon, RADIO_ASISTENCIA_M)
+            }
+            if not cercanas:
+                continue
+            # El orden por defecto (-creado_en) prioriza el cupo más reciente
+            for cupo in cupos_usuario:
+                if cercanas.intersection(obtener_geometria(cupo.ruta_id).parada_ids):
+                    cupo.marcar_confirmado()
+                    logger.info("Cupo %s confirmado automáticamente para %s", cupo.pk, cupo.usuario)
+                    break
+
+
+class EtapaTrayecto(Etapa):
+    """
+    Asocia las posiciones de cada vehículo a su trayecto abierto en la ruta y
+    actualiza sus métricas acumuladas (distancia, velocidades, última
+    posición). Un trayecto iniciado sin bus lo toma el primer vehículo que
+    reporta; los demás buses de la ruta no se mezclan en él.
+    """
+    nombre = "trayecto"
+
+    def procesar(self, contextos):
+        vehiculos = [
+            c for c in contextos
+            if c.posicion.origen_tipo == TipoOrigen.VEHICULO and c.posicion.ruta_id
+        ]
+        if not vehiculos:
+            return
+
+        with transaction.atomic():
+            # El bloqueo serializa a los trabajadores que acumulan en el mismo trayecto
+            propios, sin_vehiculo = {}, {}
+            for trayecto in Trayecto.objects.select_for_update().filter(
+                ruta_id__in={c.posicion.ruta_id for c in vehiculos}, finalizado=False
+            ).order_by("fecha_inicio"):
+                if trayecto.vehiculo_id is None:
+                    sin_vehiculo.setdefault(trayecto.ruta_id, []).append(trayecto)
+                else:
+                    propios.setdefault((trayecto.ruta_id, trayecto.vehiculo_id), trayecto)
+
+            posiciones_por_trayecto, tomados = {}, set()
+            for contexto in vehiculos:
+                posicion = contexto.posicion
+                clave = (posicion.ruta_id, posicion.origen_id)
+                trayecto = propios.get(clave)
+                if trayecto is None and sin_vehiculo.get(posicion.ruta_id):
+                    trayecto = propios[clave] = sin_vehiculo[posicion.ruta_id].pop(0)
+                    trayecto.vehiculo_id = posicion.origen_id
+                    tomados.add(trayecto)
+                if trayecto is None or posicion.timestamp < trayecto.fecha_inicio:
+                    continue
+                trayecto.acumular(*contexto.coordenadas, posicion.timestamp)
+                contexto.trayecto = trayecto
+                posicion.trayecto_id = trayecto.pk
+                posiciones_por_trayecto.setdefault(trayecto, []).append(posicion.pk)
+
+            # update() evita re-disparar las señales de cierre de trayecto
+            for trayecto, posicion_ids in posiciones_por_trayecto.items():
+                Posicion.objects.filter(id__in=posicion_ids).update(trayecto_id=trayecto.pk)
+                campos = Trayecto.CAMPOS_METRICAS + (["vehiculo_id"] if trayecto in tomados else [])
+                Trayecto.objects.filter(pk=trayecto.pk).update(**{campo: getattr(trayecto, campo) for campo in campos})
+
+
+class EtapaETA(Etapa):
+    """Recalcula la llegada estimada a las paradas restantes de cada vehículo ajustado."""
+    nombre = "eta"
+
+    def procesar(self, contextos):
+        por_vehiculo = {}
+        for contexto in contextos:
+            if contexto.ajuste is None:
+                continue
+            clave = (contexto.posicion.ruta_id, contexto.posicion.origen_id)
+            por_vehiculo.setdefault(clave, (contexto.geometria, []))[1].append(
+                (contexto.ajuste[2], contexto.posicion.timestamp)
+            )
+        for (_, origen_id), (geometria, observaciones) in por_vehiculo.items():
+            motor_eta.actualizar(geometria, origen_id, observaciones)
+
+
+def _metros(distancia):
+    return Decimal(f"{distancia:.3f}")
+
+
+def _grados(valor):
+    return Decimal(f"{valor:.6f}")
+
+
+class CadenaProcesamiento:
+    """Ejecuta las etapas en orden y acumula el tiempo invertido por cada una."""
+
+    def __init__(self, etapas):
+        self.etapas = list(etapas)
+        self._lock = threading.Lock()
+        self._tiempos = {}
+
+    def procesar(self, posiciones):
+        contextos = [ContextoPosicion(p) for p in sorted(posiciones, key=lambda p: p.timestamp)]
+        for etapa in self.etapas:
+            inicio = time.perf_counter()
+            restantes = etapa.procesar(contextos)
+            self._registrar(etapa.nombre, len(contextos), time.perf_counter() - inicio)
+            if restantes is not None:
+                contextos = restantes
+        return contextos
+
+    def _registrar(self, nombre, posiciones, segundos):
+        with self._lock:
+            llamadas, total_posiciones, total = self._tiempos.get(nombre, (0, 0, 0.0))
+            self._tiempos[nombre] = (llamadas + 1, total_posiciones + posiciones, total + segundos)
+
+    def tiempos(self):
+        """Resumen por etapa: llamadas, posiciones, tiempo total y medio por posición (ms)."""
+        with self._lock:
+            return {
+                nombre: {
+                    "llamadas": llamadas,
+                    "posiciones": posiciones,
+                    "total_ms": round(total * 1000, 3),
+                    "por_posicion_ms": round(total * 1000 / posiciones, 4) if posiciones else 0,
+                }
+                for nombre, (llamadas, posiciones, total) in self._tiempos.items()
+            }
+
+
+_cadena = None
+
+
+def obtener_cadena():
+    global _cadena
+    if _cadena is None:
+        _cadena = CadenaProcesamiento(import_string(ruta)() for ruta in ETAPAS)
+    return _cadena
+
+
+def procesar_posiciones(posiciones):
+    """Analiza posiciones recién guardadas con la cadena de etapas configurada."""
+    if posiciones:
+        return obtener_cadena().procesar(posiciones)
+    return []
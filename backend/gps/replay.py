@@ -0,0 +1,153 @@
+# gps/replay.py
+
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+# Filas leídas por viaje al cursor del servidor y filas por bloque enviado.
+CHUNK_CURSOR = getattr(settings, "GPS_REPLAY_CHUNK", 2000)
+FILAS_POR_BLOQUE = 500
+CAMPOS = ["timestamp", "latitud", "longitud", "latitud_ajustada", "longitud_ajustada", "distancia_ruta_m"]
+FORMATOS = {
+    "ndjson": "application/x-ndjson",
+    "compacto": "application/json",
+}
+
+
+def _numero(valor):
+    return float(valor) if valor is not None else None
+
+
+def _consulta(trayecto):
+    return trayecto.posiciones_del_recorrido().order_by("timestamp", "id").values_list(*CAMPOS)
+
+
+class _Submuestreo:
+    """
+    Con `intervalo_s` deja pasar a lo sumo una posición por intervalo.
+    Cada fila: (epoch, lat, lon, lat_aj, lon_aj, recorrido).
+    """
+
+    def __init__(self, intervalo_s=None):
+        self.intervalo_s = intervalo_s
+        self.siguiente = None
+
+    def fila(self, timestamp, *valores):
+        """Devuelve la fila lista para serializar, o None si el submuestreo la omite."""
+        epoch = timestamp.timestamp()
+        if self.intervalo_s:
+            if self.siguiente is not None and epoch < self.siguiente:
+                return None
+            self.siguiente = epoch + self.intervalo_s
+        return (round(epoch, 3), *(_numero(v) for v in valores))
+
+
+def filas_trayecto(trayecto, intervalo_s=None):
+    """Recorre las posiciones del trayecto en orden con un cursor del servidor (sin cargar el trayecto en memoria)."""
+    submuestreo = _Submuestreo(intervalo_s)
+    for valores in _consulta(trayecto).iterator(chunk_size=CHUNK_CURSOR):
+        fila = submuestreo.fila(*valores)
+        if fila is not None:
+            yield fila
+
+
+async def afilas_trayecto(trayecto, intervalo_s=None):
+    """
+    Versión asíncrona de `filas_trayecto` para ASGI: cada bloque del cursor
+    se lee con sync_to_async, así el servidor envía mientras la base entrega.
+    """
+    cursor = await sync_to_async(lambda: _consulta(trayecto).iterator(chunk_size=CHUNK_CURSOR))()
+    leer = sync_to_async(lambda: list(islice(cursor, CHUNK_CURSOR)))
+    submuestreo = _Submuestreo(intervalo_s)
+    try:
+        while True:
+            bloque = await leer()
+            for valores in bloque:
+                fila = submuestreo.fila(*valores)
+                if fila is not None:
+                    yield fila
+            if len(bloque) < CHUNK_CURSOR:
+                return
+    finally:
+        # Cliente desconectado o fin: se libera el cursor del servidor en su hilo
+        await sync_to_async(cursor.close)()
+
+
+class _NDJSON:
+    """Un objeto JSON por línea."""
+    campos = ["t"] + CAMPOS[1:]
+
+    def __init__(self, trayecto):
+        pass
+
+    def inicio(self):
+        return ""
+
+    def bloque(self, filas, primero):
+        return "".join(json.dumps(dict(zip(self.campos, fila))) + "\n" for fila in filas)
+
+    def fin(self):
+        return ""
+
+
+class _Compacto:
+    """
+    Un único documento JSON: los nombres de campo una vez y cada posición
+    como arreglo, en el orden de `campos`.
+    """
+
+    def __init__(self, trayecto):
+        self.trayecto = trayecto
+
+    def inicio(self):
+        cabecera = json.dumps({
+            "trayecto": str(self.trayecto.pk), "ruta": str(self.trayecto.ruta_id), "campos": ["t"] + CAMPOS[1:],
+        })
+        return cabecera[:-1] + ', "posiciones": ['
+
+    def bloque(self, filas, primero):
+        cuerpo = ",".join(json.dumps(list(fila), separators=(",", ":")) for fila in filas)
+        return cuerpo if primero else "," + cuerpo
+
+    def fin(self):
+        return "]}"
+
+
+ESCRITORES = {"ndjson": _NDJSON, "compacto": _Compacto}
+
+
+def generar(trayecto, formato="ndjson", intervalo_s=None):
+    """Cuerpo del replay como iterador síncrono (WSGI), en bloques de FILAS_POR_BLOQUE filas."""
+    escritor = ESCRITORES[formato](trayecto)
+    if escritor.inicio():
+        yield escritor.inicio()
+    bloque, primero = [], True
+    for fila in filas_trayecto(trayecto, intervalo_s):
+        bloque.append(fila)
+        if len(bloque) >= FILAS_POR_BLOQUE:
+            yield escritor.bloque(bloque, primero)
+            bloque, primero = [], False
+    if bloque:
+        yield escritor.bloque(bloque, primero)
+    if escritor.fin():
+        yield escritor.fin()
+
+
+async def agenerar(trayecto, formato="ndjson", intervalo_s=None):
+    """Cuerpo del replay como iterador asíncrono (ASGI): memoria constante sin bloquear el event loop."""
+    escritor = ESCRITORES[formato](trayecto)
+    if escritor.inicio():
+        yield escritor.inicio()
+    bloque, primero = [], True
+    async for fila in afilas_trayecto(trayecto, intervalo_s):
+        bloque.append(fila)
+        if len(bloque) >= FILAS_POR_BLOQUE:
+            yield escritor.bloque(bloque, primero)
+            bloque, primero = [], False
+    if bloque:
+        yield escritor.bloque(bloque, primero)
+    if escritor.fin():
+        yield escritor.fin()
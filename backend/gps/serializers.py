@@ -2,7 +2,7 @@
 
 from rest_framework import serializers
 from django.utils import timezone
-from .models import Posicion, Trayecto, AlertaGPS
+from .models import Posicion, UltimaPosicion, Trayecto, AlertaGPS, TiempoTramoHistorico, EventoZona
 from rutas.models import Ruta
 from accounts.serializers import UserSerializer
 
@@ -26,7 +26,13 @@ class PosicionSerializer(serializers.ModelSerializer):
             "ruta",
             "ruta_nombre",
             "tiempo_transcurrido_segundos",
+            "latitud_ajustada",
+            "longitud_ajustada",
+            "distancia_ruta_m",
+            "segmento_ruta",
+            "filtro",
         ]
+        read_only_fields = ["latitud_ajustada", "longitud_ajustada", "distancia_ruta_m", "segmento_ruta", "filtro"]
 
     def get_tiempo_transcurrido_segundos(self, obj):
         """Retorna el tiempo transcurrido desde la última posición (en segundos)."""
@@ -45,6 +51,34 @@ class PosicionSerializer(serializers.ModelSerializer):
         return attrs
 
 
+# === ÚLTIMA POSICIÓN ===
+class UltimaPosicionSerializer(serializers.ModelSerializer):
+    ruta_nombre = serializers.CharField(source="ruta.nombre", read_only=True, allow_null=True)
+    activa = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UltimaPosicion
+        fields = [
+            "origen_tipo",
+            "origen_id",
+            "posicion",
+            "latitud",
+            "longitud",
+            "precision",
+            "estado",
+            "timestamp",
+            "ruta",
+            "ruta_nombre",
+            "distancia_ruta_m",
+            "segmento_ruta",
+            "activa",
+        ]
+        read_only_fields = fields
+
+    def get_activa(self, obj):
+        return obj.es_activa()
+
+
 # === TRAYECTO ===
 class TrayectoSerializer(serializers.ModelSerializer):
     ruta_nombre = serializers.CharField(source="ruta.nombre", read_only=True)
@@ -64,6 +98,24 @@ class TrayectoSerializer(serializers.ModelSerializer):
             "duracion_total",
             "duracion_minutos",
             "finalizado",
+            "posiciones_registradas",
+            "distancia_acumulada_m",
+            "velocidad_maxima_kmh",
+            "velocidad_promedio_kmh",
+            "primera_posicion_en",
+            "ultima_posicion_en",
+            "sin_senal_desde",
+            "vehiculo_id",
+        ]
+        read_only_fields = [
+            "posiciones_registradas",
+            "distancia_acumulada_m",
+            "velocidad_maxima_kmh",
+            "velocidad_promedio_kmh",
+            "primera_posicion_en",
+            "ultima_posicion_en",
+            "sin_senal_desde",
+            "vehiculo_id",
         ]
 
     def get_duracion_minutos(self, obj):
@@ -80,6 +132,41 @@ class TrayectoSerializer(serializers.ModelSerializer):
         return instance
 
 
+# === TIEMPOS HISTÓRICOS POR TRAMO ===
+class TiempoTramoHistoricoSerializer(serializers.ModelSerializer):
+    parada_origen_nombre = serializers.CharField(source="parada_origen.nombre", read_only=True)
+    parada_destino_nombre = serializers.CharField(source="parada_destino.nombre", read_only=True)
+
+    class Meta:
+        model = TiempoTramoHistorico
+        fields = [
+            "id",
+            "ruta",
+            "parada_origen",
+            "parada_origen_nombre",
+            "parada_destino",
+            "parada_destino_nombre",
+            "dia_semana",
+            "hora",
+            "muestras",
+            "media_segundos",
+            "p50_segundos",
+            "p90_segundos",
+            "actualizado_en",
+        ]
+        read_only_fields = fields
+
+
+# === EVENTOS DE ZONA (GEOCERCAS) ===
+class EventoZonaSerializer(serializers.ModelSerializer):
+    zona_nombre = serializers.CharField(source="zona.nombre", read_only=True)
+
+    class Meta:
+        model = EventoZona
+        fields = ["id", "zona", "zona_nombre", "origen_tipo", "origen_id", "tipo", "timestamp", "posicion"]
+        read_only_fields = fields
+
+
 # === ALERTAS GPS ===
 class AlertaGPSSerializer(serializers.ModelSerializer):
     ruta_nombre = serializers.CharField(source="ruta.nombre", read_only=True)
@@ -100,12 +187,35 @@ class AlertaGPSSerializer(serializers.ModelSerializer):
             "descripcion",
             "detectada_en",
             "posicion_id",
+            "ocurrencias",
+            "ultima_deteccion_en",
+            "distancia_maxima_m",
             "resuelta",
             "resuelta_en",
             "resuelta_por",
             "resuelta_por_nombre",
         ]
-        read_only_fields = ["detectada_en", "resuelta_en", "resuelta_por"]
+        read_only_fields = [
+            "detectada_en", "ocurrencias", "ultima_deteccion_en", "distancia_maxima_m", "resuelta_en", "resuelta_por",
+        ]
+        # La unicidad de la alerta abierta se valida en `validate`: el alta no debe rechazarse
+        validators = []
+
+    def validate(self, attrs):
+        """
+        Una sola alerta abierta por (ruta, tipo): al editar no se puede
+        reabrir ni mover una alerta sobre un episodio ya abierto.
+        """
+        if self.instance is None:
+            return attrs  # el alta pasa por el coalescedor, que suma al episodio abierto
+        ruta = attrs.get("ruta", self.instance.ruta)
+        tipo = attrs.get("tipo", self.instance.tipo)
+        resuelta = attrs.get("resuelta", self.instance.resuelta)
+        if not resuelta and (
+            AlertaGPS.objects.filter(ruta=ruta, tipo=tipo, resuelta=False).exclude(pk=self.instance.pk).exists()
+        ):
+            raise serializers.ValidationError("Ya hay una alerta abierta de este tipo en la ruta.")
+        return attrs
 
     def update(self, instance, validated_data):
         """
@@ -1,84 +1,104 @@
 # gps/signals.py
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.utils import timezone
-from .models import Posicion, Trayecto, AlertaGPS
-from rutas.models import Desvio
-from cupos.models import Cupo
-from gps.utils import calcular_distancia  # lo implementaremos luego
+from .models import Posicion, AlertaGPS
+from .geometria import invalidar_geometria
+from rutas.models import Ruta, RutaParada, TrazadoRuta
+from paradas.models import Parada, ZonaParada
+from .indice_paradas import indice_paradas
+from .geocercas import indice_zonas
+from .teselas import invalidar_paradas as invalidar_teselas_paradas
+from .ultimas import registrar_ultimas_posiciones
+from .stream import publicar_posiciones, publicar_alerta
+from .cola import esta_diferido
+from .alertas import coalescedor
+from .procesamiento import procesar_posiciones
 
 
 @receiver(post_save, sender=Posicion)
 def procesar_posicion_gps(sender, instance, created, **kwargs):
     """
-    Analiza cada nueva posición GPS para detectar eventos automáticos.
+    Analiza cada nueva posición GPS para detectar eventos automáticos
+    (desvíos, alertas, confirmación de asistencia) con la cadena de etapas.
     """
     if not created:
         return
 
-    # Si el origen es un vehículo, analizar trayecto y desvíos
-    if instance.origen_tipo == "VEHICULO" and instance.ruta:
-        verificar_desvio(instance)
+    registrar_ultimas_posiciones([instance])
+    publicar_posiciones([instance])
 
-    # Si el origen es un usuario → confirmar cupo si está dentro del rango
-    elif instance.origen_tipo == "USUARIO":
-        confirmar_asistencia_usuario(instance)
+    # En modo asíncrono el análisis lo hacen los trabajadores de la cola
+    if not esta_diferido():
+        procesar_posiciones([instance])
 
 
-def verificar_desvio(posicion):
-    """Detecta si la posición del vehículo se desvía de su ruta."""
-    ruta = posicion.ruta
-    if not ruta or not ruta.paradas.exists():
-        return
+@receiver(post_save, sender=AlertaGPS)
+def difundir_alerta(sender, instance, **kwargs):
+    """Envía las alertas nuevas o actualizadas a los clientes suscritos a la ruta."""
+    publicar_alerta(instance)
+
+
+@receiver(post_save, sender=AlertaGPS)
+def indexar_alerta(sender, instance, created, **kwargs):
+    """Mantiene el índice de episodios abiertos ante altas o resoluciones por API/admin."""
+    if instance.resuelta:
+        coalescedor.descartar(instance.ruta_id, instance.tipo, instance.pk)
+    elif created:
+        coalescedor.indexar(instance.ruta_id, instance.tipo, instance.pk)
+
+
+# === INVALIDACIÓN DE GEOMETRÍA DE RUTAS ===
+@receiver(post_save, sender=RutaParada)
+@receiver(post_delete, sender=RutaParada)
+def invalidar_geometria_ruta_parada(sender, instance, **kwargs):
+    invalidar_geometria(instance.ruta_id)
+
+
+@receiver(post_save, sender=TrazadoRuta)
+@receiver(post_delete, sender=TrazadoRuta)
+def invalidar_geometria_trazado(sender, instance, **kwargs):
+    invalidar_geometria(instance.ruta_id)
+
+
+@receiver(post_save, sender=Ruta)
+def invalidar_geometria_ruta(sender, instance, created, **kwargs):
+    # Los umbrales de desvío viajan con la geometría
+    if not created:
+        invalidar_geometria(instance.id)
+
+
+@receiver(post_save, sender=Parada)
+@receiver(post_delete, sender=Parada)
+def invalidar_geometria_parada(sender, instance, **kwargs):
+    ruta_ids = RutaParada.objects.filter(parada_id=instance.id).values_list("ruta_id", flat=True)
+    invalidar_geometria(*set(ruta_ids))
+
+
+# === ÍNDICE DE PARADAS ACTIVAS ===
+@receiver(post_save, sender=Parada)
+def actualizar_indice_parada(sender, instance, **kwargs):
+    indice_paradas.actualizar(instance.id, instance.latitud, instance.longitud, instance.activa)
+
+
+@receiver(post_delete, sender=Parada)
+def retirar_indice_parada(sender, instance, **kwargs):
+    indice_paradas.eliminar(instance.id)
+
+
+# === GEOCERCAS DE ZONAS ===
+@receiver(post_save, sender=ZonaParada)
+@receiver(post_delete, sender=ZonaParada)
+@receiver(post_save, sender=Parada)
+@receiver(post_delete, sender=Parada)
+@receiver(post_save, sender=RutaParada)
+@receiver(post_delete, sender=RutaParada)
+def invalidar_geocercas(sender, instance, **kwargs):
+    # Polígonos y zonas de cada ruta (a través de sus paradas)
+    indice_zonas.invalidar()
+
 
-    # Comparar con las paradas más cercanas
-    min_dist = float("inf")
-    for parada in ruta.paradas.all():
-        distancia = calcular_distancia(
-            float(posicion.latitud),
-            float(posicion.longitud),
-            float(parada.latitud),
-            float(parada.longitud),
-        )
-        if distancia < min_dist:
-            min_dist = distancia
-
-    # Si la desviación supera 300 metros → registrar desvío
-    if min_dist > 300:
-        Desvio.objects.create(
-            ruta=ruta,
-            distancia_desviacion=min_dist,
-            descripcion=f"Desvío detectado ({int(min_dist)} m fuera de ruta).",
-            detectado_automaticamente=True,
-        )
-        AlertaGPS.objects.create(
-            ruta=ruta,
-            tipo="DESVIO",
-            descripcion=f"El bus se alejó {int(min_dist)} m de la ruta.",
-            posicion=posicion,
-        )
-
-
-def confirmar_asistencia_usuario(posicion):
-    """Confirma cupo si el usuario está cerca de una parada activa."""
-    from paradas.models import Parada
-
-    paradas = Parada.objects.filter(activa=True)
-    for parada in paradas:
-        distancia = calcular_distancia(
-            float(posicion.latitud),
-            float(posicion.longitud),
-            float(parada.latitud),
-            float(parada.longitud),
-        )
-        if distancia < 100:  # dentro del rango de 100m
-            # Confirmar cupo activo de ese usuario si existe
-            cupo = Cupo.objects.filter(
-                usuario__id=posicion.origen_id,
-                activo=True,
-                estado="RESERVADO",
-            ).first()
-            if cupo:
-                cupo.marcar_confirmado()
-                print(f"[GPS] Cupo confirmado automáticamente para {cupo.usuario}")
-            break
+# === TESELAS DEL MAPA ===
+@receiver(post_save, sender=Parada)
+@receiver(post_delete, sender=Parada)
+def invalidar_teselas_parada(sender, instance, **kwargs):
+    invalidar_teselas_paradas()
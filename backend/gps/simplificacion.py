@@ -0,0 +1,55 @@
+# gps/simplificacion.py
+
+import math
+import numpy as np
+
+from .distancias import RADIO_TIERRA_M
+
+
+def _proyectar(lats, lons):
+    """Proyección equirectangular local (metros) centrada en el recorrido."""
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    cos_lat0 = math.cos(math.radians(float(lats.mean())))
+    x = np.radians(lons - lons.mean()) * cos_lat0 * RADIO_TIERRA_M
+    y = np.radians(lats - lats.mean()) * RADIO_TIERRA_M
+    return x, y
+
+
+def _distancia_a_segmento(px, py, x0, y0, x1, y1):
+    dx, dy = x1 - x0, y1 - y0
+    largo2 = dx * dx + dy * dy
+    if largo2 == 0:
+        return np.hypot(px - x0, py - y0)
+    t = np.clip(((px - x0) * dx + (py - y0) * dy) / largo2, 0.0, 1.0)
+    return np.hypot(px - (x0 + t * dx), py - (y0 + t * dy))
+
+
+def douglas_peucker(lats, lons, tolerancia_m):
+    """
+    Simplificación Douglas–Peucker de un recorrido.
+    Devuelve una máscara booleana con los puntos que se conservan
+    (el primero y el último siempre se conservan).
+    """
+    n = len(lats)
+    mantener = np.zeros(n, dtype=bool)
+    if n == 0:
+        return mantener
+    mantener[0] = mantener[-1] = True
+    if n < 3:
+        return mantener
+
+    x, y = _proyectar(lats, lons)
+    pila = [(0, n - 1)]
+    while pila:
+        i, j = pila.pop()
+        if j <= i + 1:
+            continue
+        d = _distancia_a_segmento(x[i + 1:j], y[i + 1:j], x[i], y[i], x[j], y[j])
+        k = int(np.argmax(d))
+        if d[k] > tolerancia_m:
+            medio = i + 1 + k
+            mantener[medio] = True
+            pila.append((i, medio))
+            pila.append((medio, j))
+    return mantener
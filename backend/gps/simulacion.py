@@ -0,0 +1,340 @@
+# gps/simulacion.py
+
+import math
+import random
+import time
+from datetime import time as hora, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .models import Posicion, TipoOrigen, Trayecto
+from .ingest import registrar_posiciones
+
+
+# Centro de la flota simulada (Riohacha) y separación media entre paradas.
+CENTRO = getattr(settings, "GPS_SIMULACION_CENTRO", (11.5446, -72.9060))
+SEPARACION_PARADAS_M = getattr(settings, "GPS_SIMULACION_SEPARACION_M", 450)
+PREFIJO = "SIM"
+METROS_POR_GRADO = 111320.0
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def _desplazar(lat, lon, norte_m, este_m):
+    return lat + norte_m / METROS_POR_GRADO, lon + este_m / (METROS_POR_GRADO * math.cos(math.radians(lat)))
+
+
+def generar_dataset(rutas=10, paradas_por_ruta=12, buses_por_ruta=2, usuarios=1000, roles=4, semilla=42):
+    """
+    Crea un conjunto de datos sintético y reproducible con prefijo "SIM":
+    rutas con paradas ordenadas (un recorrido quebrado cerca del centro),
+    buses asignados, horarios cada 30 min, roles y usuarios repartidos entre
+    ellos. Todo con bulk_create, en una transacción.
+    """
+    from accounts.models import Role, UserRole
+    from paradas.models import Parada
+    from rutas.models import Bus, BusRuta, HorarioRuta, Ruta, RutaParada
+
+    User = get_user_model()
+    azar = random.Random(semilla)
+    with transaction.atomic():
+        lista_roles = [
+            Role.objects.get_or_create(slug=f"sim-rol-{i}", defaults={"name": f"{PREFIJO} Rol {i}"})[0]
+            for i in range(roles)
+        ]
+        password = make_password(None)
+        lista_usuarios = User.objects.bulk_create([
+            User(
+                username=f"{PREFIJO.lower()}_usuario_{i:06d}",
+                email=f"{PREFIJO.lower()}_usuario_{i:06d}@example.com",
+                identificacion=f"S{i:08d}",
+                password=password,
+                is_active_gps=True,
+            )
+            for i in range(usuarios)
+        ])
+        if lista_roles:
+            UserRole.objects.bulk_create([
+                UserRole(user=usuario, role=lista_roles[i % len(lista_roles)])
+                for i, usuario in enumerate(lista_usuarios)
+            ])
+
+        lista_rutas, paradas, rutas_paradas, buses, asignaciones, horarios = [], [], [], [], [], []
+        for r in range(rutas):
+            ruta = Ruta(
+                nombre=f"{PREFIJO} Ruta {r:03d}",
+                conductor=lista_usuarios[r] if r < len(lista_usuarios) else None,
+                capacidad_total=40 * buses_por_ruta,
+            )
+            lista_rutas.append(ruta)
+            # Cada ruta arranca cerca del centro (las paradas no pueden coincidir)
+            lat, lon = _desplazar(*CENTRO, azar.uniform(-800, 800), azar.uniform(-800, 800))
+            rumbo = azar.uniform(0, 2 * math.pi)
+            for orden in range(1, paradas_por_ruta + 1):
+                parada = Parada(
+                    nombre=f"{PREFIJO} Parada {r:03d}-{orden:02d}",
+                    latitud=Decimal(f"{lat:.6f}"),
+                    longitud=Decimal(f"{lon:.6f}"),
+                )
+                paradas.append(parada)
+                rutas_paradas.append(RutaParada(ruta=ruta, parada=parada, orden=orden))
+                rumbo += azar.uniform(-0.6, 0.6)
+                distancia = SEPARACION_PARADAS_M * azar.uniform(0.6, 1.4)
+                lat, lon = _desplazar(lat, lon, distancia * math.cos(rumbo), distancia * math.sin(rumbo))
+            for b in range(buses_por_ruta):
+                bus = Bus(placa=f"{PREFIJO}{r:03d}{b:02d}", modelo="Simulado", capacidad=40)
+                buses.append(bus)
+                asignaciones.append(BusRuta(bus=bus, ruta=ruta))
+            horarios.extend(
+                HorarioRuta(ruta=ruta, hora_salida=hora(6 + m // 2, 30 * (m % 2)), observaciones=PREFIJO)
+                for m in range(24)
+            )
+
+        Ruta.objects.bulk_create(lista_rutas)
+        Parada.objects.bulk_create(paradas)
+        RutaParada.objects.bulk_create(rutas_paradas)
+        Bus.objects.bulk_create(buses)
+        BusRuta.objects.bulk_create(asignaciones)
+        HorarioRuta.objects.bulk_create(horarios)
+
+    return {
+        "rutas": len(lista_rutas), "paradas": len(paradas), "buses": len(buses),
+        "horarios": len(horarios), "usuarios": len(lista_usuarios), "roles": len(lista_roles),
+    }
+
+
+def limpiar_dataset():
+    """Borra todo lo creado por `generar_dataset` (y sus posiciones)."""
+    from accounts.models import Role
+    from paradas.models import Parada
+    from rutas.models import Bus, Ruta
+
+    User = get_user_model()
+    with transaction.atomic():
+        origenes = list(Bus.objects.filter(placa__startswith=PREFIJO).values_list("id", flat=True))
+        usuarios = User.objects.filter(username__startswith=f"{PREFIJO.lower()}_usuario_")
+        origenes += list(usuarios.values_list("id", flat=True))
+        Posicion.objects.filter(origen_id__in=origenes).delete()
+        Ruta.objects.filter(nombre__startswith=f"{PREFIJO} Ruta").delete()
+        Parada.objects.filter(nombre__startswith=f"{PREFIJO} Parada").delete()
+        Bus.objects.filter(placa__startswith=PREFIJO).delete()
+        usuarios.delete()
+        User.objects.filter(username=f"{PREFIJO.lower()}_admin").delete()
+        Role.objects.filter(slug__startswith="sim-rol-").delete()
+
+
+class _Recorrido:
+    """Polilínea de una ruta con distancias acumuladas, para ubicar un punto a X metros."""
+
+    def __init__(self, puntos):
+        self.puntos = puntos
+        self.acumulado = [0.0]
+        for (lat0, lon0), (lat1, lon1) in zip(puntos, puntos[1:]):
+            norte = (lat1 - lat0) * METROS_POR_GRADO
+            este = (lon1 - lon0) * METROS_POR_GRADO * math.cos(math.radians(lat0))
+            self.acumulado.append(self.acumulado[-1] + math.hypot(norte, este))
+        self.largo = self.acumulado[-1]
+
+    def punto(self, recorrido):
+        """Punto a `recorrido` metros; al llegar al final vuelve por el mismo trazado."""
+        if self.largo <= 0:
+            return self.puntos[0]
+        recorrido %= 2 * self.largo
+        if recorrido > self.largo:
+            recorrido = 2 * self.largo - recorrido
+        for i in range(1, len(self.acumulado)):
+            if recorrido <= self.acumulado[i]:
+                tramo = self.acumulado[i] - self.acumulado[i - 1] or 1.0
+                t = (recorrido - self.acumulado[i - 1]) / tramo
+                (lat0, lon0), (lat1, lon1) = self.puntos[i - 1], self.puntos[i]
+                return lat0 + (lat1 - lat0) * t, lon0 + (lon1 - lon0) * t
+        return self.puntos[-1]
+
+
+class Simulador:
+    """
+    Reproduce buses que recorren sus rutas y pasajeros que caminan cerca de
+    las paradas, emitiendo posiciones cada `intervalo_s` segundos simulados,
+    contra la capa de ingesta o contra la API en proceso. Mide rendimiento,
+    latencia por lote (percentiles) y consultas SQL por lote.
+    """
+
+    def __init__(self, pasajeros=200, intervalo_s=5, lote=500, destino="ingesta", diferido=False,
+                 ruido_m=4.0, semilla=42):
+        from rutas.models import BusRuta, RutaParada
+
+        self.intervalo_s = intervalo_s
+        self.lote = lote
+        self.destino = destino
+        self.diferido = diferido
+        self.ruido_m = ruido_m
+        self.azar = random.Random(semilla)
+
+        puntos = {}
+        for ruta_id, lat, lon in RutaParada.objects.filter(ruta__nombre__startswith=f"{PREFIJO} Ruta").order_by(
+            "ruta_id", "orden"
+        ).values_list("ruta_id", "parada__latitud", "parada__longitud"):
+            puntos.setdefault(ruta_id, []).append((float(lat), float(lon)))
+        self.recorridos = {ruta_id: _Recorrido(p) for ruta_id, p in puntos.items()}
+
+        self.vehiculos = []
+        for bus_id, ruta_id in BusRuta.objects.filter(ruta_id__in=list(self.recorridos), activo=True).values_list(
+            "bus_id", "ruta_id"
+        ):
+            recorrido = self.recorridos[ruta_id]
+            self.vehiculos.append([
+                bus_id, ruta_id, self.azar.uniform(0, recorrido.largo), self.azar.uniform(6, 12),
+            ])
+
+        User = get_user_model()
+        paradas = [p for recorrido in self.recorridos.values() for p in recorrido.puntos]
+        self.pasajeros = [
+            [usuario_id, *self.azar.choice(paradas)]
+            for usuario_id in User.objects.filter(username__startswith=f"{PREFIJO.lower()}_usuario_").order_by(
+                "username"
+            ).values_list("id", flat=True)[:pasajeros]
+        ] if paradas else []
+
+        self._cliente = None
+        self.latencias_ms, self.consultas = [], []
+        self.enviadas = self.creadas = self.errores = 0
+        self.duracion_s = 0.0
+
+    def _ruido(self, lat, lon):
+        return _desplazar(lat, lon, self.azar.gauss(0, self.ruido_m), self.azar.gauss(0, self.ruido_m))
+
+    def paso(self, instante):
+        """Posiciones de todos los orígenes simulados en `instante`, avanzando un intervalo."""
+        posiciones = []
+        for vehiculo in self.vehiculos:
+            bus_id, ruta_id, recorrido, velocidad = vehiculo
+            vehiculo[2] = recorrido + velocidad * self.intervalo_s
+            lat, lon = self._ruido(*self.recorridos[ruta_id].punto(vehiculo[2]))
+            posiciones.append(self._posicion(TipoOrigen.VEHICULO, bus_id, ruta_id, lat, lon, instante))
+        for pasajero in self.pasajeros:
+            usuario_id, lat, lon = pasajero
+            rumbo = self.azar.uniform(0, 2 * math.pi)
+            paso_m = 1.2 * self.intervalo_s
+            pasajero[1], pasajero[2] = _desplazar(lat, lon, paso_m * math.cos(rumbo), paso_m * math.sin(rumbo))
+            posiciones.append(self._posicion(TipoOrigen.USUARIO, usuario_id, None, *self._ruido(lat, lon), instante))
+        return posiciones
+
+    def _posicion(self, origen_tipo, origen_id, ruta_id, lat, lon, instante):
+        return Posicion(
+            origen_tipo=origen_tipo,
+            origen_id=origen_id,
+            ruta_id=ruta_id,
+            latitud=Decimal(f"{lat:.6f}"),
+            longitud=Decimal(f"{lon:.6f}"),
+            precision=Decimal(f"{self.azar.uniform(3, 12):.2f}"),
+            timestamp=instante,
+        )
+
+    def enviar(self, posiciones):
+        """Envía un lote al destino y registra su latencia y consultas."""
+        inicio = time.perf_counter()
+        with CaptureQueriesContext(connection) as capturadas:
+            if self.destino == "api":
+                creadas = self._enviar_api(posiciones)
+            else:
+                creadas = len(registrar_posiciones(posiciones, diferido=self.diferido)[0])
+        self.latencias_ms.append((time.perf_counter() - inicio) * 1000)
+        self.consultas.append(len(capturadas.captured_queries))
+        self.enviadas += len(posiciones)
+        self.creadas += creadas
+
+    def _enviar_api(self, posiciones):
+        from rest_framework.test import APIClient
+
+        if self._cliente is None:
+            User = get_user_model()
+            admin, creado = User.objects.get_or_create(
+                username=f"{PREFIJO.lower()}_admin",
+                defaults={"identificacion": "SADMIN", "is_superuser": True, "is_staff": True},
+            )
+            self._cliente = APIClient(SERVER_NAME=_host_permitido())
+            self._cliente.force_authenticate(admin)
+        filas = [
+            {
+                "origen_tipo": p.origen_tipo,
+                "origen_id": str(p.origen_id),
+                "ruta": str(p.ruta_id) if p.ruta_id else None,
+                "latitud": str(p.latitud),
+                "longitud": str(p.longitud),
+                "precision": str(p.precision),
+                "timestamp": p.timestamp.isoformat(),
+            }
+            for p in posiciones
+        ]
+        url = "/api/gps/posiciones/lote/" + ("?asincrono=1" if self.diferido else "")
+        respuesta = self._cliente.post(url, {"posiciones": filas}, format="json")
+        if respuesta.status_code >= 400:
+            self.errores += 1
+            return 0
+        return respuesta.data.get("creadas", 0)
+
+    def ejecutar(self, duracion_s, tiempo_real=False, inicio=None, trayectos=True):
+        """
+        Simula `duracion_s` segundos. Con `tiempo_real` respeta el ritmo del
+        reloj; si no, envía tan rápido como el sistema acepte.
+        """
+        inicio = inicio or timezone.now()
+        abiertos = []
+        if trayectos:
+            abiertos = Trayecto.objects.bulk_create([
+                Trayecto(ruta_id=ruta_id, vehiculo_id=bus_id, fecha_inicio=inicio)
+                for bus_id, ruta_id, *_ in self.vehiculos
+            ])
+
+        reloj = time.perf_counter()
+        pasos = max(int(duracion_s // self.intervalo_s), 1)
+        for n in range(1, pasos + 1):
+            posiciones = self.paso(inicio + timedelta(seconds=n * self.intervalo_s))
+            for desde in range(0, len(posiciones), self.lote):
+                self.enviar(posiciones[desde:desde + self.lote])
+            if tiempo_real:
+                espera = reloj + n * self.intervalo_s - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+        self.duracion_s = time.perf_counter() - reloj
+
+        for trayecto in Trayecto.objects.filter(pk__in=[t.pk for t in abiertos], finalizado=False):
+            trayecto.finalizar()
+        return self.resumen()
+
+    def resumen(self):
+        return {
+            "vehiculos": len(self.vehiculos),
+            "pasajeros": len(self.pasajeros),
+            "lotes": len(self.latencias_ms),
+            "enviadas": self.enviadas,
+            "creadas": self.creadas,
+            "errores": self.errores,
+            "duracion_s": round(self.duracion_s, 3),
+            "posiciones_por_s": round(self.enviadas / self.duracion_s, 1) if self.duracion_s else 0.0,
+            "latencia_ms": {
+                f"p{p}": round(_percentil(self.latencias_ms, p), 2) for p in (50, 90, 95, 99)
+            } | {"max": round(max(self.latencias_ms, default=0), 2)},
+            "consultas_por_lote": {
+                "media": round(sum(self.consultas) / len(self.consultas), 1) if self.consultas else 0,
+                "max": max(self.consultas, default=0),
+            },
+        }
+
+
+def _host_permitido():
+    hosts = [h.lstrip(".") for h in settings.ALLOWED_HOSTS if h]
+    if not hosts or "*" in hosts:
+        return "testserver"
+    return hosts[0]
@@ -0,0 +1,191 @@
+# gps/stream.py
+
+import asyncio
+import json
+import select
+import threading
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+
+# Broker para repartir eventos entre procesos/workers.
+# "gps.stream.BrokerLocal" (un solo proceso) o "gps.stream.BrokerPostgres" (LISTEN/NOTIFY).
+BROKER = getattr(settings, "GPS_STREAM_BROKER", "gps.stream.BrokerLocal")
+MAX_COLA = getattr(settings, "GPS_STREAM_MAX_COLA", 200)
+
+
+def canal_ruta(ruta_id):
+    return f"ruta:{ruta_id}"
+
+
+class Suscripcion:
+    """Cola asyncio de un cliente conectado; si se llena se descartan los eventos más viejos."""
+
+    def __init__(self, canal, max_cola=MAX_COLA):
+        self.canal = canal
+        self.loop = asyncio.get_running_loop()
+        self.cola = asyncio.Queue(max_cola)
+
+    def poner(self, mensaje):
+        if self.cola.full():
+            self.cola.get_nowait()
+        self.cola.put_nowait(mensaje)
+
+
+class HubEventos:
+    """Reparto en memoria (fan-out) de eventos a los suscriptores de cada canal."""
+
+    def __init__(self):
+        self._suscriptores = {}
+        self._lock = threading.Lock()
+
+    def suscribir(self, canal):
+        """Debe llamarse desde el event loop que consumirá la cola."""
+        suscripcion = Suscripcion(canal)
+        with self._lock:
+            self._suscriptores.setdefault(canal, set()).add(suscripcion)
+        return suscripcion
+
+    def cancelar(self, suscripcion):
+        with self._lock:
+            suscriptores = self._suscriptores.get(suscripcion.canal)
+            if suscriptores is not None:
+                suscriptores.discard(suscripcion)
+                if not suscriptores:
+                    del self._suscriptores[suscripcion.canal]
+
+    def suscriptores(self, canal=None):
+        with self._lock:
+            if canal is not None:
+                return len(self._suscriptores.get(canal, ()))
+            return sum(len(s) for s in self._suscriptores.values())
+
+    def entregar(self, canal, mensaje):
+        """Entrega un mensaje desde cualquier hilo a los suscriptores del canal."""
+        with self._lock:
+            suscriptores = list(self._suscriptores.get(canal, ()))
+        for suscripcion in suscriptores:
+            try:
+                suscripcion.loop.call_soon_threadsafe(suscripcion.poner, mensaje)
+            except RuntimeError:  # el loop del cliente ya se cerró
+                self.cancelar(suscripcion)
+
+
+class BrokerLocal:
+    """Entrega directa al hub del proceso actual."""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def iniciar(self):
+        pass
+
+    def publicar(self, canal, mensaje):
+        self.hub.entregar(canal, mensaje)
+
+
+class BrokerPostgres:
+    """
+    Reparte eventos entre workers con LISTEN/NOTIFY de PostgreSQL.
+    Cada proceso escucha en un hilo con su propia conexión y reenvía a su hub.
+    """
+    CANAL_PG = "gps_stream"
+
+    def __init__(self, hub):
+        self.hub = hub
+        self._hilo = None
+        self._lock = threading.Lock()
+
+    def publicar(self, canal, mensaje):
+        payload = json.dumps({"canal": canal, "mensaje": mensaje}, cls=DjangoJSONEncoder)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.CANAL_PG, payload])
+
+    def iniciar(self):
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._escuchar, name="gps-stream-listen", daemon=True)
+                self._hilo.start()
+
+    def _escuchar(self):
+        import psycopg2
+
+        db = settings.DATABASES["default"]
+        conexion = psycopg2.connect(
+            dbname=db["NAME"], user=db["USER"], password=db["PASSWORD"], host=db["HOST"], port=db["PORT"]
+        )
+        conexion.autocommit = True
+        with conexion.cursor() as cursor:
+            cursor.execute(f"LISTEN {self.CANAL_PG}")
+        while True:
+            if select.select([conexion], [], [], 5) == ([], [], []):
+                continue
+            conexion.poll()
+            while conexion.notifies:
+                notificacion = conexion.notifies.pop(0)
+                datos = json.loads(notificacion.payload)
+                self.hub.entregar(datos["canal"], datos["mensaje"])
+
+
+hub = HubEventos()
+_broker = None
+
+
+def obtener_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(BROKER)(hub)
+    return _broker
+
+
+def publicar(canal, evento, datos):
+    """Publica un evento una vez confirmada la transacción en curso."""
+    mensaje = {"evento": evento, "datos": datos}
+    transaction.on_commit(lambda: obtener_broker().publicar(canal, mensaje))
+
+
+def publicar_posiciones(posiciones):
+    """Publica en el canal de su ruta las posiciones de vehículos."""
+    for p in posiciones:
+        if not p.ruta_id or p.origen_tipo != "VEHICULO":
+            continue
+        publicar(canal_ruta(p.ruta_id), "posicion", {
+            "id": p.pk,
+            "origen_tipo": p.origen_tipo,
+            "origen_id": p.origen_id,
+            "latitud": p.latitud,
+            "longitud": p.longitud,
+            "precision": p.precision,
+            "estado": p.estado,
+            "timestamp": p.timestamp,
+        })
+
+
+def publicar_descartadas(posiciones):
+    """
+    Retira del canal de su ruta las posiciones que el filtro descartó: se
+    publicaron al guardarlas, antes del análisis, con las coordenadas crudas.
+    """
+    for p in posiciones:
+        if not p.ruta_id or p.origen_tipo != "VEHICULO":
+            continue
+        publicar(canal_ruta(p.ruta_id), "descartada", {"id": p.pk, "origen_id": p.origen_id})
+
+
+def publicar_alerta(alerta):
+    publicar(canal_ruta(alerta.ruta_id), "alerta", {
+        "id": alerta.pk,
+        "tipo": alerta.tipo,
+        "descripcion": alerta.descripcion,
+        "detectada_en": alerta.detectada_en,
+        "posicion_id": alerta.posicion_id,
+        "resuelta": alerta.resuelta,
+    })
+
+
+def formato_sse(mensaje):
+    datos = json.dumps(mensaje["datos"], cls=DjangoJSONEncoder)
+    return f"event: {mensaje['evento']}\ndata: {datos}\n\n"
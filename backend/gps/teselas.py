@@ -0,0 +1,169 @@
+# gps/teselas.py
+
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from .versiones import VersionCompartida
+
+
+CACHE_ALIAS = getattr(settings, "GPS_TESELAS_CACHE", "default")
+CACHE_PREFIJO = "gps:teselas"
+# Celdas de agrupamiento por lado de tesela; desde ZOOM_SIN_AGRUPAR se envían los puntos sueltos.
+CELDAS = getattr(settings, "GPS_TESELAS_CELDAS", 8)
+ZOOM_SIN_AGRUPAR = getattr(settings, "GPS_TESELAS_ZOOM_SIN_AGRUPAR", 16)
+ZOOM_MAX = 22
+# Las paradas se cachean hasta que cambian (con un tope, por si la caché no es
+# compartida entre procesos); las capas en vivo solo unos segundos.
+VIGENCIA_PARADAS_S = getattr(settings, "GPS_TESELAS_VIGENCIA_PARADAS_S", 3600)
+VIGENCIA_VIVO_S = getattr(settings, "GPS_TESELAS_VIGENCIA_VIVO_S", 5)
+# Buses sin reportar en este lapso no se dibujan.
+ANTIGUEDAD_BUSES_S = getattr(settings, "GPS_TESELAS_ANTIGUEDAD_BUSES_S", 600)
+LAT_MAX_MERCATOR = 85.05112878
+
+
+class TeselaInvalida(ValueError):
+    pass
+
+
+def _fraccion_x(lon):
+    return (lon + 180.0) / 360.0
+
+
+def _fraccion_y(lat):
+    lat = max(min(lat, LAT_MAX_MERCATOR), -LAT_MAX_MERCATOR)
+    return (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0
+
+
+def _latitud(fraccion_y):
+    return math.degrees(math.atan(math.sinh(math.pi * (1.0 - 2.0 * fraccion_y))))
+
+
+def limites(z, x, y):
+    """(lat_min, lat_max, lon_min, lon_max) de la tesela z/x/y (Web Mercator, esquema XYZ)."""
+    n = 2 ** z
+    if not 0 <= z <= ZOOM_MAX or not 0 <= x < n or not 0 <= y < n:
+        raise TeselaInvalida(f"Tesela fuera de rango: {z}/{x}/{y}.")
+    return _latitud((y + 1) / n), _latitud(y / n), x / n * 360.0 - 180.0, (x + 1) / n * 360.0 - 180.0
+
+
+def agrupar(puntos, z, capa):
+    """
+    Agrupa en rejilla los puntos (lat, lon, propiedades) de la tesela. La
+    rejilla es global por zoom, así que los grupos coinciden entre teselas
+    vecinas. Devuelve features GeoJSON: el punto suelto o el centroide del grupo.
+    """
+    if z >= ZOOM_SIN_AGRUPAR:
+        return [_feature(lat, lon, {"capa": capa, **propiedades}) for lat, lon, propiedades in puntos]
+
+    n = 2 ** z * CELDAS
+    celdas = {}
+    for lat, lon, propiedades in puntos:
+        celda = (int(_fraccion_x(lon) * n), int(_fraccion_y(lat) * n))
+        celdas.setdefault(celda, []).append((lat, lon, propiedades))
+
+    features = []
+    for grupo in celdas.values():
+        if len(grupo) == 1:
+            lat, lon, propiedades = grupo[0]
+            features.append(_feature(lat, lon, {"capa": capa, **propiedades}))
+            continue
+        lat = sum(p[0] for p in grupo) / len(grupo)
+        lon = sum(p[1] for p in grupo) / len(grupo)
+        features.append(_feature(lat, lon, {"capa": capa, "agrupado": True, "cantidad": len(grupo)}))
+    return features
+
+
+def _feature(lat, lon, propiedades):
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [round(lon, 6), round(lat, 6)]},
+        "properties": propiedades,
+    }
+
+
+# === CAPAS ===
+def _puntos_paradas(lat_min, lat_max, lon_min, lon_max):
+    from paradas.models import Parada
+
+    filas = Parada.objects.filter(
+        activa=True,
+        latitud__gte=lat_min, latitud__lte=lat_max,
+        longitud__gte=lon_min, longitud__lte=lon_max,
+    ).values_list("id", "nombre", "latitud", "longitud")
+    return [(float(lat), float(lon), {"id": str(pid), "nombre": nombre}) for pid, nombre, lat, lon in filas]
+
+
+def _puntos_buses(lat_min, lat_max, lon_min, lon_max):
+    from .models import TipoOrigen, UltimaPosicion
+
+    filas = UltimaPosicion.objects.filter(
+        origen_tipo=TipoOrigen.VEHICULO,
+        timestamp__gte=timezone.now() - timedelta(seconds=ANTIGUEDAD_BUSES_S),
+        latitud__gte=lat_min, latitud__lte=lat_max,
+        longitud__gte=lon_min, longitud__lte=lon_max,
+    ).values_list("origen_id", "ruta_id", "latitud", "longitud", "timestamp")
+    return [
+        (float(lat), float(lon), {"id": str(origen_id), "ruta_id": str(ruta_id) if ruta_id else None, "timestamp": ts.isoformat()})
+        for origen_id, ruta_id, lat, lon, ts in filas
+    ]
+
+
+def _puntos_desvios(lat_min, lat_max, lon_min, lon_max):
+    from .models import AlertaGPS
+
+    filas = AlertaGPS.objects.filter(
+        tipo="DESVIO",
+        resuelta=False,
+        posicion__latitud__gte=lat_min, posicion__latitud__lte=lat_max,
+        posicion__longitud__gte=lon_min, posicion__longitud__lte=lon_max,
+    ).values_list("id", "ruta_id", "posicion__latitud", "posicion__longitud")
+    return [
+        (float(lat), float(lon), {"id": str(alerta_id), "ruta_id": str(ruta_id)})
+        for alerta_id, ruta_id, lat, lon in filas
+    ]
+
+
+CAPAS = {
+    "paradas": (_puntos_paradas, VIGENCIA_PARADAS_S),
+    "buses": (_puntos_buses, VIGENCIA_VIVO_S),
+    "desvios": (_puntos_desvios, VIGENCIA_VIVO_S),
+}
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+# Versión de la capa de paradas en la misma caché que las teselas
+version_paradas = VersionCompartida("teselas:paradas", CACHE_ALIAS)
+
+
+def capa(nombre, z, x, y):
+    """Features de una capa en la tesela, desde caché si está vigente."""
+    obtener, vigencia = CAPAS[nombre]
+    cache = _cache()
+    version = version_paradas.actual() if nombre == "paradas" else 0
+    clave = f"{CACHE_PREFIJO}:{nombre}:{version}:{z}:{x}:{y}"
+    features = cache.get(clave)
+    if features is None:
+        features = agrupar(obtener(*limites(z, x, y)), z, nombre)
+        cache.set(clave, features, vigencia)
+    return features
+
+
+def tesela(z, x, y, capas=None):
+    """FeatureCollection con las capas pedidas (por defecto todas)."""
+    limites(z, x, y)
+    features = []
+    for nombre in capas or CAPAS:
+        features.extend(capa(nombre, z, x, y))
+    return {"type": "FeatureCollection", "features": features}
+
+
+def invalidar_paradas():
+    """Invalida las teselas de paradas (cambia la versión de sus claves)."""
+    version_paradas.incrementar()
@@ -0,0 +1,118 @@
+# gps/tests/test_alertas.py
+
+from itertools import count
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from gps.alertas import coalescedor
+from gps.models import Posicion, AlertaGPS
+from rutas.models import Ruta, Bus, RutaParada
+from paradas.models import Parada
+
+
+class TestCoalescedorAlertas(TestCase):
+    def setUp(self):
+        coalescedor.limpiar()
+        # Lecturas cada 30 s: a milisegundos el filtro descartaría los saltos del recorrido
+        self.reloj = (timezone.now() - timedelta(minutes=10) + timedelta(seconds=30 * i) for i in count())
+        parada1 = Parada.objects.create(nombre="Parada A", latitud=11.5446, longitud=-72.9060)
+        parada2 = Parada.objects.create(nombre="Parada B", latitud=11.5460, longitud=-72.9050)
+        self.bus = Bus.objects.create(placa="ALE123", modelo="Hyundai", capacidad=40)
+        self.ruta = Ruta.objects.create(nombre="Ruta Alertas", tipo="ciudad", capacidad_total=40)
+        RutaParada.objects.create(ruta=self.ruta, parada=parada1, orden=1)
+        RutaParada.objects.create(ruta=self.ruta, parada=parada2, orden=2)
+
+    def tearDown(self):
+        coalescedor.limpiar()
+
+    def _posicion(self, lat, lon):
+        return Posicion.objects.create(
+            origen_tipo="VEHICULO", origen_id=self.bus.id, latitud=lat, longitud=lon, ruta=self.ruta,
+            timestamp=next(self.reloj),
+        )
+
+    def test_un_episodio_una_alerta(self):
+        self._posicion(11.5480, -72.9080)  # ≈ 330 m
+        self._posicion(11.5500, -72.9100)  # ≈ 700 m
+        self._posicion(11.5490, -72.9090)
+
+        alerta = AlertaGPS.objects.get(tipo="DESVIO")
+        self.assertFalse(alerta.resuelta)
+        self.assertEqual(alerta.ocurrencias, 3)
+        self.assertGreater(alerta.distancia_maxima_m, 600)
+
+        # Al volver al corredor se cierra; una nueva salida abre otro episodio
+        self._posicion(11.5447, -72.9061)
+        alerta.refresh_from_db()
+        self.assertTrue(alerta.resuelta)
+        self._posicion(11.5500, -72.9100)
+        self.assertEqual(AlertaGPS.objects.filter(tipo="DESVIO").count(), 2)
+        self.assertEqual(AlertaGPS.objects.filter(tipo="DESVIO", resuelta=False).count(), 1)
+
+    def test_camino_caliente_sin_lecturas(self):
+        alerta_id, creada = coalescedor.registrar(self.ruta.id, "SIN_SEÑAL", distancia=10)
+        self.assertTrue(creada)
+        with self.assertNumQueries(1):
+            self.assertEqual(coalescedor.registrar(self.ruta.id, "SIN_SEÑAL", distancia=50), (alerta_id, False))
+        alerta = AlertaGPS.objects.get(pk=alerta_id)
+        self.assertEqual((alerta.ocurrencias, alerta.distancia_maxima_m), (2, 50))
+
+        # Cerrar sin episodios abiertos no consulta
+        coalescedor.cerrar([self.ruta.id], "SIN_SEÑAL")
+        with self.assertNumQueries(0):
+            self.assertEqual(coalescedor.cerrar([self.ruta.id], "SIN_SEÑAL"), 0)
+
+    def test_resuelta_por_fuera_abre_otro_episodio(self):
+        alerta_id, _ = coalescedor.registrar(self.ruta.id, "MANUAL")
+        AlertaGPS.objects.get(pk=alerta_id).marcar_resuelta()
+        nueva_id, creada = coalescedor.registrar(self.ruta.id, "MANUAL")
+        self.assertTrue(creada)
+        self.assertNotEqual(nueva_id, alerta_id)
+
+    def test_indice_desfasado(self):
+        # Otro proceso abrió el episodio sin que este índice lo sepa
+        alerta = AlertaGPS.objects.create(ruta=self.ruta, tipo="MANUAL")
+        coalescedor.limpiar()
+        coalescedor._cargado = True
+        alerta_id, creada = coalescedor.registrar(self.ruta.id, "MANUAL")
+        self.assertEqual((alerta_id, creada), (alerta.pk, False))
+        self.assertEqual(AlertaGPS.objects.get(pk=alerta.pk).ocurrencias, 2)
+
+    def test_cerrar_episodio_abierto_por_otro_proceso(self):
+        coalescedor.cerrar([self.ruta.id], "MANUAL")
+        # Otro proceso abre el episodio después de cargar el índice
+        alerta = AlertaGPS.objects.create(ruta=self.ruta, tipo="MANUAL")
+        coalescedor._verificadas.clear()  # vence la verificación negativa
+        self.assertEqual(coalescedor.cerrar([self.ruta.id], "MANUAL"), 1)
+        alerta.refresh_from_db()
+        self.assertTrue(alerta.resuelta)
+
+
+class TestAlertasApi(APITestCase):
+    def setUp(self):
+        coalescedor.limpiar()
+        admin = get_user_model().objects.create_superuser(
+            username="admin_alertas", email="alertas@example.com", password="admin12345", identificacion="8"
+        )
+        self.client.force_authenticate(admin)
+        self.ruta = Ruta.objects.create(nombre="Ruta Alertas API", tipo="ciudad", capacidad_total=40)
+
+    def tearDown(self):
+        coalescedor.limpiar()
+
+    def test_alta_suma_al_episodio_abierto(self):
+        datos = {"ruta": str(self.ruta.id), "tipo": "MANUAL", "descripcion": "Llanta baja"}
+        self.assertEqual(self.client.post("/api/gps/alertas/", datos, format="json").status_code, 201)
+        r = self.client.post("/api/gps/alertas/", datos, format="json")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.data["ocurrencias"], 2)
+        self.assertEqual(AlertaGPS.objects.count(), 1)
+
+    def test_reabrir_sobre_episodio_abierto_es_400(self):
+        resuelta = AlertaGPS.objects.create(ruta=self.ruta, tipo="MANUAL", resuelta=True)
+        AlertaGPS.objects.create(ruta=self.ruta, tipo="MANUAL")
+        r = self.client.patch(f"/api/gps/alertas/{resuelta.id}/", {"resuelta": False}, format="json")
+        self.assertEqual(r.status_code, 400)
+        self.assertTrue(AlertaGPS.objects.get(pk=resuelta.pk).resuelta)
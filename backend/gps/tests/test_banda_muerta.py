@@ -0,0 +1,94 @@
+# gps/tests/test_banda_muerta.py
+
+import uuid
+from datetime import timedelta
+from unittest import mock
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from gps.banda_muerta import FiltroBandaMuerta, banda_muerta
+from gps.ingest import registrar_posiciones
+from gps.models import Posicion
+
+
+class TestBandaMuerta(SimpleTestCase):
+    def setUp(self):
+        self.filtro = FiltroBandaMuerta(
+            umbrales={"VEHICULO": {"metros": 10, "segundos": 30}}, cache_alias=None
+        )
+        self.origen = uuid.uuid4()
+        self.inicio = timezone.now()
+
+    def _posicion(self, lat, segundos, tipo="VEHICULO", **extra):
+        return Posicion(
+            origen_tipo=tipo, origen_id=self.origen, latitud=lat, longitud=-72.9,
+            timestamp=self.inicio + timedelta(seconds=segundos), **extra
+        )
+
+    def test_descarta_posiciones_quietas(self):
+        aceptadas, descartadas = self.filtro.filtrar([
+            self._posicion(11.50000, 0),
+            self._posicion(11.50003, 5),   # ≈ 3 m
+            self._posicion(11.50005, 10),  # ≈ 6 m
+            self._posicion(11.50050, 15),  # ≈ 55 m
+            self._posicion(11.50050, 50),  # latido: pasaron más de 30 s
+        ])
+        self.assertEqual(len(aceptadas), 3)
+        self.assertEqual(len(descartadas), 2)
+        self.assertEqual(self.filtro.contadores()["VEHICULO"], {"aceptadas": 3, "descartadas": 2})
+
+    def test_cambio_de_estado_siempre_pasa(self):
+        self.assertTrue(self.filtro.aceptar(self._posicion(11.5, 0)))
+        self.assertTrue(self.filtro.aceptar(self._posicion(11.5, 5, estado="FINALIZADA")))
+
+    def test_tipo_sin_umbral_no_filtra(self):
+        self.assertTrue(self.filtro.aceptar(self._posicion(11.5, 0, tipo="USUARIO")))
+        self.assertTrue(self.filtro.aceptar(self._posicion(11.5, 1, tipo="USUARIO")))
+
+    def _aceptar(self, posicion):
+        if not self.filtro.aceptar(posicion):
+            return False
+        self.filtro.confirmar([posicion])
+        return True
+
+    def test_atrasada_no_reemplaza_a_la_ultima(self):
+        self.assertTrue(self._aceptar(self._posicion(11.5, 20)))
+        self.assertTrue(self._aceptar(self._posicion(11.6, 5)))  # llega tarde y lejos
+        self.assertFalse(self._aceptar(self._posicion(11.5, 25)))
+
+    def test_sin_confirmar_no_es_referencia(self):
+        posiciones = [self._posicion(11.5 + i * 0.001, i * 5) for i in range(3)]
+        self.assertEqual(len(self.filtro.filtrar(posiciones)[0]), 3)
+        # El INSERT falló: el reintento no debe tomar las mismas posiciones por redundantes
+        self.assertEqual(len(self.filtro.filtrar(posiciones)[0]), 3)
+
+
+class TestBandaMuertaIngesta(TestCase):
+    def setUp(self):
+        banda_muerta.limpiar()
+        self.origen = uuid.uuid4()
+        self.inicio = timezone.now()
+
+    def tearDown(self):
+        banda_muerta.limpiar()
+
+    def _filas(self):
+        return [
+            Posicion(
+                origen_tipo="USUARIO", origen_id=self.origen, latitud=11.5 + i * 0.001, longitud=-72.9,
+                timestamp=self.inicio + timedelta(seconds=5 * i),
+            )
+            for i in range(3)
+        ]
+
+    def test_reintento_tras_insert_fallido(self):
+        with mock.patch("gps.ingest.registrar_ultimas_posiciones", side_effect=DatabaseError("caída")):
+            with self.assertRaises(DatabaseError):
+                registrar_posiciones(self._filas())
+        self.assertFalse(Posicion.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            creadas, descartadas = registrar_posiciones(self._filas())
+        self.assertEqual((len(creadas), len(descartadas)), (3, 0))
+        # Ahora sí es la referencia: repetir la última es redundante
+        self.assertEqual(len(registrar_posiciones(self._filas()[-1:])[1]), 1)
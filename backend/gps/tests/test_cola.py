@@ -0,0 +1,81 @@
+# gps/tests/test_cola.py
+
+from io import StringIO
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+from gps.cola import procesar, reclamar, metricas, MetricasCola
+from gps.filtro import filtro_posiciones
+from gps.models import Posicion, TareaPosicion, EstadoTarea, AlertaGPS
+from rutas.models import Ruta, Bus, RutaParada
+from paradas.models import Parada
+
+User = get_user_model()
+
+
+class TestColaProcesamiento(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin_cola", email="cola@example.com", password="admin12345", identificacion="2"
+        )
+        self.client.force_authenticate(self.admin)
+        metricas.limpiar()
+
+        parada1 = Parada.objects.create(nombre="Parada A", latitud=11.5446, longitud=-72.9060)
+        parada2 = Parada.objects.create(nombre="Parada B", latitud=11.5460, longitud=-72.9050)
+        self.bus = Bus.objects.create(placa="COL123", modelo="Hyundai", capacidad=40)
+        self.ruta = Ruta.objects.create(nombre="Ruta Cola", tipo="ciudad", capacidad_total=40)
+        RutaParada.objects.create(ruta=self.ruta, parada=parada1, orden=1)
+        RutaParada.objects.create(ruta=self.ruta, parada=parada2, orden=2)
+
+    def _fila(self, lat, lon):
+        return {
+            "origen_tipo": "VEHICULO",
+            "origen_id": str(self.bus.id),
+            "latitud": lat,
+            "longitud": lon,
+            "ruta": str(self.ruta.id),
+        }
+
+    def test_ingesta_asincrona_encola_y_trabajador_procesa(self):
+        response = self.client.post(
+            "/api/gps/posiciones/?asincrono=1", self._fila("11.560000", "-72.930000"), format="json"
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(TareaPosicion.objects.filter(estado=EstadoTarea.PENDIENTE).count(), 1)
+        self.assertFalse(AlertaGPS.objects.exists())
+
+        call_command("procesar_cola_gps", "--trabajadores", "1", "--una-vez", stdout=StringIO())
+
+        self.assertEqual(AlertaGPS.objects.filter(tipo="DESVIO").count(), 1)
+        self.assertEqual(TareaPosicion.objects.get().estado, EstadoTarea.COMPLETADA)
+
+    def test_lote_asincrono(self):
+        filas = [self._fila("11.544700", "-72.906100"), self._fila("11.545000", "-72.905800")]
+        response = self.client.post("/api/gps/posiciones/lote/?asincrono=1", filas, format="json")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Posicion.objects.count(), 2)
+        self.assertEqual(TareaPosicion.objects.count(), 2)
+
+        estado = self.client.get("/api/gps/cola/").json()
+        self.assertEqual(estado["pendientes"], 2)
+
+    def test_lote_fallido_se_registra_y_olvida_estado(self):
+        filas = [self._fila("11.544700", "-72.906100"), self._fila("11.545000", "-72.905800")]
+        self.client.post("/api/gps/posiciones/lote/?asincrono=1", filas, format="json")
+        filtro_posiciones.filtrar(self.bus.id, 11.5447, -72.9061, Posicion.objects.first().timestamp)
+
+        with mock.patch("gps.procesamiento.procesar_posiciones", side_effect=[RuntimeError("lote"), None, None]):
+            with self.assertLogs("gps.cola", level="ERROR"):
+                completadas = procesar(reclamar(10))
+
+        self.assertEqual(completadas, 2)
+        self.assertNotIn(self.bus.id, filtro_posiciones._estados)
+        self.assertEqual(TareaPosicion.objects.filter(estado=EstadoTarea.COMPLETADA).count(), 2)
+
+    def test_metricas_del_trabajador_en_el_api(self):
+        # El trabajador corre en otro proceso: su instancia no es la del proceso web
+        MetricasCola().registrar(5, errores=1)
+        datos = self.client.get("/api/gps/cola/").json()
+        self.assertEqual(datos["trabajador"], {"procesadas": 5, "errores": 1})
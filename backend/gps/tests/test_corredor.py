@@ -0,0 +1,94 @@
+# gps/tests/test_corredor.py
+
+from itertools import count
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from gps.corredor import CorredorRuta
+from gps.models import Posicion
+from rutas.models import Ruta, Bus, RutaParada, Desvio, TrazadoRuta
+from paradas.models import Parada
+
+User = get_user_model()
+
+
+class TestCorredorRuta(SimpleTestCase):
+    def test_distancia_a_segmento(self):
+        # Dos vértices separados ~2.2 km en dirección norte
+        corredor = CorredorRuta([11.5400, 11.5600], [-72.9060, -72.9060])
+        distancia, segmento, t = corredor.distancia(11.5500, -72.9060, radio=100)
+        self.assertLess(distancia, 1)
+        self.assertEqual(segmento, 0)
+        self.assertAlmostEqual(t, 0.5, places=2)
+
+        # 0.001° de longitud ≈ 109 m a esta latitud
+        distancia, _, _ = corredor.distancia(11.5500, -72.9050, radio=100)
+        self.assertAlmostEqual(distancia, 109, delta=2)
+
+    def test_ajuste_en_ventana_de_recorrido(self):
+        # Ida hacia el norte y regreso por una calle paralela a ~30 m
+        corredor = CorredorRuta([11.54, 11.55, 11.55, 11.54], [-72.9060, -72.9060, -72.90573, -72.90573])
+        lat, lon = 11.545, -72.90585  # más cerca del regreso que de la ida
+        sin_ventana = corredor.ajustar(lat, lon, 150)
+        self.assertEqual(sin_ventana[1], 2)
+
+        # Viniendo de ~500 m de la ida, la ventana conserva el tramo de ida
+        distancia, segmento, _, recorrido = corredor.ajustar(lat, lon, 150, desde=450, hasta=700)
+        self.assertEqual(segmento, 0)
+        self.assertAlmostEqual(recorrido, 556, delta=5)
+        lat_ajustada, lon_ajustada = corredor.punto(segmento, 0.5)
+        self.assertAlmostEqual(lon_ajustada, -72.9060, places=6)
+
+    def test_poda_por_celdas(self):
+        corredor = CorredorRuta([11.54, 11.55, 11.56, 11.57], [-72.90, -72.90, -72.90, -72.90])
+        px, py = corredor.proyectar(11.565, -72.90)
+        self.assertEqual(list(corredor.candidatos(float(px), float(py), 50)), [2])
+
+    def test_una_sola_parada(self):
+        corredor = CorredorRuta([11.54], [-72.90])
+        distancia, _, _ = corredor.distancia(11.54, -72.90)
+        self.assertEqual(distancia, 0)
+
+
+class TestDesvioPorCorredor(APITestCase):
+    def setUp(self):
+        self.parada1 = Parada.objects.create(nombre="Norte", latitud=11.5600, longitud=-72.9060)
+        self.parada2 = Parada.objects.create(nombre="Sur", latitud=11.5400, longitud=-72.9060)
+        self.bus = Bus.objects.create(placa="COR123", modelo="Hyundai", capacidad=40)
+        # Lecturas cada 30 s: a milisegundos el filtro descartaría los saltos del recorrido
+        self.reloj = (timezone.now() - timedelta(minutes=10) + timedelta(seconds=30 * i) for i in count())
+        self.ruta = Ruta.objects.create(nombre="Ruta Corredor", tipo="ciudad", capacidad_total=40)
+        RutaParada.objects.create(ruta=self.ruta, parada=self.parada1, orden=1)
+        RutaParada.objects.create(ruta=self.ruta, parada=self.parada2, orden=2)
+
+    def _posicion(self, lat, lon):
+        return Posicion.objects.create(
+            origen_tipo="VEHICULO", origen_id=self.bus.id, latitud=lat, longitud=lon, ruta=self.ruta,
+            timestamp=next(self.reloj),
+        )
+
+    def test_bus_entre_paradas_no_es_desvio(self):
+        self._posicion(11.5500, -72.9061)
+        self.assertFalse(Desvio.objects.filter(ruta=self.ruta).exists())
+
+    def test_trazado_cargado_reemplaza_el_de_paradas(self):
+        admin = User.objects.create_superuser(
+            username="admin_cor", email="admin@example.com", password="admin12345", identificacion="2"
+        )
+        self.client.force_authenticate(admin)
+        # Trazado en L por el oeste (GeoJSON usa [lon, lat])
+        geojson = {
+            "type": "LineString",
+            "coordinates": [[-72.9060, 11.5600], [-72.9160, 11.5600], [-72.9160, 11.5400], [-72.9060, 11.5400]],
+        }
+        r = self.client.post(f"/api/rutas/rutas/{self.ruta.id}/trazado/", geojson, format="json")
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(TrazadoRuta.objects.get(ruta=self.ruta).puntos[1], [11.56, -72.916])
+
+        self._posicion(11.5500, -72.9160)
+        self.assertFalse(Desvio.objects.filter(ruta=self.ruta).exists())
+
+        self._posicion(11.5500, -72.9060)
+        self.assertTrue(Desvio.objects.filter(ruta=self.ruta, activo=True).exists())
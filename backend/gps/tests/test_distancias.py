@@ -0,0 +1,28 @@
+# gps/tests/test_distancias.py
+
+from django.test import SimpleTestCase
+from gps.distancias import haversine, equirectangular, distancias, matriz_distancias, distancia_minima
+
+
+class TestDistancias(SimpleTestCase):
+    def test_aproximacion_cercana_a_haversine(self):
+        exacta = haversine(11.5446, -72.9060, 11.5500, -72.9100)
+        aprox = equirectangular(11.5446, -72.9060, 11.5500, -72.9100)
+        self.assertAlmostEqual(float(exacta), 741.92, places=1)
+        self.assertAlmostEqual(float(exacta), float(aprox), places=1)
+
+    def test_uno_a_muchos_y_muchos_a_muchos(self):
+        lats, lons = [11.5446, 11.5460, 11.6000], [-72.9060, -72.9050, -72.9000]
+        d = distancias(11.5446, -72.9060, lats, lons, exacta=True)
+        self.assertEqual(d.shape, (3,))
+        self.assertEqual(float(d[0]), 0.0)
+
+        m = matriz_distancias(lats[:2], lons[:2], lats, lons)
+        self.assertEqual(m.shape, (2, 3))
+        self.assertAlmostEqual(float(m[1, 0]), float(d[1]), places=0)
+
+    def test_distancia_minima(self):
+        self.assertEqual(distancia_minima(0, 0, [], []), (None, None))
+        dist, indice = distancia_minima(11.5459, -72.9050, [11.5446, 11.5460], [-72.9060, -72.9050])
+        self.assertEqual(indice, 1)
+        self.assertLess(dist, 20)
@@ -0,0 +1,70 @@
+# gps/tests/test_eta.py
+
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from gps.models import Posicion
+from rutas.models import Ruta, Bus, RutaParada
+from paradas.models import Parada
+
+User = get_user_model()
+
+
+class TestEta(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username="admin_eta", email="eta@example.com", password="admin12345", identificacion="3"
+        )
+        self.client.force_authenticate(self.admin)
+
+        self.bus = Bus.objects.create(placa="ETA123", modelo="Hyundai", capacidad=40)
+        self.ruta = Ruta.objects.create(nombre="Ruta ETA", tipo="ciudad", capacidad_total=40)
+        # Paradas cada 0.01° (≈ 1.1 km) hacia el norte, planificadas cada 2 minutos
+        self.paradas = []
+        for i in range(3):
+            parada = Parada.objects.create(nombre=f"Parada {i}", latitud=11.50 + i * 0.01, longitud=-72.90)
+            RutaParada.objects.create(
+                ruta=self.ruta, parada=parada, orden=i + 1, tiempo_estimado=timedelta(minutes=2 * i)
+            )
+            self.paradas.append(parada)
+
+    def test_eta_de_paradas_restantes(self):
+        ahora = timezone.now()
+        Posicion.objects.create(
+            origen_tipo="VEHICULO", origen_id=self.bus.id, ruta=self.ruta,
+            latitud=11.505, longitud=-72.90, timestamp=ahora,
+        )
+
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.get(f"/api/gps/eta/{self.ruta.id}/")
+        self.assertFalse(any("rutaparada" in q["sql"].lower() for q in ctx.captured_queries))
+        self.assertEqual(r.status_code, 200)
+
+        vehiculo = r.data["vehiculos"][0]
+        self.assertEqual(vehiculo["vehiculo_id"], str(self.bus.id))
+        self.assertEqual([p["orden"] for p in vehiculo["paradas"]], [2, 3])
+        # Mitad del primer tramo (60 s) más el tramo completo siguiente (120 s)
+        llegadas = [(p["llegada_estimada"] - ahora).total_seconds() for p in vehiculo["paradas"]]
+        self.assertAlmostEqual(llegadas[0], 60, delta=3)
+        self.assertAlmostEqual(llegadas[1], 180, delta=3)
+
+        r = self.client.get(f"/api/gps/eta/{self.ruta.id}/", {"parada_id": str(self.paradas[2].id)})
+        self.assertEqual(len(r.data["vehiculos"][0]["paradas"]), 1)
+
+    def test_velocidad_observada_en_tramo_actual(self):
+        inicio = timezone.now() - timedelta(seconds=30)
+        for i, lat in enumerate([11.502, 11.505]):  # ≈ 333 m en 30 s → 40 km/h
+            Posicion.objects.create(
+                origen_tipo="VEHICULO", origen_id=self.bus.id, ruta=self.ruta,
+                latitud=lat, longitud=-72.90, timestamp=inicio + timedelta(seconds=30 * i),
+            )
+        vehiculo = self.client.get(f"/api/gps/eta/{self.ruta.id}/").data["vehiculos"][0]
+        self.assertAlmostEqual(vehiculo["velocidad_kmh"], 40, delta=1)
+        # 556 m restantes: (50 s a velocidad observada + 60 s planificados) / 2
+        llegada = (vehiculo["paradas"][0]["llegada_estimada"] - vehiculo["actualizada_en"]).total_seconds()
+        self.assertAlmostEqual(llegada, 55, delta=3)
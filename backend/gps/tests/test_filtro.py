@@ -0,0 +1,119 @@
+# gps/tests/test_filtro.py
+
+from datetime import datetime, timedelta, timezone as tz
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from gps.filtro import FiltroPosiciones, ACEPTADA, SUAVIZADA, DESCARTADA
+from gps.models import Posicion, Trayecto, UltimaPosicion
+from rutas.models import Ruta, Bus
+
+T0 = datetime(2026, 1, 1, tzinfo=tz.utc)
+
+
+class TestFiltroPosiciones(SimpleTestCase):
+    def setUp(self):
+        self.filtro = FiltroPosiciones()
+        # ≈ 10 m/s hacia el norte, una lectura cada 10 s
+        for i in range(4):
+            self.assertEqual(self._filtrar(i)[0], ACEPTADA)
+
+    def _filtrar(self, i, dlat=0.0, dlon=0.0, precision=5):
+        return self.filtro.filtrar("bus", 11.5 + i * 0.0009 + dlat, -72.9 + dlon, T0 + timedelta(seconds=10 * i), precision)
+
+    def test_salto_descartado(self):
+        resultado, _, _ = self._filtrar(4, dlat=0.02)  # ≈ 2,2 km en 10 s
+        self.assertEqual(resultado, DESCARTADA)
+        self.assertEqual(self._filtrar(5)[0], ACEPTADA)
+
+    def test_lectura_imprecisa_suavizada(self):
+        resultado, _, lon = self._filtrar(4, dlon=0.0004, precision=40)  # ≈ 44 m de costado
+        self.assertEqual(resultado, SUAVIZADA)
+        self.assertLess(abs(lon + 72.9), 0.0003)
+
+    def test_reinicio_tras_descartes_seguidos(self):
+        resultados = [self._filtrar(4 + i, dlat=0.2)[0] for i in range(3)]
+        self.assertEqual(resultados, [DESCARTADA, DESCARTADA, ACEPTADA])
+
+    def test_fuera_de_orden_no_altera_estado(self):
+        self.assertEqual(self._filtrar(1, dlat=0.5)[0], ACEPTADA)
+        self.assertEqual(self._filtrar(4)[0], ACEPTADA)
+
+    def test_lecturas_muy_proximas_no_reanclan(self):
+        # Repetida a milisegundos: pasa sin tocar el estado
+        momento = T0 + timedelta(seconds=30, milliseconds=5)
+        self.assertEqual(self.filtro.filtrar("bus", 11.5 + 3 * 0.0009, -72.9, momento)[0], ACEPTADA)
+        # Con jitter de ≈ 11 km no pasa ni mueve la referencia: la siguiente lectura buena sigue valiendo
+        self.assertEqual(self.filtro.filtrar("bus", 11.6, -72.9, momento)[0], DESCARTADA)
+        self.assertEqual(self._filtrar(4)[0], ACEPTADA)
+        self.assertEqual(self._filtrar(5, dlat=0.1)[0], DESCARTADA)
+
+
+class TestManiobras(SimpleTestCase):
+    """Un bus urbano real: curvas y arranques no deben perder lecturas."""
+
+    def setUp(self):
+        self.filtro = FiltroPosiciones()
+
+    def _recorrer(self, puntos, intervalo, precision=8):
+        """puntos en metros (x al este, y al norte) desde el origen; devuelve los resultados."""
+        resultados = []
+        for i, (x, y) in enumerate(puntos):
+            lat = 11.5 + y / 111320.0
+            lon = -72.9 + x / (111320.0 * 0.98)
+            resultados.append(self.filtro.filtrar("bus", lat, lon, T0 + timedelta(seconds=intervalo * i), precision)[0])
+        return resultados
+
+    def test_curva_de_90_grados(self):
+        for intervalo in (5, 10, 30):
+            for velocidad in (8, 15):
+                with self.subTest(intervalo=intervalo, velocidad=velocidad):
+                    self.filtro.limpiar()
+                    paso = velocidad * intervalo
+                    puntos = [(0, i * paso) for i in range(6)] + [(i * paso, 5 * paso) for i in range(1, 7)]
+                    self.assertNotIn(DESCARTADA, self._recorrer(puntos, intervalo))
+
+    def test_arranque_acelerando(self):
+        for intervalo in (5, 10, 30):
+            with self.subTest(intervalo=intervalo):
+                self.filtro.limpiar()
+                # Detenido y luego 2 m/s² hasta ≈ 15 m/s
+                puntos = [(0, 0)] * 3
+                for i in range(1, 6):
+                    t = min(i * intervalo, 7.5)
+                    y = 0.5 * 2 * t * t + 15 * max(i * intervalo - 7.5, 0)
+                    puntos.append((0, y))
+                self.assertNotIn(DESCARTADA, self._recorrer(puntos, intervalo))
+
+
+class TestEtapaFiltro(TestCase):
+    def setUp(self):
+        self.bus = Bus.objects.create(placa="FIL123", modelo="Hyundai", capacidad=40)
+        self.ruta = Ruta.objects.create(nombre="Ruta Filtro", tipo="ciudad", capacidad_total=40)
+        self.inicio = timezone.now() - timedelta(minutes=10)
+        self.trayecto = Trayecto.objects.create(ruta=self.ruta, fecha_inicio=self.inicio)
+
+    def test_salto_no_suma_distancia(self):
+        # 0.005° de latitud ≈ 556 m cada 60 s; la tercera lectura salta ≈ 5,5 km
+        for i in range(5):
+            latitud = 11.50 + i * 0.005 + (0.05 if i == 2 else 0)
+            Posicion.objects.create(
+                origen_tipo="VEHICULO", origen_id=self.bus.id, ruta=self.ruta,
+                latitud=latitud, longitud=-72.90, timestamp=self.inicio + timedelta(minutes=i + 1),
+            )
+
+        salto = Posicion.objects.get(latitud=11.56)
+        self.assertEqual(salto.filtro, "DESCARTADA")
+        self.assertIsNone(salto.trayecto_id)
+        trayecto = Trayecto.objects.get(pk=self.trayecto.pk)
+        self.assertEqual(trayecto.posiciones_registradas, 4)
+        self.assertAlmostEqual(trayecto.distancia_acumulada_m, 4 * 556, delta=30)
+        self.assertEqual(Posicion.objects.filter(filtro__isnull=True).count(), 4)
+
+    def test_ultima_posicion_no_queda_en_el_salto(self):
+        for i, latitud in enumerate([11.500, 11.505, 11.600]):
+            Posicion.objects.create(
+                origen_tipo="VEHICULO", origen_id=self.bus.id, ruta=self.ruta,
+                latitud=latitud, longitud=-72.90, timestamp=self.inicio + timedelta(minutes=i + 1),
+            )
+        ultima = UltimaPosicion.objects.get(origen_id=self.bus.id)
+        self.assertLess(float(ultima.latitud), 11.51)
@@ -0,0 +1,107 @@
+# gps/tests/test_geocercas.py
+
+from itertools import count
+from datetime import timedelta
+import uuid
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from gps.alertas import coalescedor
+from gps.geocercas import IndiceZonas, indice_zonas, puntos_en_poligono, TIPO_ALERTA
+from gps.models import AlertaGPS, EventoZona, Posicion, PresenciaZona
+from rutas.models import Ruta, Bus, RutaParada
+from paradas.models import Parada, ZonaParada
+
+User = get_user_model()
+
+# Zona cuadrada alrededor de la Parada A
+CUADRADO = [[11.5430, -72.9080], [11.5430, -72.9040], [11.5470, -72.9040], [11.5470, -72.9080]]
+
+
+class TestPuntosEnPoligono(SimpleTestCase):
+    def test_poligono_concavo(self):
+        # Una "L": el hueco de la esquina superior derecha queda fuera
+        ele = np.asarray([[0, 0], [0, 2], [1, 2], [1, 1], [2, 1], [2, 0]], dtype=float)
+        lats = [0.5, 1.5, 1.5, 0.5, 3.0]
+        lons = [0.5, 0.5, 1.5, 1.5, 0.5]
+        self.assertEqual(puntos_en_poligono(lats, lons, ele).tolist(), [True, True, False, True, False])
+
+
+class TestGeocercas(APITestCase):
+    def setUp(self):
+        coalescedor.limpiar()
+        indice_zonas.invalidar()
+        self.admin = User.objects.create_superuser(
+            username="admin_zonas", email="zonas@example.com", password="admin12345", identificacion="7"
+        )
+        self.client.force_authenticate(self.admin)
+        # Lecturas cada minuto: a milisegundos el filtro descartaría los saltos entre zonas
+        self.reloj = (timezone.now() - timedelta(minutes=5) + timedelta(minutes=i) for i in count())
+        self.zona = ZonaParada.objects.create(nombre="Centro", poligono=CUADRADO)
+        ZonaParada.objects.create(nombre="Sin geocerca")
+        parada = Parada.objects.create(nombre="Parada A", latitud=11.5446, longitud=-72.9060, zona=self.zona)
+        self.bus = Bus.objects.create(placa="ZON123", modelo="Hyundai", capacidad=40)
+        self.ruta = Ruta.objects.create(nombre="Ruta Zonas", tipo="ciudad", capacidad_total=40)
+        RutaParada.objects.create(ruta=self.ruta, parada=parada, orden=1)
+
+    def tearDown(self):
+        coalescedor.limpiar()
+        indice_zonas.invalidar()
+
+    def _posicion(self, lat, lon, origen_tipo="VEHICULO", origen_id=None):
+        return Posicion.objects.create(
+            origen_tipo=origen_tipo, origen_id=origen_id or self.bus.id, latitud=lat, longitud=lon,
+            ruta=self.ruta if origen_tipo == "VEHICULO" else None, timestamp=next(self.reloj),
+        )
+
+    def test_indice_solo_zonas_con_poligono(self):
+        self.assertEqual(len(indice_zonas), 1)
+        self.assertEqual(indice_zonas.zonas_ruta(self.ruta.id), {self.zona.id})
+        self.assertEqual(indice_zonas.clasificar([11.5446, 11.5600], [-72.9060, -72.9060]), [{self.zona.id}, set()])
+
+    def test_invalidacion_en_otro_proceso(self):
+        otro = IndiceZonas()
+        self.assertEqual(len(otro), 1)
+        ZonaParada.objects.filter(pk=self.zona.pk).update(poligono=[])  # sin señales
+        indice_zonas.invalidar()
+        self.assertEqual(len(otro), 0)
+
+    def test_entrada_y_salida(self):
+        self._posicion(11.5446, -72.9060)
+        self._posicion(11.5450, -72.9055)
+        self.assertTrue(PresenciaZona.objects.filter(zona=self.zona, origen_id=self.bus.id).exists())
+
+        self._posicion(11.5600, -72.9060)
+        tipos = list(EventoZona.objects.filter(zona=self.zona).order_by("timestamp").values_list("tipo", flat=True))
+        self.assertEqual(tipos, ["ENTRADA", "SALIDA"])
+        self.assertFalse(PresenciaZona.objects.filter(origen_id=self.bus.id).exists())
+
+        r = self.client.get("/api/gps/eventos-zona/", {"zona_id": str(self.zona.id), "tipo": "SALIDA"})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(r.data["results"]), 1)
+        self.assertEqual(r.data["results"][0]["zona_nombre"], "Centro")
+
+    def test_alerta_fuera_de_zona(self):
+        self._posicion(11.5446, -72.9060)
+        self.assertFalse(AlertaGPS.objects.filter(tipo=TIPO_ALERTA).exists())
+
+        self._posicion(11.5600, -72.9060)
+        self._posicion(11.5610, -72.9060)
+        alerta = AlertaGPS.objects.get(tipo=TIPO_ALERTA)
+        self.assertEqual(alerta.ocurrencias, 2)
+
+        self._posicion(11.5446, -72.9060)
+        alerta.refresh_from_db()
+        self.assertTrue(alerta.resuelta)
+
+    def test_ocupacion(self):
+        usuario = uuid.uuid4()
+        self._posicion(11.5446, -72.9060)
+        self._posicion(11.5440, -72.9070, origen_tipo="USUARIO", origen_id=usuario)
+
+        r = self.client.get("/api/gps/ocupacion-zonas/")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(r.data), 1)
+        self.assertEqual((r.data[0]["nombre"], r.data[0]["vehiculos"], r.data[0]["usuarios"]), ("Centro", 1, 1))
@@ -0,0 +1,47 @@
+# gps/tests/test_geometria.py
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from gps.geometria import obtener_geometria
+from gps.models import Posicion
+from gps.procesamiento import procesar_posiciones
+from rutas.models import Ruta, RutaParada
+from paradas.models import Parada
+
+
+class TestGeometriaRuta(TestCase):
+    def setUp(self):
+        self.parada1 = Parada.objects.create(nombre="Parada A", latitud=11.5446, longitud=-72.9060)
+        self.parada2 = Parada.objects.create(nombre="Parada B", latitud=11.5460, longitud=-72.9050)
+        self.ruta = Ruta.objects.create(nombre="Ruta Geo", tipo="ciudad", capacidad_total=40)
+        RutaParada.objects.create(ruta=self.ruta, parada=self.parada2, orden=2)
+        RutaParada.objects.create(ruta=self.ruta, parada=self.parada1, orden=1)
+
+    def test_geometria_ordenada(self):
+        geometria = obtener_geometria(self.ruta.id)
+        self.assertEqual(geometria.parada_ids, (self.parada1.id, self.parada2.id))
+        self.assertEqual(list(geometria.puntos())[0], (11.5446, -72.906))
+
+    def test_sin_consultas_de_paradas_por_posicion(self):
+        obtener_geometria(self.ruta.id)
+        with CaptureQueriesContext(connection) as ctx:
+            procesar_posiciones([
+                Posicion(origen_tipo="VEHICULO", origen_id=self.ruta.id, latitud=11.5447,
+                         longitud=-72.9061, ruta=self.ruta)
+            ])
+        self.assertFalse(any("rutaparada" in q["sql"].lower() for q in ctx.captured_queries))
+
+    def test_invalidacion_por_cambios(self):
+        self.assertEqual(len(obtener_geometria(self.ruta.id)), 2)
+
+        parada3 = Parada.objects.create(nombre="Parada C", latitud=11.5470, longitud=-72.9040)
+        RutaParada.objects.create(ruta=self.ruta, parada=parada3, orden=3)
+        self.assertEqual(len(obtener_geometria(self.ruta.id)), 3)
+
+        parada3.latitud = 11.5480
+        parada3.save()
+        self.assertEqual(list(obtener_geometria(self.ruta.id).puntos())[-1][0], 11.548)
+
+        parada3.delete()
+        self.assertEqual(len(obtener_geometria(self.ruta.id)), 2)
@@ -0,0 +1,119 @@
+# gps/tests/test_historico.py
+
+import random
+from datetime import timedelta
+from io import StringIO
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from gps.geometria import obtener_geometria
+from gps.historico import pasos_por_paradas, tiempos_historicos
+from gps.models import Posicion, Trayecto, TiempoTramoHistorico
+from gps.percentiles import P2Cuantil
+from rutas.models import Ruta, Bus, RutaParada
+from paradas.models import Parada
+
+
+class TestP2Cuantil(SimpleTestCase):
+    def test_aproxima_percentiles(self):
+        valores = list(range(1, 1001))
+        random.Random(7).shuffle(valores)
+        p50, p90 = P2Cuantil(0.5), P2Cuantil(0.9)
+        for valor in valores:
+            p50.agregar(valor)
+            p90.agregar(valor)
+        self.assertAlmostEqual(p50.valor(), 500, delta=25)
+        self.assertAlmostEqual(p90.valor(), 900, delta=25)
+
+    def test_estado_serializable(self):
+        estimador = P2Cuantil(0.5)
+        for valor in (5, 1, 3):
+            estimador.agregar(valor)
+        self.assertEqual(estimador.valor(), 3)
+        reanudado = P2Cuantil(0.5, estimador.estado())
+        for valor in (2, 4, 6):
+            reanudado.agregar(valor)
+        self.assertAlmostEqual(reanudado.valor(), 3.5, delta=0.6)
+
+    def test_pasos_interpolados(self):
+        inicio = timezone.now()
+        observaciones = [(0, inicio), (400, inicio + timedelta(seconds=40)), (1200, inicio + timedelta(seconds=120))]
+        pasos = pasos_por_paradas(observaciones, [0, 200, 1000, 1500])
+        self.assertEqual(pasos[0], inicio)
+        self.assertEqual((pasos[1] - inicio).total_seconds(), 20)
+        self.assertEqual((pasos[2] - inicio).total_seconds(), 100)
+        self.assertNotIn(3, pasos)  # el vehículo no llegó a la última parada
+
+
+class TestAgregacionTiemposTramo(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.bus = Bus.objects.create(placa="HIS123", modelo="Hyundai", capacidad=40)
+        self.ruta = Ruta.objects.create(nombre="Ruta Histórica", tipo="ciudad", capacidad_total=40)
+        self.paradas = []
+        for i in range(3):
+            parada = Parada.objects.create(nombre=f"Parada {i}", latitud=11.50 + i * 0.01, longitud=-72.90)
+            RutaParada.objects.create(ruta=self.ruta, parada=parada, orden=i + 1)
+            self.paradas.append(parada)
+
+    def _trayecto(self, inicio, segundos_por_tramo):
+        trayecto = Trayecto.objects.create(ruta=self.ruta, fecha_inicio=inicio)
+        Trayecto.objects.filter(pk=trayecto.pk).update(finalizado=True, fecha_fin=inicio + timedelta(hours=1))
+        # Una posición cada décima de tramo, desde antes de la primera parada
+        posiciones = []
+        for paso in range(-1, 21):
+            posiciones.append(Posicion(
+                origen_tipo="VEHICULO", origen_id=self.bus.id, ruta=self.ruta,
+                latitud=11.50 + paso * 0.001, longitud=-72.90,
+                timestamp=inicio + timedelta(seconds=(paso + 1) * segundos_por_tramo / 10),
+            ))
+        Posicion.objects.bulk_create(posiciones)
+        Posicion.objects.filter(id__in=[p.id for p in posiciones]).update(trayecto=trayecto)
+        return trayecto
+
+    def test_comando_incremental(self):
+        # Al inicio de la hora, para que los tres trayectos caigan en la misma franja
+        inicio = timezone.localtime().replace(minute=0, second=0, microsecond=0) - timedelta(days=1)
+        for i, segundos in enumerate((100, 120, 140)):
+            self._trayecto(inicio + timedelta(minutes=5 * i), segundos)
+
+        call_command("agregar_tiempos_tramo", stdout=StringIO())
+
+        tramo = TiempoTramoHistorico.objects.get(parada_origen=self.paradas[0], parada_destino=self.paradas[1])
+        self.assertEqual(tramo.muestras, 3)
+        self.assertAlmostEqual(tramo.media_segundos, 120, delta=2)
+        self.assertAlmostEqual(tramo.p50_segundos, 120, delta=2)
+        self.assertFalse(Trayecto.objects.filter(tiempos_agregados=False).exists())
+
+        # Una segunda ejecución no vuelve a sumar los mismos trayectos
+        call_command("agregar_tiempos_tramo", stdout=StringIO())
+        tramo.refresh_from_db()
+        self.assertEqual(tramo.muestras, 3)
+
+        TiempoTramoHistorico.objects.update(dia_semana=timezone.localtime().weekday(), hora=timezone.localtime().hour)
+        tiempos = tiempos_historicos(obtener_geometria(self.ruta.id))
+        self.assertAlmostEqual(tiempos[0], 120, delta=2)
+
+
+class TestDuracionApi(APITestCase):
+    def setUp(self):
+        admin = get_user_model().objects.create_superuser(
+            username="admin_tramos", email="tramos@example.com", password="admin12345", identificacion="9"
+        )
+        self.client.force_authenticate(admin)
+        self.ruta = Ruta.objects.create(nombre="Ruta Duración", tipo="ciudad", capacidad_total=40)
+        self.url = "/api/gps/tiempos-tramo/duracion/"
+
+    def test_franja_fuera_de_rango_es_400(self):
+        for dia, hora in (("7", "8"), ("1", "24"), ("lunes", "8"), ("1", "-1")):
+            r = self.client.get(self.url, {"ruta_id": str(self.ruta.id), "dia_semana": dia, "hora": hora})
+            self.assertEqual(r.status_code, 400, (dia, hora))
+        r = self.client.get("/api/gps/tiempos-tramo/", {"hora": "x"})
+        self.assertEqual(r.status_code, 400)
+
+        r = self.client.get(self.url, {"ruta_id": str(self.ruta.id), "dia_semana": "0", "hora": "0"})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual((r.data["dia_semana"], r.data["hora"], r.data["tramos"]), (0, 0, 0))
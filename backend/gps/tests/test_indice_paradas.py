@@ -0,0 +1,79 @@
+# gps/tests/test_indice_paradas.py
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from cupos.models import Cupo, EstadoCupo
+from gps.indice_paradas import IndiceParadas, indice_paradas
+from gps.models import Posicion
+from rutas.models import Ruta, RutaParada
+from paradas.models import Parada
+
+User = get_user_model()
+
+
+class TestIndiceParadas(TestCase):
+    def setUp(self):
+        indice_paradas.limpiar()
+        self.parada1 = Parada.objects.create(nombre="Parada A", latitud=11.5446, longitud=-72.9060)
+        self.parada2 = Parada.objects.create(nombre="Parada B", latitud=11.5600, longitud=-72.9060)
+
+    def test_consulta_por_radio(self):
+        cercanas = indice_paradas.cercanas(11.5447, -72.9061, 100)
+        self.assertEqual([p for p, _ in cercanas], [self.parada1.id])
+        self.assertEqual(indice_paradas.cercanas(11.5520, -72.9060, 100), [])
+
+    def test_actualizacion_incremental(self):
+        indice_paradas.cercanas(11.5446, -72.9060, 100)  # fuerza la carga
+
+        self.parada1.desactivar()
+        self.assertEqual(indice_paradas.cercanas(11.5446, -72.9060, 100), [])
+
+        self.parada1.activar()
+        self.parada1.latitud, self.parada1.longitud = 11.5520, -72.9060
+        self.parada1.save()
+        self.assertEqual(indice_paradas.cercanas(11.5446, -72.9060, 100), [])
+        self.assertEqual(indice_paradas.cercanas(11.5520, -72.9060, 50)[0][0], self.parada1.id)
+
+        self.parada2.delete()
+        self.assertEqual(indice_paradas.cercanas(11.5600, -72.9060, 100), [])
+
+    def test_cambio_en_otro_proceso(self):
+        # Otra instancia hace de índice de otro proceso: comparten solo la caché
+        otro = IndiceParadas()
+        self.assertEqual(len(otro.cercanas(11.5446, -72.9060, 100)), 1)
+        indice_paradas.cercanas(11.5446, -72.9060, 100)
+
+        Parada.objects.filter(pk=self.parada1.pk).update(activa=False)  # sin señales
+        indice_paradas.actualizar(self.parada1.id, None, None, activa=False)
+        self.assertEqual(otro.cercanas(11.5446, -72.9060, 100), [])
+
+        # Si la versión se expulsa de la caché, renace distinta y se recarga
+        Parada.objects.filter(pk=self.parada1.pk).update(activa=True)
+        cache.delete(otro._compartida.clave)
+        self.assertEqual(len(otro.cercanas(11.5446, -72.9060, 100)), 1)
+
+
+class TestConfirmacionUsuario(TestCase):
+    def setUp(self):
+        indice_paradas.limpiar()
+        self.usuario = User.objects.create_user(username="est", password="pass12345", identificacion="3")
+        self.parada_ruta = Parada.objects.create(nombre="En ruta", latitud=11.5446, longitud=-72.9060)
+        self.parada_otra = Parada.objects.create(nombre="Otra", latitud=11.5600, longitud=-72.9060)
+        self.ruta = Ruta.objects.create(nombre="Ruta Cupo", tipo="ciudad", capacidad_total=40)
+        RutaParada.objects.create(ruta=self.ruta, parada=self.parada_ruta, orden=1)
+        self.cupo = Cupo.objects.create(usuario=self.usuario, ruta=self.ruta)
+
+    def _posicion(self, lat, lon):
+        Posicion.objects.create(origen_tipo="USUARIO", origen_id=self.usuario.id, latitud=lat, longitud=lon)
+        self.cupo.refresh_from_db()
+
+    def test_no_confirma_en_parada_de_otra_ruta(self):
+        self._posicion(11.5600, -72.9060)
+        self.assertEqual(self.cupo.estado, EstadoCupo.RESERVADO)
+
+    def test_confirma_en_parada_de_su_ruta(self):
+        with self.assertLogs("gps.procesamiento", "INFO") as registro:
+            self._posicion(11.5447, -72.9061)
+        self.assertEqual(self.cupo.estado, EstadoCupo.CONFIRMADO)
+        self.assertIn(f"Cupo {self.cupo.pk} confirmado", registro.output[0])
@@ -0,0 +1,93 @@
+# gps/tests/test_ingest.py
+
+from datetime import datetime, timezone
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from gps.binario import codificar_lote, MEDIA_TYPE
+from gps.models import Posicion, AlertaGPS
+from rutas.models import Ruta, Bus, RutaParada, Desvio
+from paradas.models import Parada
+
+User = get_user_model()
+
+
+class TestLotePosiciones(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin_gps", email="admin@example.com", password="admin12345", identificacion="1"
+        )
+        self.client.force_authenticate(self.admin)
+
+        self.parada1 = Parada.objects.create(nombre="Parada A", latitud=11.5446, longitud=-72.9060)
+        self.parada2 = Parada.objects.create(nombre="Parada B", latitud=11.5460, longitud=-72.9050)
+        self.bus = Bus.objects.create(placa="LOT123", modelo="Hyundai", capacidad=40)
+        self.ruta = Ruta.objects.create(nombre="Ruta Lote", tipo="ciudad", capacidad_total=40)
+        RutaParada.objects.create(ruta=self.ruta, parada=self.parada1, orden=1)
+        RutaParada.objects.create(ruta=self.ruta, parada=self.parada2, orden=2)
+
+    def _fila(self, lat, lon, **extra):
+        fila = {
+            "origen_tipo": "VEHICULO",
+            "origen_id": str(self.bus.id),
+            "latitud": lat,
+            "longitud": lon,
+            "ruta": str(self.ruta.id),
+        }
+        fila.update(extra)
+        return fila
+
+    def test_lote_crea_posiciones_y_reporta_errores(self):
+        filas = [
+            self._fila("11.544700", "-72.906100"),
+            self._fila("11.545000", "-72.905800"),
+            self._fila("95.000000", "-72.905800"),
+        ]
+        r = self.client.post("/api/gps/posiciones/lote/", {"posiciones": filas}, format="json")
+
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(r.data["creadas"], 2)
+        self.assertEqual(len(r.data["errores"]), 1)
+        self.assertEqual(r.data["errores"][0]["indice"], 2)
+        self.assertEqual(Posicion.objects.count(), 2)
+
+    def test_lote_detecta_desvio_una_vez(self):
+        filas = [
+            self._fila("11.550000", "-72.910000", timestamp="2025-01-01T10:00:00Z"),
+            self._fila("11.550100", "-72.910100", timestamp="2025-01-01T10:00:05Z"),
+        ]
+        r = self.client.post("/api/gps/posiciones/lote/", filas, format="json")
+
+        self.assertEqual(r.status_code, 201)
+        self.assertTrue(Desvio.objects.filter(ruta=self.ruta, activo=True).exists())
+        # Un solo desvío abierto y una sola alerta, no una por fila
+        self.assertEqual(AlertaGPS.objects.filter(ruta=self.ruta).count(), 1)
+
+    def test_lote_vacio(self):
+        r = self.client.post("/api/gps/posiciones/lote/", [], format="json")
+        self.assertEqual(r.status_code, 400)
+
+    def test_lote_binario(self):
+        momento = datetime(2025, 1, 1, 10, 0, tzinfo=timezone.utc)
+        cuerpo = codificar_lote("VEHICULO", self.bus.id, [
+            (11.5447, -72.9061, momento, 4.5),
+            (11.5450, -72.9058, momento, None),
+            (95.0, -72.9058, momento, None),
+        ], ruta_id=self.ruta.id)
+        self.assertEqual(len(cuerpo), 40 + 3 * 14)
+
+        r = self.client.post("/api/gps/posiciones/lote/", cuerpo, content_type=MEDIA_TYPE)
+
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(r.data["creadas"], 2)
+        self.assertEqual(r.data["errores"][0]["indice"], 2)
+        posicion = Posicion.objects.get(precision__isnull=False)
+        self.assertEqual(posicion.latitud, Decimal("11.544700"))
+        self.assertEqual(posicion.precision, Decimal("4.50"))
+        self.assertEqual(posicion.timestamp, momento)
+        self.assertEqual(posicion.ruta_id, self.ruta.id)
+
+    def test_lote_binario_truncado(self):
+        cuerpo = codificar_lote("VEHICULO", self.bus.id, [(11.5447, -72.9061, datetime.now(timezone.utc), None)])
+        r = self.client.post("/api/gps/posiciones/lote/", cuerpo[:-3], content_type=MEDIA_TYPE)
+        self.assertEqual(r.status_code, 400)
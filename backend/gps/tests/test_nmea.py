@@ -0,0 +1,143 @@
+# gps/tests/test_nmea.py
+
+import asyncio
+from datetime import datetime, timezone as dt_timezone
+from functools import reduce
+from unittest import mock
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase
+from gps.models import Posicion, UltimaPosicion
+from gps.nmea import ReceptorNMEA, SesionNMEA, SentenciaInvalida
+from rutas.models import Ruta, Bus, BusRuta
+
+
+def sentencia(cuerpo):
+    checksum = reduce(lambda a, b: a ^ b, cuerpo.encode(), 0)
+    return f"${cuerpo}*{checksum:02X}"
+
+
+RMC = sentencia("GPRMC,123519.00,A,1132.676,N,07254.360,W,022.4,084.4,170126,003.1,W")
+GGA = sentencia("GPGGA,123520.00,1132.680,N,07254.350,W,1,08,1.2,545.4,M,46.9,M,,")
+
+
+class TestSesionNMEA(SimpleTestCase):
+    def test_rmc(self):
+        timestamp, lat, lon, precision = SesionNMEA("X").procesar(RMC)
+        self.assertEqual(timestamp, datetime(2026, 1, 17, 12, 35, 19, tzinfo=dt_timezone.utc))
+        self.assertAlmostEqual(lat, 11.5446, places=4)
+        self.assertAlmostEqual(lon, -72.9060, places=4)
+        self.assertIsNone(precision)
+
+    def test_gga_aporta_precision_y_no_duplica(self):
+        sesion = SesionNMEA("X")
+        sesion.procesar(RMC)
+        self.assertIsNone(sesion.procesar(GGA))
+        self.assertEqual(sesion.procesar(RMC)[3], 6)  # HDOP 1.2 × 5 m
+
+    def test_solo_gga(self):
+        timestamp, lat, _, precision = SesionNMEA("X").procesar(GGA)
+        self.assertEqual((timestamp.hour, timestamp.minute, timestamp.second), (12, 35, 20))
+        self.assertAlmostEqual(lat, 11.5447, places=4)
+        self.assertEqual(precision, 6)
+
+    def test_sin_fijo_e_invalidas(self):
+        sesion = SesionNMEA("X")
+        self.assertIsNone(sesion.procesar(sentencia("GPRMC,123519,V,,,,,,,170126,,")))
+        with self.assertRaises(SentenciaInvalida):
+            sesion.procesar(RMC[:-2] + "00")
+        with self.assertRaises(SentenciaInvalida):
+            sesion.procesar("basura")
+
+    def test_identificacion(self):
+        sesion = SesionNMEA()
+        self.assertIsNone(sesion.procesar(sentencia("PDID,867530")))
+        self.assertEqual(sesion.dispositivo, "867530")
+
+
+class TestReceptorNMEA(TestCase):
+    def setUp(self):
+        self.bus = Bus.objects.create(placa="NME123", modelo="Hyundai", capacidad=40, dispositivo_id="867530")
+        self.ruta = Ruta.objects.create(nombre="Ruta NMEA", tipo="ciudad", capacidad_total=40)
+        BusRuta.objects.create(bus=self.bus, ruta=self.ruta)
+        self.receptor = ReceptorNMEA(lote=2)
+        self.assertEqual(self.receptor.cargar_dispositivos(), 1)
+
+    def tearDown(self):
+        self.receptor.cerrar()
+
+    def test_lote_por_la_ingesta(self):
+        sesion = SesionNMEA("867530")
+        desconocida = SesionNMEA("000000")
+        for i in range(3):
+            self.receptor.recibir(sesion, sentencia(f"GPRMC,12352{i}.00,A,1132.6{i}0,N,07254.360,W,,,170126,,"))
+        self.receptor.recibir(desconocida, RMC)
+
+        with self.assertNumQueries(0):
+            self.receptor.recibir(sesion, "$GPRMC,roto*00")
+        self.assertEqual(self.receptor.vaciar(), 3)
+
+        posiciones = Posicion.objects.filter(origen_id=self.bus.id)
+        self.assertEqual(posiciones.count(), 3)
+        self.assertEqual(set(posiciones.values_list("ruta_id", flat=True)), {self.ruta.id})
+        self.assertTrue(UltimaPosicion.objects.filter(origen_id=self.bus.id).exists())
+        resumen = self.receptor.resumen()
+        self.assertEqual((resumen["lotes"], resumen["sin_dispositivo"], resumen["invalidas"]), (2, 1, 1))
+
+    def test_lote_no_guardado_vuelve_a_la_espera(self):
+        self.receptor.max_pendientes = 3
+        sesion = SesionNMEA("867530")
+        for i in range(4):
+            self.receptor.recibir(sesion, sentencia(f"GPRMC,12352{i}.00,A,1132.6{i}0,N,07254.360,W,,,170126,,"))
+        self.assertEqual(self.receptor.resumen()["perdidos"], 1)
+
+        def caida(posiciones):
+            # Falla dentro de la transacción del INSERT; mientras tanto llega otro fijo
+            if not self.receptor.resumen()["pendientes"]:
+                self.receptor.recibir(sesion, sentencia("GPRMC,123525.00,A,1132.650,N,07254.360,W,,,170126,,"))
+            raise OperationalError("database is locked")
+
+        with mock.patch("gps.ingest.registrar_ultimas_posiciones", side_effect=caida), \
+                self.assertLogs("gps.nmea", "ERROR"):
+            self.assertEqual(self.receptor.vaciar(), 0)
+        resumen = self.receptor.resumen()
+        self.assertEqual((resumen["pendientes"], resumen["perdidos"], resumen["errores"]), (3, 2, 2))
+        self.assertFalse(Posicion.objects.exists())
+
+        # El reintento guarda las tres: la banda muerta no recordó el lote revertido
+        self.assertEqual(self.receptor.vaciar(), 3)
+        self.assertEqual(Posicion.objects.filter(origen_id=self.bus.id).count(), 3)
+
+    def test_analisis_fallido_no_se_reintenta(self):
+        self.receptor.diferido = False
+        sesion = SesionNMEA("867530")
+        for i in range(3):
+            self.receptor.recibir(sesion, sentencia(f"GPRMC,12352{i}.00,A,1132.6{i}0,N,07254.360,W,,,170126,,"))
+
+        with mock.patch("gps.nmea.procesar_posiciones", side_effect=RuntimeError("etapa")), \
+                self.assertLogs("gps.nmea", "ERROR"):
+            self.assertEqual(self.receptor.vaciar(), 3)
+        resumen = self.receptor.resumen()
+        self.assertEqual((resumen["pendientes"], resumen["errores"], resumen["errores_analisis"]), (0, 0, 2))
+
+        self.assertEqual(self.receptor.vaciar(), 0)
+        self.assertEqual(Posicion.objects.filter(origen_id=self.bus.id).count(), 3)
+
+    def test_tcp_y_udp(self):
+        async def probar():
+            servidor = await asyncio.start_server(self.receptor.atender_tcp, "127.0.0.1", 0)
+            puerto = servidor.sockets[0].getsockname()[1]
+            _, writer = await asyncio.open_connection("127.0.0.1", puerto)
+            writer.write(f"{sentencia('PDID,867530')}\r\n{RMC}\r\n".encode())
+            await writer.drain()
+            writer.close()
+            for _ in range(100):
+                if self.receptor.resumen()["sentencias"] == 2:
+                    break
+                await asyncio.sleep(0.01)
+            servidor.close()
+            await servidor.wait_closed()
+
+        asyncio.run(probar())
+        self.assertEqual(self.receptor.resumen()["fijos"], 1)
+        self.receptor.recibir_datagrama(f"{sentencia('PDID,867530')}\n{GGA}\n".encode(), ("10.0.0.1", 4000))
+        self.assertEqual(self.receptor.resumen()["fijos"], 2)
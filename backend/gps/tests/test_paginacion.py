@@ -0,0 +1,76 @@
+# gps/tests/test_paginacion.py
+
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from gps.models import AlertaGPS, Posicion
+from rutas.models import Ruta, Bus
+
+User = get_user_model()
+
+
+class TestPaginacionKeyset(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin_pag", email="pag@example.com", password="admin12345", identificacion="6"
+        )
+        self.client.force_authenticate(self.admin)
+        self.bus = Bus.objects.create(placa="PAG123", modelo="Hyundai", capacidad=40)
+        self.ruta = Ruta.objects.create(nombre="Ruta Paginada", tipo="ciudad", capacidad_total=40)
+        ahora = timezone.now()
+        # 45 posiciones; de a pares comparten timestamp para ejercitar el desempate por id
+        Posicion.objects.bulk_create([
+            Posicion(
+                origen_tipo="VEHICULO", origen_id=self.bus.id, ruta=self.ruta,
+                latitud=11.5, longitud=-72.9, timestamp=ahora - timedelta(seconds=i // 2),
+            )
+            for i in range(45)
+        ])
+
+    def _recorrer(self, url, params=None):
+        vistas, paginas = [], 0
+        r = self.client.get(url, params)
+        while True:
+            self.assertEqual(r.status_code, 200)
+            self.assertNotIn("count", r.data)
+            vistas.extend(r.data["results"])
+            paginas += 1
+            if not r.data["next"]:
+                return vistas, paginas, r
+            r = self.client.get(r.data["next"])
+
+    def test_recorre_todo_sin_repetir(self):
+        vistas, paginas, _ = self._recorrer("/api/gps/posiciones/", {"page_size": 10})
+        self.assertEqual(paginas, 5)
+        self.assertEqual(len({p["id"] for p in vistas}), 45)
+        tiempos = [p["timestamp"] for p in vistas]
+        self.assertEqual(tiempos, sorted(tiempos, reverse=True))
+
+    def test_pagina_anterior(self):
+        primera = self.client.get("/api/gps/posiciones/", {"page_size": 10}).data
+        self.assertIsNone(primera["previous"])
+        segunda = self.client.get(primera["next"]).data
+        anterior = self.client.get(segunda["previous"]).data
+        self.assertEqual([p["id"] for p in anterior["results"]], [p["id"] for p in primera["results"]])
+
+    def test_sin_count_ni_offset(self):
+        primera = self.client.get("/api/gps/posiciones/por_ruta/", {"ruta_id": str(self.ruta.id), "page_size": 10})
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(primera.data["next"])
+        sql = " ".join(q["sql"].upper() for q in consultas.captured_queries)
+        self.assertNotIn("COUNT(", sql)
+        self.assertNotIn("OFFSET", sql)
+
+    def test_alertas_activas_paginadas(self):
+        for i in range(25):
+            AlertaGPS.objects.create(ruta=self.ruta, tipo=f"PRUEBA_{i}", resuelta=i % 5 == 0)
+        vistas, paginas, _ = self._recorrer("/api/gps/alertas/activas/")
+        self.assertEqual(len(vistas), 20)
+        self.assertEqual(paginas, 1)
+
+    def test_cursor_invalido(self):
+        r = self.client.get("/api/gps/posiciones/", {"cursor": "no-es-un-cursor"})
+        self.assertEqual(r.status_code, 404)
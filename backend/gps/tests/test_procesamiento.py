@@ -0,0 +1,117 @@
+# gps/tests/test_procesamiento.py
+
+from itertools import count
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from decimal import Decimal
+from gps.models import Posicion, AlertaGPS, Trayecto, UltimaPosicion
+from gps.procesamiento import obtener_cadena
+from rutas.models import Ruta, Bus, RutaParada, Desvio
+from paradas.models import Parada
+
+
+class TestCadenaProcesamiento(TestCase):
+    def setUp(self):
+        parada1 = Parada.objects.create(nombre="Parada A", latitud=11.5446, longitud=-72.9060)
+        parada2 = Parada.objects.create(nombre="Parada B", latitud=11.5460, longitud=-72.9050)
+        self.bus = Bus.objects.create(placa="PRO123", modelo="Hyundai", capacidad=40)
+        # Lecturas cada 30 s: a milisegundos el filtro descartaría los saltos del recorrido
+        self.reloj = (timezone.now() - timedelta(minutes=10) + timedelta(seconds=30 * i) for i in count())
+        self.ruta = Ruta.objects.create(nombre="Ruta Etapas", tipo="ciudad", capacidad_total=40)
+        RutaParada.objects.create(ruta=self.ruta, parada=parada1, orden=1)
+        RutaParada.objects.create(ruta=self.ruta, parada=parada2, orden=2)
+
+    def _posicion(self, lat, lon):
+        return Posicion.objects.create(
+            origen_tipo="VEHICULO", origen_id=self.bus.id, latitud=lat, longitud=lon, ruta=self.ruta,
+            timestamp=next(self.reloj),
+        )
+
+    def test_un_desvio_y_una_alerta_por_salida_de_ruta(self):
+        self._posicion(11.5480, -72.9080)  # ≈ 330 m
+        self._posicion(11.5500, -72.9100)  # ≈ 700 m
+        self._posicion(11.5500, -72.9100)
+
+        desvio = Desvio.objects.get(ruta=self.ruta, activo=True)
+        self.assertGreater(desvio.distancia_desviacion, 600)
+        self.assertEqual(AlertaGPS.objects.filter(tipo="DESVIO").count(), 1)
+
+        self._posicion(11.5447, -72.9061)
+        self.assertFalse(Desvio.objects.filter(activo=True).exists())
+
+    def test_precision_descontada_con_tope(self):
+        # ≈ 700 m fuera del trazado declarando 1 km de error: solo se descuenta el tope
+        Posicion.objects.create(
+            origen_tipo="VEHICULO", origen_id=self.bus.id, latitud=11.5500, longitud=-72.9100, ruta=self.ruta,
+            precision=1000, timestamp=next(self.reloj),
+        )
+        desvio = Desvio.objects.get(ruta=self.ruta, activo=True)
+        self.assertAlmostEqual(float(desvio.distancia_desviacion), 703 - 50, delta=5)
+
+    def test_ajuste_al_trazado(self):
+        posicion = self._posicion(11.5450, -72.90545)  # ≈ 40 m al este del tramo A→B
+        posicion.refresh_from_db()
+        self.assertEqual(posicion.segmento_ruta, 0)
+        self.assertGreater(posicion.distancia_ruta_m, 0)
+        self.assertNotEqual(posicion.latitud_ajustada, posicion.latitud)
+        ultima = UltimaPosicion.objects.get(origen_id=self.bus.id)
+        self.assertEqual(ultima.distancia_ruta_m, posicion.distancia_ruta_m)
+
+    def test_umbrales_por_ruta(self):
+        self.ruta.umbral_desvio_m = 1000
+        self.ruta.save()
+        self._posicion(11.5500, -72.9100)
+        self.assertFalse(Desvio.objects.exists())
+
+    def test_tiempos_por_etapa(self):
+        self._posicion(11.5447, -72.9061)
+        cadena = obtener_cadena()
+        tiempos = cadena.tiempos()
+        self.assertEqual(set(tiempos), {etapa.nombre for etapa in cadena.etapas})
+        self.assertIn("desvio", tiempos)
+        self.assertGreaterEqual(tiempos["desvio"]["posiciones"], 1)
+
+
+class TestMetricasTrayecto(TestCase):
+    def setUp(self):
+        self.bus = Bus.objects.create(placa="TRA123", modelo="Hyundai", capacidad=40)
+        self.ruta = Ruta.objects.create(nombre="Ruta Métricas", tipo="ciudad", capacidad_total=40)
+        self.inicio = timezone.now() - timedelta(minutes=10)
+        self.trayecto = Trayecto.objects.create(ruta=self.ruta, fecha_inicio=self.inicio)
+
+    def test_acumula_distancia_y_velocidades(self):
+        # 0.01° de latitud ≈ 1112 m cada 60 s → ≈ 66.7 km/h
+        for i in range(4):
+            Posicion.objects.create(
+                origen_tipo="VEHICULO", origen_id=self.bus.id, ruta=self.ruta,
+                latitud=11.50 + i * 0.01, longitud=-72.90, timestamp=self.inicio + timedelta(minutes=i + 1),
+            )
+
+        trayecto = Trayecto.objects.get(pk=self.trayecto.pk)
+        self.assertEqual(trayecto.posiciones_registradas, 4)
+        self.assertAlmostEqual(trayecto.distancia_acumulada_m, 3336, delta=5)
+        self.assertAlmostEqual(trayecto.velocidad_maxima_kmh, 66.7, delta=0.5)
+        self.assertAlmostEqual(trayecto.velocidad_promedio_kmh, 66.7, delta=0.5)
+        self.assertEqual(trayecto.posiciones.count(), 4)
+
+        trayecto.finalizar()
+        self.assertEqual(Trayecto.objects.get(pk=trayecto.pk).distancia_recorrida_km, Decimal("3.34"))
+
+    def test_cada_bus_en_su_trayecto(self):
+        otro = Bus.objects.create(placa="TRA456", modelo="Hyundai", capacidad=40)
+        segundo = Trayecto.objects.create(ruta=self.ruta, vehiculo_id=otro.id, fecha_inicio=self.inicio)
+        # Ambos buses avanzan 0.01° por minuto, a 5 km el uno del otro
+        for i in range(3):
+            for bus, lat in ((self.bus, 11.50), (otro, 11.55)):
+                Posicion.objects.create(
+                    origen_tipo="VEHICULO", origen_id=bus.id, ruta=self.ruta,
+                    latitud=lat + i * 0.01, longitud=-72.90, timestamp=self.inicio + timedelta(minutes=i + 1),
+                )
+
+        for trayecto, bus in ((self.trayecto, self.bus), (segundo, otro)):
+            trayecto.refresh_from_db()
+            self.assertEqual(trayecto.vehiculo_id, bus.id)
+            self.assertEqual(trayecto.posiciones_registradas, 3)
+            self.assertAlmostEqual(trayecto.distancia_acumulada_m, 2224, delta=5)
+            self.assertEqual(set(trayecto.posiciones.values_list("origen_id", flat=True)), {bus.id})
@@ -0,0 +1,92 @@
+# gps/tests/test_replay.py
+
+import json
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model, BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import AsyncClient
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from gps.models import Posicion, Trayecto
+from rutas.models import Ruta, Bus
+
+User = get_user_model()
+
+
+class TestReplayTrayecto(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin_replay", email="replay@example.com", password="admin12345", identificacion="4"
+        )
+        self.client.force_authenticate(self.admin)
+        self.bus = Bus.objects.create(placa="REP123", modelo="Hyundai", capacidad=40)
+        self.ruta = Ruta.objects.create(nombre="Ruta Replay", tipo="ciudad", capacidad_total=40)
+
+        self.inicio = timezone.now() - timedelta(hours=1)
+        self.trayecto = Trayecto.objects.create(
+            ruta=self.ruta, fecha_inicio=self.inicio, fecha_fin=self.inicio + timedelta(minutes=10), finalizado=True
+        )
+        # Una posición cada 10 s durante el trayecto y una fuera de su rango
+        Posicion.objects.bulk_create([
+            Posicion(
+                origen_tipo="VEHICULO", origen_id=self.bus.id, ruta=self.ruta,
+                latitud=11.5 + i * 0.0001, longitud=-72.9, timestamp=self.inicio + timedelta(seconds=10 * i),
+            )
+            for i in range(61)
+        ] + [
+            Posicion(
+                origen_tipo="VEHICULO", origen_id=self.bus.id, ruta=self.ruta,
+                latitud=11.6, longitud=-72.9, timestamp=self.inicio + timedelta(minutes=20),
+            )
+        ])
+
+    def _contenido(self, respuesta):
+        self.assertEqual(respuesta.status_code, 200)
+        return b"".join(respuesta.streaming_content).decode()
+
+    def test_ndjson_en_orden_y_acotado(self):
+        r = self.client.get(f"/api/gps/trayectos/{self.trayecto.id}/replay/")
+        self.assertEqual(r["Content-Type"], "application/x-ndjson")
+        filas = [json.loads(linea) for linea in self._contenido(r).splitlines()]
+        self.assertEqual(len(filas), 61)
+        self.assertEqual(filas[0]["t"], round(self.inicio.timestamp(), 3))
+        self.assertAlmostEqual(filas[-1]["latitud"], 11.506)
+        self.assertTrue(all(a["t"] < b["t"] for a, b in zip(filas, filas[1:])))
+
+    def test_compacto_con_submuestreo(self):
+        r = self.client.get(
+            f"/api/gps/trayectos/{self.trayecto.id}/replay/", {"formato": "compacto", "intervalo": 60}
+        )
+        datos = json.loads(self._contenido(r))
+        self.assertEqual(datos["campos"][:3], ["t", "latitud", "longitud"])
+        self.assertEqual(len(datos["posiciones"]), 11)
+        tiempos = [fila[0] for fila in datos["posiciones"]]
+        self.assertTrue(all(b - a >= 60 for a, b in zip(tiempos, tiempos[1:])))
+
+    def test_parametros_invalidos(self):
+        url = f"/api/gps/trayectos/{self.trayecto.id}/replay/"
+        self.assertEqual(self.client.get(url, {"formato": "csv"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"intervalo": "x"}).status_code, 400)
+
+    def _sesion(self):
+        # Sesión sin pasar por login(): la señal de auditoría espera una petición real
+        sesion = SessionStore()
+        sesion[SESSION_KEY] = str(self.admin.pk)
+        sesion[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        sesion[HASH_SESSION_KEY] = self.admin.get_session_auth_hash()
+        sesion.save()
+        return sesion.session_key
+
+    async def test_asgi_transmite_con_iterador_asincrono(self):
+        cliente = AsyncClient()
+        cliente.cookies[settings.SESSION_COOKIE_NAME] = await sync_to_async(self._sesion)()
+        r = await cliente.get(f"/api/gps/trayectos/{self.trayecto.id}/replay/")
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r.is_async)
+        bloques = [bloque async for bloque in r.streaming_content]
+        self.assertGreater(len(bloques), 0)
+        filas = [json.loads(linea) for linea in b"".join(bloques).decode().splitlines()]
+        self.assertEqual(len(filas), 61)
+        self.assertTrue(all(a["t"] < b["t"] for a, b in zip(filas, filas[1:])))
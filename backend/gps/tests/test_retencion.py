@@ -0,0 +1,76 @@
+# gps/tests/test_retencion.py
+
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from gps.models import Posicion, Trayecto, AlertaGPS
+from gps.simplificacion import douglas_peucker
+from rutas.models import Ruta, Bus
+
+
+class TestRetencionPosiciones(TestCase):
+    def setUp(self):
+        self.bus = Bus.objects.create(placa="RET123", modelo="Hyundai", capacidad=40)
+        self.ruta = Ruta.objects.create(nombre="Ruta Retención", tipo="ciudad", capacidad_total=40)
+        self.inicio = timezone.now() - timedelta(days=60)
+
+    def test_douglas_peucker_conserva_esquinas(self):
+        lats = [11.50, 11.51, 11.52, 11.52, 11.52]
+        lons = [-72.90, -72.90, -72.90, -72.91, -72.92]
+        self.assertEqual(list(douglas_peucker(lats, lons, 5)), [True, False, True, False, True])
+
+    def test_submuestrea_trayectos_antiguos(self):
+        trayecto = Trayecto.objects.create(ruta=self.ruta, fecha_inicio=self.inicio)
+        Trayecto.objects.filter(pk=trayecto.pk).update(finalizado=True, fecha_fin=self.inicio + timedelta(hours=1))
+
+        posiciones = [
+            Posicion(
+                origen_tipo="VEHICULO",
+                origen_id=self.bus.id,
+                latitud=11.50 + i * 0.001,
+                longitud=-72.90,
+                ruta=self.ruta,
+                timestamp=self.inicio + timedelta(minutes=i),
+            )
+            for i in range(30)
+        ]
+        Posicion.objects.bulk_create(posiciones)
+        AlertaGPS.objects.create(ruta=self.ruta, tipo="DESVIO", posicion=posiciones[10])
+
+        call_command("depurar_posiciones", "--dias", "30", stdout=StringIO())
+
+        restantes = set(Posicion.objects.values_list("id", flat=True))
+        self.assertEqual(restantes, {posiciones[0].id, posiciones[10].id, posiciones[-1].id})
+        self.assertTrue(Trayecto.objects.get(pk=trayecto.pk).simplificado)
+
+    def test_solo_las_posiciones_del_trayecto(self):
+        # Dos buses en la misma ruta a la vez: el trayecto ya finalizado no toca las del otro
+        fin = self.inicio + timedelta(hours=1)
+        trayecto = Trayecto.objects.create(ruta=self.ruta, fecha_inicio=self.inicio)
+        Trayecto.objects.filter(pk=trayecto.pk).update(finalizado=True, fecha_fin=fin)
+        otro = Trayecto.objects.create(ruta=self.ruta, fecha_inicio=self.inicio)
+        otro_bus = Bus.objects.create(placa="RET456", modelo="Hyundai", capacidad=40)
+
+        Posicion.objects.bulk_create([
+            Posicion(
+                origen_tipo="VEHICULO", origen_id=bus.id, latitud=11.50 + i * 0.001, longitud=-72.90,
+                ruta=self.ruta, trayecto=t, timestamp=self.inicio + timedelta(minutes=i),
+            )
+            for bus, t in ((self.bus, trayecto), (otro_bus, otro))
+            for i in range(10)
+        ])
+
+        call_command("depurar_posiciones", "--dias", "30", stdout=StringIO())
+
+        self.assertEqual(Posicion.objects.filter(trayecto=trayecto).count(), 2)
+        self.assertEqual(Posicion.objects.filter(trayecto=otro).count(), 10)
+
+    def test_purga_por_lotes(self):
+        Posicion.objects.bulk_create([
+            Posicion(origen_tipo="USUARIO", origen_id=self.bus.id, latitud=11.5, longitud=-72.9, timestamp=self.inicio)
+            for _ in range(25)
+        ])
+        call_command("depurar_posiciones", "--purgar-usuarios", "--lote", "10", stdout=StringIO())
+        self.assertFalse(Posicion.objects.exists())
@@ -0,0 +1,47 @@
+# gps/tests/test_simulacion.py
+
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from gps.models import Posicion, Trayecto
+from gps.simulacion import Simulador, generar_dataset
+from rutas.models import Ruta, RutaParada, HorarioRuta, Bus
+from accounts.models import UserRole
+
+
+class TestSimulacion(TestCase):
+    def setUp(self):
+        self.creados = generar_dataset(rutas=2, paradas_por_ruta=4, buses_por_ruta=2, usuarios=20, roles=2)
+
+    def test_dataset(self):
+        self.assertEqual(self.creados["paradas"], 8)
+        self.assertEqual(Ruta.objects.filter(nombre__startswith="SIM").count(), 2)
+        self.assertEqual(RutaParada.objects.filter(ruta__nombre__startswith="SIM", orden=4).count(), 2)
+        self.assertEqual(HorarioRuta.objects.filter(ruta__nombre__startswith="SIM").count(), 48)
+        self.assertEqual(UserRole.objects.filter(role__slug__startswith="sim-rol-").count(), 20)
+
+    def test_ingesta_y_resumen(self):
+        simulador = Simulador(pasajeros=5, intervalo_s=10, lote=4)
+        resumen = simulador.ejecutar(60)
+
+        self.assertEqual((resumen["vehiculos"], resumen["pasajeros"]), (4, 5))
+        self.assertEqual(resumen["enviadas"], 6 * 9)
+        self.assertEqual(resumen["lotes"], 6 * 3)
+        self.assertEqual(Posicion.objects.count(), resumen["creadas"])
+        self.assertGreater(resumen["consultas_por_lote"]["max"], 0)
+        self.assertLessEqual(resumen["latencia_ms"]["p50"], resumen["latencia_ms"]["p99"])
+        self.assertEqual(Trayecto.objects.filter(finalizado=True).count(), 4)  # uno por bus
+
+    def test_api(self):
+        resumen = Simulador(pasajeros=0, intervalo_s=10, destino="api").ejecutar(30, trayectos=False)
+        self.assertEqual(resumen["errores"], 0)
+        self.assertGreater(resumen["creadas"], 0)
+
+    def test_comando_limpiar(self):
+        salida = StringIO()
+        call_command("simular_flota", "--duracion", "10", "--pasajeros", "2", "--json", stdout=salida)
+        self.assertIn('"enviadas": 12', salida.getvalue())  # 2 pasos de 5 s × 6 orígenes
+        call_command("simular_flota", "--limpiar", stdout=StringIO())
+        self.assertFalse(Ruta.objects.filter(nombre__startswith="SIM").exists())
+        self.assertFalse(Bus.objects.filter(placa__startswith="SIM").exists())
+        self.assertFalse(Posicion.objects.exists())
@@ -0,0 +1,82 @@
+# gps/tests/test_stream.py
+
+import asyncio
+import json
+from datetime import timedelta
+from django.test import AsyncClient, Client, TestCase
+from django.utils import timezone
+from gps.models import Posicion, AlertaGPS
+from gps.stream import hub, canal_ruta, formato_sse
+from rutas.models import Ruta, Bus
+
+
+class TestStreamRuta(TestCase):
+    def setUp(self):
+        self.bus = Bus.objects.create(placa="SSE123", modelo="Hyundai", capacidad=40)
+        self.ruta = Ruta.objects.create(nombre="Ruta Stream", tipo="ciudad", capacidad_total=40)
+        self.loop = asyncio.new_event_loop()
+        self.suscripcion = self.loop.run_until_complete(self._suscribir())
+
+    def tearDown(self):
+        hub.cancelar(self.suscripcion)
+        self.loop.close()
+
+    async def _suscribir(self):
+        return hub.suscribir(canal_ruta(self.ruta.id))
+
+    def _recibir(self):
+        return self.loop.run_until_complete(asyncio.wait_for(self.suscripcion.cola.get(), 1))
+
+    def test_difunde_posiciones_y_alertas_al_confirmar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            posicion = Posicion.objects.create(
+                origen_tipo="VEHICULO", origen_id=self.bus.id, latitud=11.5446, longitud=-72.9060, ruta=self.ruta
+            )
+        mensaje = self._recibir()
+        self.assertEqual(mensaje["evento"], "posicion")
+        self.assertEqual(mensaje["datos"]["id"], posicion.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AlertaGPS.objects.create(ruta=self.ruta, tipo="DESVIO", posicion=posicion)
+        mensaje = self._recibir()
+        self.assertEqual(mensaje["evento"], "alerta")
+
+        evento = formato_sse(mensaje)
+        self.assertTrue(evento.startswith("event: alerta\ndata: "))
+        self.assertEqual(json.loads(evento.split("data: ")[1])["tipo"], "DESVIO")
+
+    def test_descartada_se_retira_del_canal(self):
+        inicio = timezone.now() - timedelta(minutes=1)
+        for segundos, lat in ((0, 11.5446), (10, 11.6446)):  # ≈ 11 km en 10 s
+            with self.captureOnCommitCallbacks(execute=True):
+                posicion = Posicion.objects.create(
+                    origen_tipo="VEHICULO", origen_id=self.bus.id, latitud=lat, longitud=-72.9060,
+                    ruta=self.ruta, timestamp=inicio + timedelta(seconds=segundos),
+                )
+        eventos = [self._recibir()["evento"] for _ in range(3)]
+        self.assertEqual(eventos, ["posicion", "posicion", "descartada"])
+        self.assertTrue(self.suscripcion.cola.empty())
+
+    def test_otras_rutas_no_llegan(self):
+        otra = Ruta.objects.create(nombre="Otra", tipo="ciudad", capacidad_total=40)
+        with self.captureOnCommitCallbacks(execute=True):
+            Posicion.objects.create(
+                origen_tipo="VEHICULO", origen_id=self.bus.id, latitud=11.5446, longitud=-72.9060, ruta=otra
+            )
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.assertTrue(self.suscripcion.cola.empty())
+
+
+class TestStreamServidor(TestCase):
+    def setUp(self):
+        self.ruta = Ruta.objects.create(nombre="Ruta Servidor", tipo="ciudad", capacidad_total=40)
+        self.url = f"/api/gps/stream/rutas/{self.ruta.id}/"
+
+    def test_bajo_wsgi_responde_501(self):
+        r = Client().get(self.url)
+        self.assertEqual(r.status_code, 501)
+        self.assertIn("ASGI", r.json()["error"])
+
+    async def test_bajo_asgi_pasa_a_la_autenticacion(self):
+        r = await AsyncClient().get(self.url)
+        self.assertEqual(r.status_code, 401)
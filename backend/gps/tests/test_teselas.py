@@ -0,0 +1,88 @@
+# gps/tests/test_teselas.py
+
+import math
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from gps.models import UltimaPosicion
+from gps.teselas import limites, version_paradas, TeselaInvalida
+from paradas.models import Parada
+
+User = get_user_model()
+
+
+def tesela_de(lat, lon, z):
+    n = 2 ** z
+    x = int((lon + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return z, x, y
+
+
+class TestLimites(SimpleTestCase):
+    def test_tesela_contiene_el_punto(self):
+        z, x, y = tesela_de(11.54, -72.91, 14)
+        lat_min, lat_max, lon_min, lon_max = limites(z, x, y)
+        self.assertTrue(lat_min <= 11.54 <= lat_max)
+        self.assertTrue(lon_min <= -72.91 <= lon_max)
+
+    def test_fuera_de_rango(self):
+        with self.assertRaises(TeselaInvalida):
+            limites(3, 8, 0)
+
+
+class TestTeselasMapa(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username="admin_teselas", email="teselas@example.com", password="admin12345", identificacion="5"
+        )
+        self.client.force_authenticate(self.admin)
+        # Cinco paradas a ~100 m entre sí y una lejana
+        for i in range(5):
+            Parada.objects.create(nombre=f"Parada {i}", latitud=11.5400 + i * 0.001, longitud=-72.9100)
+        Parada.objects.create(nombre="Lejana", latitud=11.20, longitud=-72.50)
+
+    def _features(self, z, capas="paradas"):
+        z, x, y = tesela_de(11.542, -72.91, z)
+        r = self.client.get(f"/api/gps/teselas/{z}/{x}/{y}/", {"capas": capas})
+        self.assertEqual(r.status_code, 200)
+        return r.data["features"]
+
+    def test_agrupa_a_bajo_zoom(self):
+        features = self._features(12)
+        self.assertEqual(len(features), 1)
+        self.assertEqual(features[0]["properties"]["cantidad"], 5)
+
+    def test_puntos_sueltos_a_alto_zoom(self):
+        features = self._features(16)
+        self.assertTrue(all("agrupado" not in f["properties"] for f in features))
+        self.assertTrue(all(f["properties"]["capa"] == "paradas" for f in features))
+
+    def test_cache_invalidada_al_cambiar_paradas(self):
+        self.assertEqual(self._features(12)[0]["properties"]["cantidad"], 5)
+        with self.assertNumQueries(0):
+            self._features(12)
+        Parada.objects.create(nombre="Nueva", latitud=11.5415, longitud=-72.9105)
+        self.assertEqual(self._features(12)[0]["properties"]["cantidad"], 6)
+
+    def test_version_expulsada_no_sirve_teselas_viejas(self):
+        self.assertEqual(self._features(12)[0]["properties"]["cantidad"], 5)
+        Parada.objects.bulk_create([Parada(nombre="Sin señal", latitud=11.5415, longitud=-72.9105)])
+        cache.delete(version_paradas.clave)
+        self.assertEqual(self._features(12)[0]["properties"]["cantidad"], 6)
+
+    def test_buses_en_vivo(self):
+        UltimaPosicion.objects.create(
+            origen_tipo="VEHICULO", origen_id="5f0c6a3e-8c1d-4a47-9d59-2b8d0e4f6a11",
+            latitud=11.5420, longitud=-72.9100, timestamp=timezone.now(),
+        )
+        features = self._features(16, capas="buses")
+        self.assertEqual(len(features), 1)
+        self.assertEqual(features[0]["properties"]["capa"], "buses")
+
+    def test_capa_invalida(self):
+        r = self.client.get("/api/gps/teselas/12/0/0/", {"capas": "trenes"})
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(self.client.get("/api/gps/teselas/2/9/0/").status_code, 400)
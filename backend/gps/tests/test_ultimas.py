@@ -0,0 +1,50 @@
+# gps/tests/test_ultimas.py
+
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from gps.models import Posicion, UltimaPosicion
+from rutas.models import Bus
+
+User = get_user_model()
+
+
+class TestUltimaPosicion(APITestCase):
+    def setUp(self):
+        self.bus = Bus.objects.create(placa="ULT123", modelo="Hyundai", capacidad=40)
+        self.ahora = timezone.now()
+
+    def _posicion(self, lat, segundos):
+        return Posicion.objects.create(
+            origen_tipo="VEHICULO",
+            origen_id=self.bus.id,
+            latitud=lat,
+            longitud=-72.9060,
+            timestamp=self.ahora + timedelta(seconds=segundos),
+        )
+
+    def test_una_fila_por_origen_y_no_retrocede(self):
+        self._posicion(11.5446, 0)
+        reciente = self._posicion(11.5450, 10)
+        self._posicion(11.5400, 5)  # llega tarde, es más antigua
+
+        ultima = UltimaPosicion.objects.get(origen_id=self.bus.id)
+        self.assertEqual(UltimaPosicion.objects.count(), 1)
+        self.assertEqual(ultima.posicion_id, reciente.id)
+
+    def test_flota_y_lote(self):
+        admin = User.objects.create_superuser(
+            username="admin_ult", email="admin@example.com", password="admin12345", identificacion="4"
+        )
+        self.client.force_authenticate(admin)
+        otro = Bus.objects.create(placa="ULT456", modelo="Hyundai", capacidad=40)
+        filas = [
+            {"origen_tipo": "VEHICULO", "origen_id": str(otro.id), "latitud": "11.5", "longitud": "-72.9"},
+            {"origen_tipo": "VEHICULO", "origen_id": str(self.bus.id), "latitud": "11.6", "longitud": "-72.9"},
+        ]
+        self.client.post("/api/gps/posiciones/lote/", filas, format="json")
+
+        r = self.client.get("/api/gps/ultimas/flota/")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual({f["origen_id"] for f in r.data}, {str(otro.id), str(self.bus.id)})
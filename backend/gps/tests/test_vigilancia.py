@@ -0,0 +1,78 @@
+# gps/tests/test_vigilancia.py
+
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from gps.models import AlertaGPS, EstadoPosicion, Trayecto, UltimaPosicion
+from gps.vigilancia import barrer, metricas, MetricasVigilancia, TIPO_ALERTA
+from rutas.models import Ruta, Bus
+
+
+class TestVigilanciaSenal(TestCase):
+    def setUp(self):
+        metricas.limpiar()
+        self.ahora = timezone.now()
+        self.bus = Bus.objects.create(placa="VIG123", modelo="Hyundai", capacidad=40)
+        self.rutas, self.trayectos = [], []
+        for i in range(3):
+            ruta = Ruta.objects.create(nombre=f"Ruta Vigilada {i}", tipo="ciudad", capacidad_total=40)
+            self.rutas.append(ruta)
+            self.trayectos.append(Trayecto.objects.create(
+                ruta=ruta,
+                fecha_inicio=self.ahora - timedelta(hours=1),
+                ultima_posicion_en=self.ahora - timedelta(minutes=10 if i < 2 else 1),
+            ))
+        UltimaPosicion.objects.create(
+            origen_tipo="VEHICULO", origen_id=self.bus.id, ruta=self.rutas[0],
+            latitud=11.5, longitud=-72.9, timestamp=self.ahora - timedelta(minutes=10),
+        )
+
+    def test_una_alerta_por_episodio(self):
+        resumen = barrer(self.ahora)
+        self.assertEqual(resumen["revisados"], 3)
+        self.assertEqual(resumen["alertas"], 2)
+        self.assertEqual(AlertaGPS.objects.filter(tipo=TIPO_ALERTA, resuelta=False).count(), 2)
+        self.assertEqual(UltimaPosicion.objects.get().estado, EstadoPosicion.SIN_SENAL)
+        self.trayectos[0].refresh_from_db()
+        self.assertEqual(self.trayectos[0].sin_senal_desde, self.ahora)
+
+        # Un segundo barrido no repite la alerta del mismo episodio
+        self.assertEqual(barrer(self.ahora + timedelta(seconds=30))["alertas"], 0)
+        self.assertEqual(AlertaGPS.objects.filter(tipo=TIPO_ALERTA).count(), 2)
+
+    def test_recuperacion_resuelve_la_alerta(self):
+        barrer(self.ahora)
+        Trayecto.objects.filter(pk=self.trayectos[0].pk).update(ultima_posicion_en=self.ahora + timedelta(seconds=20))
+        resumen = barrer(self.ahora + timedelta(seconds=30))
+        self.assertEqual(resumen["recuperados"], 1)
+        self.assertTrue(AlertaGPS.objects.get(ruta=self.rutas[0]).resuelta)
+        self.assertFalse(AlertaGPS.objects.get(ruta=self.rutas[1]).resuelta)
+
+        # Un nuevo silencio abre otro episodio
+        barrer(self.ahora + timedelta(minutes=20))
+        self.assertEqual(AlertaGPS.objects.filter(ruta=self.rutas[0]).count(), 2)
+
+    def test_consultas_constantes(self):
+        for i in range(20):
+            ruta = Ruta.objects.create(nombre=f"Ruta Extra {i}", tipo="ciudad", capacidad_total=40)
+            Trayecto.objects.create(ruta=ruta, fecha_inicio=self.ahora - timedelta(hours=1))
+        with CaptureQueriesContext(connection) as consultas:
+            resumen = barrer(self.ahora)
+        self.assertEqual(resumen["alertas"], 22)
+        self.assertLessEqual(len(consultas), 10)
+
+    def test_comando(self):
+        salida = StringIO()
+        call_command("vigilar_senal_gps", "--una-vez", stdout=salida)
+        self.assertIn("sin señal: 2", salida.getvalue())
+
+    def test_metricas_compartidas_con_el_api(self):
+        call_command("vigilar_senal_gps", "--una-vez", stdout=StringIO())
+        # Otra instancia, como la del proceso web, ve lo que registró el comando
+        resumen = MetricasVigilancia().resumen()
+        self.assertEqual((resumen["barridos"], resumen["alertas"]), (1, 2))
+        self.assertEqual(resumen["ultimo"]["revisados"], 3)
@@ -0,0 +1,87 @@
+# gps/ultimas.py
+
+from django.db import transaction
+
+from .models import Posicion, ResultadoFiltro, UltimaPosicion
+
+
+CAMPOS_ACTUALIZABLES = [
+    "posicion", "latitud", "longitud", "precision", "estado", "timestamp", "ruta",
+    "distancia_ruta_m", "segmento_ruta", "actualizada_en",
+]
+
+
+def registrar_ultimas_posiciones(posiciones):
+    """
+    Actualiza la última posición conocida de cada origen del lote con un
+    único UPSERT. Una posición más antigua nunca reemplaza a una más reciente.
+    """
+    ultimas = {}
+    for posicion in posiciones:
+        clave = (posicion.origen_tipo, posicion.origen_id)
+        actual = ultimas.get(clave)
+        if actual is None or posicion.timestamp >= actual.timestamp:
+            ultimas[clave] = posicion
+
+    if not ultimas:
+        return
+
+    with transaction.atomic():
+        existentes = {
+            (tipo, origen_id): timestamp
+            for tipo, origen_id, timestamp in UltimaPosicion.objects.select_for_update()
+            .filter(origen_id__in={origen_id for _, origen_id in ultimas})
+            .values_list("origen_tipo", "origen_id", "timestamp")
+        }
+        filas = [
+            UltimaPosicion(
+                origen_tipo=p.origen_tipo,
+                origen_id=p.origen_id,
+                posicion_id=p.pk,
+                latitud=p.latitud,
+                longitud=p.longitud,
+                precision=p.precision,
+                estado=p.estado,
+                timestamp=p.timestamp,
+                ruta_id=p.ruta_id,
+                distancia_ruta_m=p.distancia_ruta_m,
+                segmento_ruta=p.segmento_ruta,
+            )
+            for clave, p in ultimas.items()
+            if clave not in existentes or existentes[clave] <= p.timestamp
+        ]
+        if filas:
+            UltimaPosicion.objects.bulk_create(
+                filas,
+                update_conflicts=True,
+                unique_fields=["origen_tipo", "origen_id"],
+                update_fields=CAMPOS_ACTUALIZABLES,
+            )
+
+
+def restaurar_ultimas_posiciones(descartadas):
+    """
+    Devuelve la última posición de los orígenes que apuntaba a una lectura
+    descartada por el filtro a su lectura válida más reciente. Si el origen
+    no tiene ninguna, la última posición se elimina.
+    """
+    ids = [p.pk for p in descartadas]
+    afectadas = list(UltimaPosicion.objects.filter(posicion_id__in=ids).values_list("origen_tipo", "origen_id"))
+    if not afectadas:
+        return
+
+    previas = []
+    for origen_tipo, origen_id in afectadas:
+        previa = (
+            Posicion.objects.filter(origen_tipo=origen_tipo, origen_id=origen_id)
+            .exclude(pk__in=ids)
+            .exclude(filtro=ResultadoFiltro.DESCARTADA)
+            .order_by("-timestamp")
+            .first()
+        )
+        if previa is not None:
+            previas.append(previa)
+
+    with transaction.atomic():
+        UltimaPosicion.objects.filter(posicion_id__in=ids).delete()
+        registrar_ultimas_posiciones(previas)
@@ -1,13 +1,24 @@
 # gps/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from gps.views import PosicionViewSet, TrayectoViewSet, AlertaGPSViewSet
+from gps.views import (
+    PosicionViewSet, UltimaPosicionViewSet, TrayectoViewSet, AlertaGPSViewSet,
+    ColaProcesamientoViewSet, EtaViewSet, TiempoTramoHistoricoViewSet, TeselaMapaView, EventoZonaViewSet, OcupacionZonasViewSet, stream_ruta,
+)
 
 router = DefaultRouter()
 router.register(r"posiciones", PosicionViewSet, basename="gpsposiciones")
+router.register(r"ultimas", UltimaPosicionViewSet, basename="gpsultimas")
 router.register(r"trayectos", TrayectoViewSet, basename="gpstrayectos")
 router.register(r"alertas", AlertaGPSViewSet, basename="gpsalertas")
+router.register(r"cola", ColaProcesamientoViewSet, basename="gpscola")
+router.register(r"eta", EtaViewSet, basename="gpseta")
+router.register(r"tiempos-tramo", TiempoTramoHistoricoViewSet, basename="gpstiempostramo")
+router.register(r"eventos-zona", EventoZonaViewSet, basename="gpseventoszona")
+router.register(r"ocupacion-zonas", OcupacionZonasViewSet, basename="gpsocupacionzonas")
 
 urlpatterns = [
+    path("stream/rutas/<uuid:ruta_id>/", stream_ruta, name="gps-stream-ruta"),
+    path("teselas/<int:z>/<int:x>/<int:y>/", TeselaMapaView.as_view(), name="gps-teselas"),
     path("", include(router.urls)),
 ]
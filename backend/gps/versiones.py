@@ -0,0 +1,45 @@
+# gps/versiones.py
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+# Caché compartida entre procesos donde viven las versiones de los índices en memoria.
+CACHE_ALIAS = getattr(settings, "GPS_INDICES_CACHE", "default")
+CACHE_PREFIJO = "gps:indices"
+
+
+class VersionCompartida:
+    """
+    Versión de un índice en memoria guardada en la caché compartida. El
+    proceso que lo modifica la incrementa y los demás la comparan con la de
+    su copia al usarlo, para recargarlo aunque la señal se disparara en otro
+    proceso. Si la clave se expulsa, renace con un valor nuevo y todos
+    recargan en vez de quedarse con una copia vieja.
+    """
+
+    def __init__(self, nombre, cache_alias=CACHE_ALIAS):
+        self.clave = f"{CACHE_PREFIJO}:{nombre}:v"
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def actual(self):
+        version = self.cache.get(self.clave)
+        if version is None:
+            self.cache.add(self.clave, time.time_ns(), None)
+            version = self.cache.get(self.clave)
+        return version
+
+    def incrementar(self):
+        self.cache.add(self.clave, time.time_ns(), None)
+        try:
+            return self.cache.incr(self.clave)
+        except ValueError:  # expulsada entre add e incr
+            version = time.time_ns()
+            self.cache.set(self.clave, version, None)
+            return version
@@ -1,18 +1,49 @@
 # gps/views.py
 
+import asyncio
+import uuid
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from accounts.permissions import HasRoleResourcePermission
+from accounts.pagination import KeysetPagination
 from django.utils import timezone
-from django.db.models import Count
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Min, Sum
 from accounts.audit import AuditMixin
 
-from .models import Posicion, Trayecto, AlertaGPS
-from .serializers import PosicionSerializer, TrayectoSerializer, AlertaGPSSerializer
-from .utils import detectar_desvio
+from .models import Posicion, UltimaPosicion, TipoOrigen, Trayecto, AlertaGPS, TiempoTramoHistorico, EventoZona
+from .serializers import (
+    PosicionSerializer, UltimaPosicionSerializer, TrayectoSerializer, AlertaGPSSerializer,
+    TiempoTramoHistoricoSerializer, EventoZonaSerializer,
+)
+from .ingest import registrar_lote, registrar_posiciones, LOTE_MAX_POSICIONES
+from .binario import LoteBinario, PosicionesBinariasParser
+from .banda_muerta import banda_muerta
+from .alertas import coalescedor
+from .vigilancia import metricas as metricas_vigilancia
+from .eta import motor_eta, formato_estimacion
+from .cola import (
+    PROCESAMIENTO_ASINCRONO, procesamiento_diferido, encolar, cola_saturada, estado_cola, metricas,
+)
+from .procesamiento import obtener_cadena
+from .geocercas import ocupacion
+from .teselas import tesela, TeselaInvalida, CAPAS as CAPAS_TESELA
+from .replay import generar as generar_replay, agenerar as agenerar_replay, FORMATOS as FORMATOS_REPLAY
+from .stream import hub, obtener_broker, canal_ruta, formato_sse
 from rutas.models import Ruta
+from paradas.models import ZonaParada
+
+
+def _bajo_asgi(request):
+    """True si la petición llegó por el servidor ASGI (la de DRF envuelve a la de Django)."""
+    return isinstance(getattr(request, "_request", request), ASGIRequest)
 
 
 # === POSICIONES ===
@@ -24,20 +55,94 @@ class PosicionViewSet(viewsets.ModelViewSet):
     queryset = Posicion.objects.select_related("ruta")
     serializer_class = PosicionSerializer
     permission_classes = [IsAuthenticated, HasRoleResourcePermission]
+    pagination_class = KeysetPagination
     filter_backends = [filters.SearchFilter]
     search_fields = ["origen_tipo", "estado", "ruta__nombre"]
 
-    def perform_create(self, serializer):
-        posicion = serializer.save()
+    def _diferido(self):
+        """Procesamiento en segundo plano por configuración o con ?asincrono=1."""
+        return PROCESAMIENTO_ASINCRONO or self.request.query_params.get("asincrono") in ("1", "true")
+
+    def _cola_saturada(self):
+        return Response(
+            {"error": "Cola de procesamiento saturada, intente más tarde."},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "5"},
+        )
+
+    def create(self, request, *args, **kwargs):
+        diferido = self._diferido()
+        if diferido and cola_saturada():
+            return self._cola_saturada()
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if not banda_muerta.aceptar(Posicion(**serializer.validated_data)):
+            return Response(
+                {"descartada": True, "detail": "Posición redundante con la última registrada."},
+                status=status.HTTP_200_OK,
+            )
+
+        if not diferido:
+            self.perform_create(serializer)
+            transaction.on_commit(lambda: banda_muerta.confirmar([serializer.instance]))
+            headers = self.get_success_headers(serializer.data)
+            return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+        with transaction.atomic(), procesamiento_diferido():
+            posicion = serializer.save()
+            encolar([posicion])
+            transaction.on_commit(lambda: banda_muerta.confirmar([posicion]))
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
 
-        # Detectar desvío automáticamente (solo si la posición tiene ruta)
-        if posicion.ruta:
-            detectar_desvio(
-                ruta=posicion.ruta,
-                lat_actual=float(posicion.latitud),
-                lon_actual=float(posicion.longitud)
+    @action(
+        detail=False,
+        methods=["post"],
+        parser_classes=[JSONParser, PosicionesBinariasParser],
+    )
+    def lote(self, request):
+        """
+        Registra un lote de posiciones en una sola petición.
+        Acepta una lista o {"posiciones": [...]} en JSON, o el formato binario
+        compacto (Content-Type: application/vnd.gps.posiciones); reporta errores por fila.
+        """
+        binario = isinstance(request.data, LoteBinario)
+        if binario:
+            filas = request.data
+        else:
+            filas = request.data.get("posiciones") if isinstance(request.data, dict) else request.data
+            if not isinstance(filas, list):
+                filas = None
+        if not filas:
+            return Response({"error": "Debe enviar una lista de posiciones."}, status=400)
+        if len(filas) > LOTE_MAX_POSICIONES:
+            return Response(
+                {"error": f"El lote supera el máximo de {LOTE_MAX_POSICIONES} posiciones."},
+                status=400,
             )
 
+        diferido = self._diferido()
+        if diferido and cola_saturada():
+            return self._cola_saturada()
+
+        if binario:
+            if filas.ruta_id and not Ruta.objects.filter(id=filas.ruta_id).exists():
+                return Response({"error": "Ruta no encontrada."}, status=404)
+            validas, errores = filas.posiciones()
+            creadas, descartadas = registrar_posiciones(validas, diferido=diferido)
+        else:
+            creadas, descartadas, errores = registrar_lote(filas, diferido=diferido)
+        data = {
+            "recibidas": len(filas),
+            "creadas": len(creadas),
+            "descartadas": len(descartadas),
+            "errores": errores,
+        }
+        if not creadas:
+            estado = status.HTTP_200_OK if descartadas else status.HTTP_400_BAD_REQUEST
+            return Response(data, status=estado)
+        return Response(data, status=status.HTTP_202_ACCEPTED if diferido else status.HTTP_201_CREATED)
+
     @action(detail=False, methods=["get"])
     def recientes(self, request):
         """
@@ -53,11 +158,71 @@ class PosicionViewSet(viewsets.ModelViewSet):
         ruta_id = request.query_params.get("ruta_id")
         if not ruta_id:
             return Response({"error": "Debe indicar 'ruta_id'."}, status=400)
-        posiciones = self.get_queryset().filter(ruta_id=ruta_id)
-        serializer = self.get_serializer(posiciones, many=True)
+        page = self.paginate_queryset(self.get_queryset().filter(ruta_id=ruta_id))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+# === ÚLTIMAS POSICIONES ===
+class UltimaPosicionViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Última posición conocida de cada usuario o vehículo (una fila por origen).
+    Filtros opcionales: ?origen_tipo=VEHICULO&ruta_id=<uuid>
+    """
+    queryset = UltimaPosicion.objects.select_related("ruta")
+    serializer_class = UltimaPosicionSerializer
+    permission_classes = [IsAuthenticated, HasRoleResourcePermission]
+    lookup_field = "origen_id"
+
+    def get_queryset(self):
+        queryset = self.queryset
+        origen_tipo = self.request.query_params.get("origen_tipo")
+        ruta_id = self.request.query_params.get("ruta_id")
+        if origen_tipo:
+            queryset = queryset.filter(origen_tipo=origen_tipo)
+        if ruta_id:
+            queryset = queryset.filter(ruta_id=ruta_id)
+        return queryset
+
+    @action(detail=False, methods=["get"])
+    def flota(self, request):
+        """Foto actual de la flota: última posición de cada vehículo."""
+        vehiculos = self.get_queryset().filter(origen_tipo=TipoOrigen.VEHICULO)
+        serializer = self.get_serializer(vehiculos, many=True)
         return Response(serializer.data)
 
 
+# === COLA DE PROCESAMIENTO ===
+class ColaProcesamientoViewSet(viewsets.ViewSet):
+    """Estado de la cola de procesamiento asíncrono y métricas de ingesta (etapas, banda muerta, vigilancia de señal)."""
+    permission_classes = [IsAuthenticated, HasRoleResourcePermission]
+
+    def list(self, request):
+        data = estado_cola()
+        data["trabajador"] = metricas.totales()
+        data["etapas"] = obtener_cadena().tiempos()
+        data["banda_muerta"] = banda_muerta.contadores()
+        data["vigilancia_senal"] = metricas_vigilancia.resumen()
+        return Response(data)
+
+
+# === LLEGADAS ESTIMADAS (ETA) ===
+class EtaViewSet(viewsets.ViewSet):
+    """
+    Llegada estimada de los vehículos de una ruta a sus paradas restantes.
+    Las estimaciones se calculan al recibir cada posición; aquí solo se leen.
+    Filtro opcional: ?parada_id=<uuid>
+    """
+    permission_classes = [IsAuthenticated, HasRoleResourcePermission]
+
+    def retrieve(self, request, pk=None):
+        parada_id = request.query_params.get("parada_id")
+        vehiculos = [formato_estimacion(e, parada_id) for e in motor_eta.estimaciones(pk)]
+        if parada_id:
+            vehiculos = [v for v in vehiculos if v["paradas"]]
+        return Response({"ruta_id": pk, "vehiculos": vehiculos})
+
+
 # === TRAYECTOS ===
 class TrayectoViewSet(viewsets.ModelViewSet):
     """
@@ -66,6 +231,8 @@ class TrayectoViewSet(viewsets.ModelViewSet):
     queryset = Trayecto.objects.select_related("ruta", "conductor")
     serializer_class = TrayectoSerializer
     permission_classes = [IsAuthenticated, HasRoleResourcePermission]
+    pagination_class = KeysetPagination
+    keyset_campo = "fecha_inicio"
     filter_backends = [filters.SearchFilter]
     search_fields = ["ruta__nombre", "conductor__username"]
 
@@ -85,36 +252,198 @@ class TrayectoViewSet(viewsets.ModelViewSet):
     def iniciar(self, request):
         """
         Inicia un nuevo trayecto para una ruta.
-        Si el conductor ya tiene uno activo, lo devuelve.
+        Con 'bus_id' el trayecto es de ese bus; si ya tiene uno activo, lo devuelve.
         """
         ruta_id = request.data.get("ruta_id")
         if not ruta_id:
             return Response({"error": "Debe indicar 'ruta_id'."}, status=400)
 
+        bus_id = request.data.get("bus_id") or None
+        if bus_id:
+            try:
+                bus_id = uuid.UUID(str(bus_id))
+            except ValueError:
+                return Response({"error": "'bus_id' no es un UUID válido."}, status=400)
+
         try:
             ruta = Ruta.objects.get(id=ruta_id)
         except Ruta.DoesNotExist:
             return Response({"error": "Ruta no encontrada."}, status=404)
 
-        trayecto_activo = Trayecto.objects.filter(ruta=ruta, finalizado=False).first()
+        trayecto_activo = Trayecto.objects.filter(ruta=ruta, vehiculo_id=bus_id, finalizado=False).first()
         if trayecto_activo:
             serializer = self.get_serializer(trayecto_activo)
             return Response(serializer.data)
 
         trayecto = Trayecto.objects.create(
             ruta=ruta,
+            vehiculo_id=bus_id,
             conductor=request.user,
             fecha_inicio=timezone.now(),
         )
         serializer = self.get_serializer(trayecto)
         return Response(serializer.data, status=201)
 
+    @action(detail=True, methods=["get"])
+    def replay(self, request, pk=None):
+        """
+        Reproduce las posiciones del trayecto en streaming (memoria constante).
+        Parámetros: ?formato=ndjson|compacto&intervalo=<segundos> (submuestreo).
+        """
+        trayecto = self.get_object()
+        formato = request.query_params.get("formato", "ndjson")
+        if formato not in FORMATOS_REPLAY:
+            return Response({"error": f"Formato inválido; use {', '.join(FORMATOS_REPLAY)}."}, status=400)
+        intervalo = request.query_params.get("intervalo")
+        try:
+            intervalo = float(intervalo) if intervalo else None
+        except ValueError:
+            return Response({"error": "'intervalo' debe ser un número de segundos."}, status=400)
+        if intervalo is not None and intervalo < 0:
+            return Response({"error": "'intervalo' debe ser un número de segundos."}, status=400)
+
+        # Bajo ASGI, Django solo transmite sin acumular si el iterador es asíncrono
+        generar = agenerar_replay if _bajo_asgi(request) else generar_replay
+        response = StreamingHttpResponse(generar(trayecto, formato, intervalo), content_type=FORMATOS_REPLAY[formato])
+        response["X-Accel-Buffering"] = "no"
+        return response
+
     @action(detail=False, methods=["get"])
     def activos(self, request):
         """Muestra trayectos en curso."""
-        activos = self.get_queryset().filter(finalizado=False)
-        serializer = self.get_serializer(activos, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(self.get_queryset().filter(finalizado=False))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+# === TESELAS DEL MAPA ===
+class TeselaMapaView(APIView):
+    """
+    GeoJSON de una tesela z/x/y con paradas, buses en vivo y puntos de desvío
+    agrupados en rejilla según el zoom. Filtro opcional: ?capas=paradas,buses,desvios
+    """
+    permission_classes = [IsAuthenticated, HasRoleResourcePermission]
+
+    def get(self, request, z, x, y):
+        capas = request.query_params.get("capas")
+        capas = [c.strip() for c in capas.split(",") if c.strip()] if capas else None
+        invalidas = [c for c in capas or () if c not in CAPAS_TESELA]
+        if invalidas:
+            return Response({"error": f"Capas inválidas: {', '.join(invalidas)}."}, status=400)
+        try:
+            return Response(tesela(z, x, y, capas))
+        except TeselaInvalida as exc:
+            return Response({"error": str(exc)}, status=400)
+
+
+# === GEOCERCAS DE ZONAS ===
+class EventoZonaViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Entradas y salidas de zonas con geocerca, de lo más reciente a lo más antiguo.
+    Filtros opcionales: ?zona_id=<uuid>&origen_id=<uuid>&tipo=ENTRADA|SALIDA
+    """
+    queryset = EventoZona.objects.select_related("zona")
+    serializer_class = EventoZonaSerializer
+    permission_classes = [IsAuthenticated, HasRoleResourcePermission]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        queryset = self.queryset
+        for parametro, campo in (("zona_id", "zona_id"), ("origen_id", "origen_id"), ("tipo", "tipo")):
+            valor = self.request.query_params.get(parametro)
+            if valor:
+                queryset = queryset.filter(**{campo: valor})
+        return queryset
+
+
+class OcupacionZonasViewSet(viewsets.ViewSet):
+    """Vehículos y usuarios dentro de cada zona con geocerca (que reportaron recientemente)."""
+    permission_classes = [IsAuthenticated, HasRoleResourcePermission]
+
+    def list(self, request):
+        conteos = ocupacion()
+        zonas = ZonaParada.objects.order_by("nombre").values_list("id", "nombre", "poligono")
+        return Response([
+            {
+                "zona_id": zona_id,
+                "nombre": nombre,
+                "vehiculos": conteos.get(zona_id, {}).get(TipoOrigen.VEHICULO, 0),
+                "usuarios": conteos.get(zona_id, {}).get(TipoOrigen.USUARIO, 0),
+            }
+            for zona_id, nombre, poligono in zonas
+            if poligono
+        ])
+
+
+# === TIEMPOS HISTÓRICOS POR TRAMO ===
+class TiempoTramoHistoricoViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Tiempos de viaje observados entre paradas consecutivas (media, p50, p90).
+    Filtros opcionales: ?ruta_id=<uuid>&dia_semana=0-6&hora=0-23
+    """
+    queryset = TiempoTramoHistorico.objects.select_related("parada_origen", "parada_destino")
+    serializer_class = TiempoTramoHistoricoSerializer
+    permission_classes = [IsAuthenticated, HasRoleResourcePermission]
+
+    RANGOS = {"dia_semana": (0, 6), "hora": (0, 23)}
+
+    def _filtros(self):
+        """Filtros de la query validados: (valores, error)."""
+        valores = {}
+        for parametro in ("ruta_id", "dia_semana", "hora"):
+            valor = self.request.query_params.get(parametro)
+            if valor in (None, ""):
+                continue
+            if parametro == "ruta_id":
+                try:
+                    valores[parametro] = uuid.UUID(valor)
+                except ValueError:
+                    return None, "'ruta_id' no es un UUID válido."
+                continue
+            minimo, maximo = self.RANGOS[parametro]
+            try:
+                valores[parametro] = int(valor)
+            except ValueError:
+                valores[parametro] = minimo - 1
+            if not minimo <= valores[parametro] <= maximo:
+                return None, f"'{parametro}' debe ser un entero entre {minimo} y {maximo}."
+        return valores, None
+
+    def get_queryset(self):
+        valores, _ = self._filtros()
+        return self.queryset.filter(**(valores or {}))
+
+    def list(self, request, *args, **kwargs):
+        _, error = self._filtros()
+        if error:
+            return Response({"error": error}, status=400)
+        return super().list(request, *args, **kwargs)
+
+    @action(detail=False, methods=["get"])
+    def duracion(self, request):
+        """
+        Duración observada del recorrido completo de una ruta para una franja
+        (suma de tramos), útil para ajustar HorarioRuta.hora_llegada_estimada.
+        """
+        valores, error = self._filtros()
+        if error:
+            return Response({"error": error}, status=400)
+        if len(valores) < 3:
+            return Response({"error": "Debe indicar 'ruta_id', 'dia_semana' y 'hora'."}, status=400)
+
+        tramos = self.get_queryset()
+        totales = tramos.aggregate(
+            tramos=Count("id"), p50=Sum("p50_segundos"), p90=Sum("p90_segundos"), muestras=Min("muestras")
+        )
+        return Response({
+            "ruta_id": valores["ruta_id"],
+            "dia_semana": valores["dia_semana"],
+            "hora": valores["hora"],
+            "tramos": totales["tramos"],
+            "muestras_minimas": totales["muestras"] or 0,
+            "p50_minutos": round(totales["p50"] / 60, 1) if totales["p50"] else None,
+            "p90_minutos": round(totales["p90"] / 60, 1) if totales["p90"] else None,
+        })
 
 
 # === ALERTAS GPS ===
@@ -125,15 +454,45 @@ class AlertaGPSViewSet(viewsets.ModelViewSet):
     queryset = AlertaGPS.objects.select_related("ruta", "posicion", "resuelta_por")
     serializer_class = AlertaGPSSerializer
     permission_classes = [IsAuthenticated, HasRoleResourcePermission]
+    pagination_class = KeysetPagination
+    keyset_campo = "detectada_en"
     filter_backends = [filters.SearchFilter]
     search_fields = ["ruta__nombre", "tipo", "resuelta"]
 
+    def create(self, request, *args, **kwargs):
+        """
+        Alta de alertas a través del coalescedor, como `registrar`: si ya hay
+        una abierta del mismo tipo en la ruta, se suma a ella (200).
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+        if datos.get("resuelta"):
+            self.perform_create(serializer)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        alerta_id, creada = coalescedor.registrar(
+            datos["ruta"].id, datos["tipo"], descripcion=datos.get("descripcion", "")
+        )
+        serializer = self.get_serializer(self.get_queryset().get(pk=alerta_id))
+        return Response(serializer.data, status=status.HTTP_201_CREATED if creada else status.HTTP_200_OK)
+
+    def update(self, request, *args, **kwargs):
+        try:
+            with transaction.atomic():
+                return super().update(request, *args, **kwargs)
+        except IntegrityError:
+            # Otro proceso abrió el mismo episodio entre la validación y el guardado
+            return Response(
+                {"error": "Ya hay una alerta abierta de este tipo en la ruta."}, status=status.HTTP_409_CONFLICT
+            )
+
     @action(detail=False, methods=["get"])
     def activas(self, request):
         """Lista las alertas GPS no resueltas."""
-        activas = self.get_queryset().filter(resuelta=False)
-        serializer = self.get_serializer(activas, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(self.get_queryset().filter(resuelta=False))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=["post"])
     def resolver(self, request, pk=None):
@@ -145,7 +504,8 @@ class AlertaGPSViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["post"])
     def registrar(self, request):
         """
-        Registra una alerta GPS manual o generada por sistema.
+        Registra una alerta GPS manual o generada por sistema. Si ya hay una
+        abierta del mismo tipo en la ruta, se suma a ella (200) en vez de duplicarla.
         """
         ruta_id = request.data.get("ruta_id")
         tipo = request.data.get("tipo")
@@ -155,12 +515,53 @@ class AlertaGPSViewSet(viewsets.ModelViewSet):
         if not (ruta_id and tipo):
             return Response({"error": "Debe indicar ruta_id y tipo de alerta."}, status=400)
 
-        alerta = AlertaGPS.objects.create(
-            ruta_id=ruta_id,
-            tipo=tipo,
-            descripcion=descripcion,
-            posicion_id=posicion_id,
-            detectada_en=timezone.now(),
+        posicion = Posicion.objects.filter(pk=posicion_id).first() if posicion_id else None
+        alerta_id, creada = coalescedor.registrar(ruta_id, tipo, descripcion=descripcion, posicion=posicion)
+        serializer = self.get_serializer(self.get_queryset().get(pk=alerta_id))
+        return Response(serializer.data, status=201 if creada else 200)
+
+
+# === TRANSMISIÓN EN VIVO (SSE) ===
+SSE_LATIDO_SEGUNDOS = 15
+
+
+async def stream_ruta(request, ruta_id):
+    """
+    Server-Sent Events con las posiciones de vehículos y alertas de una ruta.
+    Requiere ASGI: cada cliente es una corrutina, no un worker bloqueado. Bajo
+    WSGI responde 501 en vez de retener un worker por conexión.
+    """
+    if not _bajo_asgi(request):
+        return JsonResponse(
+            {"error": "La transmisión en vivo requiere servir la aplicación con ASGI (backend.asgi:application)."},
+            status=501,
         )
-        serializer = self.get_serializer(alerta)
-        return Response(serializer.data, status=201)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({"detail": "Autenticación requerida.", "code": "unauthorized"}, status=401)
+    permitido = await sync_to_async(HasRoleResourcePermission().has_permission)(request, None)
+    if not permitido:
+        return JsonResponse({"detail": "Permission Denied", "code": "permission_denied"}, status=403)
+    if not await Ruta.objects.filter(id=ruta_id).aexists():
+        return JsonResponse({"error": "Ruta no encontrada."}, status=404)
+
+    await sync_to_async(obtener_broker().iniciar)()
+    suscripcion = hub.suscribir(canal_ruta(ruta_id))
+
+    async def eventos():
+        try:
+            yield ": conectado\n\n"
+            while True:
+                try:
+                    mensaje = await asyncio.wait_for(suscripcion.cola.get(), SSE_LATIDO_SEGUNDOS)
+                except asyncio.TimeoutError:
+                    yield ": latido\n\n"
+                    continue
+                yield formato_sse(mensaje)
+        finally:
+            hub.cancelar(suscripcion)
+
+    response = StreamingHttpResponse(eventos(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
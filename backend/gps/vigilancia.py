@@ -0,0 +1,111 @@
+# gps/vigilancia.py
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .alertas import coalescedor
+from .metricas import ContadoresCompartidos
+from .models import EstadoPosicion, TipoOrigen, Trayecto, UltimaPosicion
+from .stream import publicar_alerta
+
+
+# Un trayecto abierto sin posiciones durante este lapso se considera sin señal.
+UMBRAL_S = getattr(settings, "GPS_SIN_SENAL_S", 300)
+INTERVALO_S = getattr(settings, "GPS_SIN_SENAL_INTERVALO_S", 30)
+TIPO_ALERTA = EstadoPosicion.SIN_SENAL.value
+
+
+class MetricasVigilancia:
+    """
+    Métricas de los barridos del vigilante de señal. Las escribe el proceso
+    de `vigilar_senal_gps` y las lee el API, así que viven en la caché compartida.
+    """
+
+    def __init__(self):
+        self._contadores = ContadoresCompartidos("vigilancia", ("barridos", "alertas", "recuperados"))
+
+    def registrar(self, resumen):
+        self._contadores.sumar(barridos=1, alertas=resumen["alertas"], recuperados=resumen["recuperados"])
+        # Un único vigilante escribe el máximo: leer y escribir basta
+        maximo = max(self._contadores.leer("duracion_max_ms", 0.0), resumen["duracion_ms"])
+        self._contadores.fijar(duracion_max_ms=maximo, ultimo=dict(resumen))
+
+    def resumen(self):
+        return dict(
+            self._contadores.valores(),
+            duracion_max_ms=self._contadores.leer("duracion_max_ms", 0.0),
+            ultimo=self._contadores.leer("ultimo"),
+        )
+
+    def limpiar(self):
+        self._contadores.limpiar("duracion_max_ms", "ultimo")
+
+
+metricas = MetricasVigilancia()
+
+
+def barrer(ahora=None, umbral_s=UMBRAL_S):
+    """
+    Un barrido del vigilante, con un número fijo de consultas sin importar
+    cuántos trayectos haya abiertos:
+      - los trayectos abiertos cuya última posición es anterior al umbral
+        pasan a "sin señal" y generan una única alerta por episodio;
+      - los que estaban sin señal y volvieron a reportar se recuperan y su
+        alerta se resuelve.
+    """
+    inicio = time.perf_counter()
+    ahora = ahora or timezone.now()
+    limite = ahora - timedelta(seconds=umbral_s)
+    abiertos = Trayecto.objects.filter(finalizado=False)
+    silencio = Q(ultima_posicion_en__lt=limite) | Q(ultima_posicion_en__isnull=True, fecha_inicio__lt=limite)
+
+    with transaction.atomic():
+        perdidos = list(
+            abiertos.filter(silencio, sin_senal_desde__isnull=True)
+            .select_for_update(skip_locked=True)
+            .values_list("id", "ruta_id", "ultima_posicion_en")
+        )
+        alertas = []
+        if perdidos:
+            Trayecto.objects.filter(pk__in=[t[0] for t in perdidos]).update(sin_senal_desde=ahora)
+            alertas = coalescedor.registrar_varias(
+                [(ruta_id, _descripcion(ultima, ahora)) for _, ruta_id, ultima in perdidos], TIPO_ALERTA, ahora
+            )
+            UltimaPosicion.objects.filter(
+                origen_tipo=TipoOrigen.VEHICULO,
+                ruta_id__in={t[1] for t in perdidos},
+                timestamp__lt=limite,
+            ).exclude(estado=EstadoPosicion.SIN_SENAL).update(estado=EstadoPosicion.SIN_SENAL)
+
+        recuperados = list(
+            abiertos.filter(sin_senal_desde__isnull=False, ultima_posicion_en__gte=limite)
+            .select_for_update(skip_locked=True)
+            .values_list("id", "ruta_id")
+        )
+        if recuperados:
+            Trayecto.objects.filter(pk__in=[t[0] for t in recuperados]).update(sin_senal_desde=None)
+            coalescedor.cerrar({t[1] for t in recuperados}, TIPO_ALERTA, ahora)
+
+        # bulk_create no dispara post_save: se difunden al confirmar
+        transaction.on_commit(lambda: [publicar_alerta(alerta) for alerta in alertas])
+
+    resumen = {
+        "revisados": abiertos.count(),
+        "alertas": len(perdidos),
+        "recuperados": len(recuperados),
+        "duracion_ms": round((time.perf_counter() - inicio) * 1000, 2),
+    }
+    metricas.registrar(resumen)
+    return resumen
+
+
+def _descripcion(ultima, ahora):
+    if ultima is None:
+        return "El trayecto no ha reportado ninguna posición."
+    minutos = int((ahora - ultima).total_seconds() // 60)
+    return f"Sin posiciones del bus hace {minutos} min."
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paradas', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zonaparada',
+            name='poligono',
+            field=models.JSONField(blank=True, default=list, help_text='Vértices [latitud, longitud] del límite de la zona (geocerca).'),
+        ),
+    ]
@@ -11,6 +11,9 @@ class ZonaParada(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     nombre = models.CharField(max_length=100, unique=True)
     descripcion = models.TextField(blank=True)
+    poligono = models.JSONField(
+        default=list, blank=True, help_text="Vértices [latitud, longitud] del límite de la zona (geocerca)."
+    )
 
     class Meta:
         verbose_name = "Zona de parada"
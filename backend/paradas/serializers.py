@@ -11,7 +11,24 @@ class ZonaParadaSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = ZonaParada
-        fields = ["id", "nombre", "descripcion"]
+        fields = ["id", "nombre", "descripcion", "poligono"]
+
+    def validate_poligono(self, value):
+        """Lista vacía (sin geocerca) o al menos 3 vértices [latitud, longitud] válidos."""
+        if not value:
+            return []
+        if not isinstance(value, list) or len(value) < 3:
+            raise serializers.ValidationError("El polígono debe tener al menos 3 vértices.")
+        vertices = []
+        for vertice in value:
+            try:
+                lat, lon = (float(c) for c in vertice)
+            except (TypeError, ValueError):
+                raise serializers.ValidationError("Cada vértice debe ser [latitud, longitud].")
+            if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
+                raise serializers.ValidationError("Las coordenadas GPS no son válidas.")
+            vertices.append([lat, lon])
+        return vertices
 
 
 # === PARADAS ===
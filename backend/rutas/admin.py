@@ -7,6 +7,7 @@ from .models import (
     BusRuta,
     HorarioRuta,
     RutaParada,
+    TrazadoRuta,
     Desvio,
     HistorialRuta,
 )
@@ -64,8 +65,8 @@ class RutaAdmin(admin.ModelAdmin):
 
 @admin.register(Bus)
 class BusAdmin(admin.ModelAdmin):
-    list_display = ("placa", "modelo", "capacidad", "activo")
-    search_fields = ("placa", "modelo")
+    list_display = ("placa", "modelo", "capacidad", "dispositivo_id", "activo")
+    search_fields = ("placa", "modelo", "dispositivo_id")
     list_filter = ("activo",)
     ordering = ("placa",)
 
@@ -86,6 +87,14 @@ class BusRutaAdmin(admin.ModelAdmin):
     search_fields = ("bus__placa", "ruta__nombre")
 
 
+@admin.register(TrazadoRuta)
+class TrazadoRutaAdmin(admin.ModelAdmin):
+    list_display = ("ruta", "fuente", "actualizado_en")
+    list_filter = ("fuente",)
+    search_fields = ("ruta__nombre",)
+    readonly_fields = ("actualizado_en",)
+
+
 @admin.register(Desvio)
 class DesvioAdmin(admin.ModelAdmin):
     list_display = ("ruta", "inicio", "fin", "distancia_desviacion", "activo", "detectado_automaticamente")
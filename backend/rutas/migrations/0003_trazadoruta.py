@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:56
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rutas', '0002_alter_desvio_options_alter_ruta_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrazadoRuta',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('puntos', models.JSONField(default=list, help_text='Lista ordenada de vértices [latitud, longitud].')),
+                ('fuente', models.CharField(choices=[('PARADAS', 'Derivado del orden de paradas'), ('CARGADO', 'Cargado manualmente')], default='CARGADO', max_length=20)),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+                ('ruta', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='trazado', to='rutas.ruta')),
+            ],
+            options={
+                'verbose_name': 'Trazado de ruta',
+                'verbose_name_plural': 'Trazados de rutas',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rutas', '0003_trazadoruta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ruta',
+            name='umbral_alerta_m',
+            field=models.PositiveIntegerField(blank=True, help_text='Distancia al trazado (m) que genera una alerta de desvío. Vacío: valor global.', null=True),
+        ),
+        migrations.AddField(
+            model_name='ruta',
+            name='umbral_desvio_m',
+            field=models.PositiveIntegerField(blank=True, help_text='Distancia al trazado (m) que abre un desvío. Vacío: valor global.', null=True),
+        ),
+        migrations.AlterField(
+            model_name='desvio',
+            name='distancia_desviacion',
+            field=models.DecimalField(decimal_places=3, help_text='Distancia máxima fuera de ruta (en metros).', max_digits=10),
+        ),
+    ]
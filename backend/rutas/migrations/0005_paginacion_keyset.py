@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rutas', '0004_umbrales_desvio'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='desvio',
+            index=models.Index(fields=['inicio', 'id'], name='rutas_desvio_inicio_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='desvio',
+            index=models.Index(fields=['activo', 'inicio', 'id'], name='rutas_desvio_activo_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialruta',
+            index=models.Index(fields=['timestamp', 'id'], name='rutas_historial_ts_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialruta',
+            index=models.Index(fields=['ruta', 'timestamp', 'id'], name='rutas_historial_ruta_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rutas', '0005_paginacion_keyset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bus',
+            name='dispositivo_id',
+            field=models.CharField(blank=True, help_text='Identificador (p. ej. IMEI) con el que la unidad a bordo reporta telemetría NMEA.', max_length=64, null=True, unique=True),
+        ),
+    ]
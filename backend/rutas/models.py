@@ -30,6 +30,13 @@ class Bus(models.Model):
     modelo = models.CharField(max_length=50, blank=True)
     capacidad = models.PositiveIntegerField(default=40, help_text="Capacidad total de pasajeros.")
     activo = models.BooleanField(default=True)
+    dispositivo_id = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text="Identificador (p. ej. IMEI) con el que la unidad a bordo reporta telemetría NMEA."
+    )
     creada_en = models.DateTimeField(auto_now_add=True)
     actualizada_en = models.DateTimeField(auto_now=True)
 
@@ -60,6 +67,12 @@ class Ruta(models.Model):
 
     capacidad_total = models.PositiveIntegerField(default=40)
     capacidad_espera = models.PositiveIntegerField(default=10)
+    umbral_desvio_m = models.PositiveIntegerField(
+        blank=True, null=True, help_text="Distancia al trazado (m) que abre un desvío. Vacío: valor global."
+    )
+    umbral_alerta_m = models.PositiveIntegerField(
+        blank=True, null=True, help_text="Distancia al trazado (m) que genera una alerta de desvío. Vacío: valor global."
+    )
     creada_en = models.DateTimeField(auto_now_add=True)
     actualizada_en = models.DateTimeField(auto_now=True)
 
@@ -126,6 +139,30 @@ class RutaParada(models.Model):
         return f"{self.ruta.nombre} → {self.parada.nombre} (#{self.orden})"
 
 
+class FuenteTrazado(models.TextChoices):
+    PARADAS = "PARADAS", "Derivado del orden de paradas"
+    CARGADO = "CARGADO", "Cargado manualmente"
+
+
+class TrazadoRuta(models.Model):
+    """
+    Polilínea (corredor) que sigue el bus a lo largo de la ruta.
+    Si no existe, el corredor se deriva del orden de las paradas (RutaParada.orden).
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    ruta = models.OneToOneField("rutas.Ruta", on_delete=models.CASCADE, related_name="trazado")
+    puntos = models.JSONField(default=list, help_text="Lista ordenada de vértices [latitud, longitud].")
+    fuente = models.CharField(max_length=20, choices=FuenteTrazado.choices, default=FuenteTrazado.CARGADO)
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Trazado de ruta"
+        verbose_name_plural = "Trazados de rutas"
+
+    def __str__(self):
+        return f"Trazado de {self.ruta.nombre} ({len(self.puntos)} vértices)"
+
+
 class Desvio(models.Model):
     """Registra automáticamente los desvíos detectados por el sistema GPS."""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -133,7 +170,7 @@ class Desvio(models.Model):
     horario = models.ForeignKey("rutas.HorarioRuta", on_delete=models.SET_NULL, null=True, blank=True, related_name="desvios")
     inicio = models.DateTimeField(default=timezone.now)
     fin = models.DateTimeField(blank=True, null=True)
-    distancia_desviacion = models.DecimalField(max_digits=6, decimal_places=3, help_text="Distancia máxima fuera de ruta (en metros).")
+    distancia_desviacion = models.DecimalField(max_digits=10, decimal_places=3, help_text="Distancia máxima fuera de ruta (en metros).")
     descripcion = models.TextField(blank=True, help_text="Detalle del desvío detectado automáticamente.")
     activo = models.BooleanField(default=True)
     detectado_automaticamente = models.BooleanField(default=True)
@@ -150,6 +187,10 @@ class Desvio(models.Model):
         ordering = ["-inicio"]
         verbose_name = "Desvío detectado"
         verbose_name_plural = "Desvíos detectados"
+        indexes = [
+            models.Index(fields=["inicio", "id"], name="rutas_desvio_inicio_id_idx"),
+            models.Index(fields=["activo", "inicio", "id"], name="rutas_desvio_activo_inicio_idx"),
+        ]
 
     def __str__(self):
         estado = "Activo" if self.activo else "Cerrado"
@@ -174,6 +215,10 @@ class HistorialRuta(models.Model):
         ordering = ["-timestamp"]
         verbose_name = "Evento de ruta"
         verbose_name_plural = "Historial de rutas"
+        indexes = [
+            models.Index(fields=["timestamp", "id"], name="rutas_historial_ts_id_idx"),
+            models.Index(fields=["ruta", "timestamp", "id"], name="rutas_historial_ruta_ts_idx"),
+        ]
 
     def __str__(self):
         return f"{self.ruta.nombre}: {self.evento}"
@@ -8,6 +8,7 @@ from .models import (
     HorarioRuta,
     BusRuta,
     RutaParada,
+    TrazadoRuta,
     Desvio,
     HistorialRuta
 )
@@ -25,11 +26,16 @@ class BusSerializer(serializers.ModelSerializer):
             "modelo",
             "capacidad",
             "activo",
+            "dispositivo_id",
             "creada_en",
             "actualizada_en",
         ]
         read_only_fields = ["creada_en", "actualizada_en"]
 
+    def validate_dispositivo_id(self, value):
+        # Vacío equivale a sin dispositivo (la restricción única admite varios nulos)
+        return value or None
+
 
 # === HORARIO DE RUTA ===
 class HorarioRutaSerializer(serializers.ModelSerializer):
@@ -85,6 +91,8 @@ class RutaSerializer(serializers.ModelSerializer):
             "buses",
             "capacidad_total",
             "capacidad_espera",
+            "umbral_desvio_m",
+            "umbral_alerta_m",
             "creada_en",
             "actualizada_en",
             "horarios",
@@ -118,6 +126,43 @@ class RutaParadaSerializer(serializers.ModelSerializer):
         fields = ["id", "ruta", "ruta_nombre", "parada", "parada_nombre", "orden", "tiempo_estimado"]
 
 
+# === TRAZADO DE RUTA ===
+class TrazadoRutaSerializer(serializers.ModelSerializer):
+    ruta_nombre = serializers.CharField(source="ruta.nombre", read_only=True)
+
+    class Meta:
+        model = TrazadoRuta
+        fields = ["id", "ruta", "ruta_nombre", "puntos", "fuente", "actualizado_en"]
+        read_only_fields = ["ruta", "fuente", "actualizado_en"]
+
+    def to_internal_value(self, data):
+        """Acepta {"puntos": [[lat, lon], ...]} o un LineString GeoJSON ([lon, lat])."""
+        if isinstance(data, dict) and "puntos" not in data:
+            geometria = data.get("geometry", data) or {}
+            if isinstance(geometria, dict) and geometria.get("type") == "LineString":
+                data = {
+                    "puntos": [
+                        [c[1], c[0]] if isinstance(c, (list, tuple)) and len(c) >= 2 else c
+                        for c in geometria.get("coordinates") or []
+                    ]
+                }
+        return super().to_internal_value(data)
+
+    def validate_puntos(self, puntos):
+        if not isinstance(puntos, list) or len(puntos) < 2:
+            raise serializers.ValidationError("El trazado debe tener al menos dos vértices.")
+        vertices = []
+        for punto in puntos:
+            try:
+                lat, lon = float(punto[0]), float(punto[1])
+            except (TypeError, ValueError, IndexError, KeyError):
+                raise serializers.ValidationError("Cada vértice debe ser [latitud, longitud].")
+            if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
+                raise serializers.ValidationError("Coordenadas fuera de rango válido.")
+            vertices.append([lat, lon])
+        return vertices
+
+
 # === DESVÍO ===
 class DesvioSerializer(serializers.ModelSerializer):
     ruta_nombre = serializers.CharField(source="ruta.nombre", read_only=True)
@@ -7,6 +7,7 @@ from django.utils import timezone
 from django.db.models import Count
 from rest_framework.permissions import IsAuthenticated
 from accounts.permissions import HasRoleResourcePermission
+from accounts.pagination import KeysetPagination
 from accounts.audit import AuditMixin
 
 from .models import (
@@ -15,6 +16,8 @@ from .models import (
     HorarioRuta,
     BusRuta,
     RutaParada,
+    TrazadoRuta,
+    FuenteTrazado,
     Desvio,
     HistorialRuta,
 )
@@ -24,6 +27,7 @@ from .serializers import (
     HorarioRutaSerializer,
     BusRutaSerializer,
     RutaParadaSerializer,
+    TrazadoRutaSerializer,
     DesvioSerializer,
     HistorialRutaSerializer,
 )
@@ -40,9 +44,9 @@ class BusViewSet(AuditMixin, viewsets.ModelViewSet):
     @action(detail=False, methods=["get"])
     def activos(self, request):
         """Lista de buses activos."""
-        activos = self.get_queryset().filter(activo=True)
-        serializer = self.get_serializer(activos, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(self.get_queryset().filter(activo=True))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 # === RUTA ===
@@ -95,6 +99,35 @@ class RutaViewSet(AuditMixin, viewsets.ModelViewSet):
 
         return Response({"message": f"Ruta actualizada a {nuevo_estado}."})
 
+    @action(detail=True, methods=["get", "post", "delete"])
+    def trazado(self, request, pk=None):
+        """
+        Consulta, carga o elimina el trazado (corredor) de la ruta.
+        Sin trazado cargado se devuelve el derivado del orden de paradas.
+        """
+        ruta = self.get_object()
+        trazado = TrazadoRuta.objects.filter(ruta=ruta).first()
+
+        if request.method == "DELETE":
+            if trazado:
+                trazado.delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        if request.method == "POST":
+            serializer = TrazadoRutaSerializer(trazado, data=request.data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save(ruta=ruta, fuente=FuenteTrazado.CARGADO)
+            return Response(serializer.data, status=200 if trazado else 201)
+
+        if trazado:
+            return Response(TrazadoRutaSerializer(trazado).data)
+
+        puntos = [
+            [float(lat), float(lon)]
+            for lat, lon in ruta.rutas_paradas.order_by("orden").values_list("parada__latitud", "parada__longitud")
+        ]
+        return Response({"ruta": ruta.id, "puntos": puntos, "fuente": FuenteTrazado.PARADAS})
+
 
 # === HORARIO RUTA ===
 class HorarioRutaViewSet(viewsets.ModelViewSet):
@@ -144,6 +177,8 @@ class DesvioViewSet(AuditMixin, viewsets.ModelViewSet):
     queryset = Desvio.objects.select_related("ruta", "horario", "creado_por")
     serializer_class = DesvioSerializer
     permission_classes = [IsAuthenticated, HasRoleResourcePermission]
+    pagination_class = KeysetPagination
+    keyset_campo = "inicio"
     filter_backends = [filters.SearchFilter]
     search_fields = ["ruta__nombre"]
 
@@ -160,6 +195,7 @@ class HistorialRutaViewSet(AuditMixin, viewsets.ReadOnlyModelViewSet):
     queryset = HistorialRuta.objects.select_related("ruta", "usuario")
     serializer_class = HistorialRutaSerializer
     permission_classes = [IsAuthenticated, HasRoleResourcePermission]
+    pagination_class = KeysetPagination
     filter_backends = [filters.SearchFilter]
     search_fields = ["ruta__nombre", "evento", "usuario__username"]
 
@@ -169,6 +205,6 @@ class HistorialRutaViewSet(AuditMixin, viewsets.ReadOnlyModelViewSet):
         ruta_id = request.query_params.get("ruta_id")
         if not ruta_id:
             return Response({"error": "Debe indicar 'ruta_id'."}, status=400)
-        eventos = self.get_queryset().filter(ruta_id=ruta_id)
-        serializer = self.get_serializer(eventos, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(self.get_queryset().filter(ruta_id=ruta_id))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)